@@ -0,0 +1,83 @@
+"""
+Microbenchmarks and load tests of the backend, run one as a module, e.g.
+python -m backend.benchmarks.serialization
+
+They print their numbers and need no external services: rows are built in
+memory or written to a throwaway SQLite database, and the OpenAI API is
+replaced by the local fake server of backend/tests/fake_openai.py.
+"""
+
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+
+def use_scratch_database():
+    """Point the app at a throwaway SQLite database unless one is configured"""
+    os.environ.setdefault(
+        "DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/benchmark.db"
+    )
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50, p99 and max of durations in seconds, as milliseconds"""
+    samples = sorted(samples)
+    return {
+        "p50_ms": statistics.median(samples) * 1000,
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def timed(fn: Callable[[], object], repeat: int = 200) -> Dict[str, float]:
+    """Run fn repeat times after a warm-up call, see percentiles"""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def report(title: str, rows: Dict[str, Dict[str, float]]):
+    """Print a table of named results, one column per measured value"""
+    columns = list(next(iter(rows.values())))
+    width = max(len(name) for name in rows) + 2
+    print(f"\n{title}")
+    print(" " * width + "".join(f"{column:>14}" for column in columns))
+    for name, values in rows.items():
+        cells = "".join(
+            f"{value:>14.3f}" if isinstance(value, float) else f"{value:>14}"
+            for value in (values[column] for column in columns)
+        )
+        print(f"{name:<{width}}{cells}")
+
+
+async def timed_concurrently(
+    fn: Callable[[], Awaitable[object]], count: int, concurrency: int
+) -> Tuple[List[float], int]:
+    """
+    Await fn count times, at most concurrency at a time. Returns the duration
+    of every call that succeeded and the number of calls that raised.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await fn()
+            except Exception:
+                errors += 1
+            else:
+                samples.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(count)))
+    return samples, errors
@@ -0,0 +1,93 @@
+"""
+GET /stocks/{id}/financials serialization: FinancialResponse with one
+FinancialMetrics object per period through the response_model path, against
+FinancialColumns built straight from the rows and rendered by orjson.
+Both start from rows as the database returns them, Decimal values included.
+"""
+
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+from pydantic import TypeAdapter
+
+from . import report, timed, use_scratch_database
+
+use_scratch_database()
+
+from ..models.financial import METRIC_COLUMNS  # noqa: E402
+from ..schemas import FinancialResponse  # noqa: E402
+from ..services.financial import (  # noqa: E402
+    _columns_from_rows,
+    _statements_from_rows,
+)
+from ..services.serialization import dumps  # noqa: E402
+
+# Periods per stock: 10 years, 10 years of quarters, 30 years of quarters
+PERIODS = (10, 40, 120)
+# Metrics a company typically leaves blank, stored as NULL
+BLANK = {"land_and_real_estate", "investments_subsidiaries", "reserves"}
+
+
+def _rows(periods: int):
+    rows = []
+    for i in range(periods):
+        year = date(2000 + i // 4, 3 * (i % 4) + 1, 28)
+        values = [
+            None if column in BLANK else Decimal(f"{(i + 1) * 1000 + j}.25")
+            for j, column in enumerate(METRIC_COLUMNS)
+        ]
+        rows.append((year, *values))
+    return rows
+
+
+def main():
+    adapter = TypeAdapter(FinancialResponse)
+    updated_at = datetime(2024, 6, 30, tzinfo=timezone.utc)
+
+    results = {}
+    for periods in PERIODS:
+        rows = _rows(periods)
+        statements = [
+            SimpleNamespace(year=row[0], **dict(zip(METRIC_COLUMNS, row[1:])))
+            for row in rows
+        ]
+
+        def per_period():
+            response = FinancialResponse(
+                stock_id=1,
+                data=_statements_from_rows(statements),
+                updated_at=updated_at,
+            )
+            return dumps(
+                adapter.dump_python(adapter.validate_python(response), mode="json")
+            )
+
+        def columnar():
+            columns = _columns_from_rows(1, rows)
+            columns.updated_at = updated_at
+            return dumps(columns.model_dump())
+
+        # Same values either way
+        objects = json.loads(per_period())
+        table = json.loads(columnar())
+        assert table["values"] == [
+            [objects["data"][period][field] for field in table["fields"]]
+            for period in table["periods"]
+        ]
+
+        for name, fn in (("per period", per_period), ("columnar", columnar)):
+            results[f"{periods} periods {name}"] = {
+                **timed(fn),
+                "bytes": len(fn()),
+            }
+
+    report(
+        f"Serialization of one stock's financials, {len(METRIC_COLUMNS)} metrics",
+        results,
+    )
+
+
+if __name__ == "__main__":
+    main()
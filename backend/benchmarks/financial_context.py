@@ -0,0 +1,158 @@
+"""
+Input tokens of the AI prompts that take financial data, on a realistic
+10-year payload: the former "Field: 1,234.00" lines and unbounded previous
+answers against the compact table of services/financial_context.py within
+its token budgets. Tokens are counted with estimate_tokens.
+"""
+
+import random
+
+from . import report, use_scratch_database
+
+use_scratch_database()
+
+from ..models import Exchange, Stock  # noqa: E402
+from ..routes.prompt import (  # noqa: E402
+    PROMPTS,
+    _prompt_query,
+    format_previous_answers,
+    prompts_take_data,
+    prompts_take_previous_prompts,
+)
+from ..schemas import FinancialMetrics  # noqa: E402
+from ..services.financial_context import estimate_tokens  # noqa: E402
+from ..services.openai import _ai_prompt_request  # noqa: E402
+
+YEARS = 10
+# Share of each metric in revenue, metrics a mid-cap typically leaves blank
+# (land, subsidiaries, non-controlling interests...) are left out
+SHARES_OF_REVENUE = {
+    "gross_profit": 0.38,
+    "profit_before_tax": 0.14,
+    "profit_after_tax": 0.11,
+    "profit_after_tax_for_shareholders": 0.105,
+    "cash": 0.12,
+    "inventories": 0.15,
+    "receivables": 0.13,
+    "investments_in_securities": 0.03,
+    "other_current_assets": 0.02,
+    "property_plant_equipment": 0.55,
+    "intangible_assets": 0.18,
+    "non_current_investments": 0.04,
+    "other_non_current_assets": 0.02,
+    "borrowings": 0.06,
+    "payables": 0.11,
+    "lease_liabilities": 0.01,
+    "tax_liabilities": 0.015,
+    "other_current_liabilities": 0.04,
+    "long_term_debts": 0.22,
+    "long_term_lease_liabilities": 0.03,
+    "deferred_tax_liabilities": 0.02,
+    "other_non_current_liabilities": 0.01,
+    "share_capital": 0.05,
+    "retained_earnings": 0.48,
+    "reserves": 0.07,
+    "net_cash_from_operating_activities": 0.16,
+    "investments_in_ppe": -0.07,
+    "investments_in_acquisitions": -0.02,
+}
+SHARES = 410_000_000
+
+
+def _financial_data(rng: random.Random):
+    data = {}
+    revenue = 2_400_000_000.0
+    for year in range(2015, 2015 + YEARS):
+        revenue *= rng.uniform(0.97, 1.12)
+        metrics = {
+            name: round(revenue * share * rng.uniform(0.9, 1.1), 2)
+            for name, share in SHARES_OF_REVENUE.items()
+        }
+        eps = metrics["profit_after_tax_for_shareholders"] / SHARES
+        price = round(eps * rng.uniform(12, 22), 2)
+        data[f"{year}-12-31"] = FinancialMetrics(
+            revenue=round(revenue, 2),
+            earnings_per_share=round(eps, 2),
+            dividend_per_share=round(eps * 0.4, 2),
+            share_price_at_report_date=price,
+            max_share_price=round(price * rng.uniform(1.05, 1.3), 2),
+            min_share_price=round(price * rng.uniform(0.7, 0.95), 2),
+            **metrics,
+        )
+    return data
+
+
+def _legacy_financial_data(financial_data) -> str:
+    """The "Financial Results" lines sent before the compact table"""
+    lines = []
+    for date, metrics in financial_data.items():
+        metric_strings = [
+            f"{field.replace('_', ' ').title()}: {value:,.2f}"
+            for field, value in metrics.model_dump(exclude_none=True).items()
+        ]
+        lines.append(f"Financial Results: {date} " + ", ".join(metric_strings))
+    return "\n".join(lines)
+
+
+def _legacy_previous_answers(answers, prompt_id: str) -> str:
+    """Every other answer, before AI_PREVIOUS_ANSWERS_TOKENS"""
+    return "".join(
+        f"Prompt id: {answer_prompt_id}, Prompt: {PROMPTS[answer_prompt_id]}, "
+        f"Answer: {response}.\n"
+        for answer_prompt_id, response in answers.items()
+        if answer_prompt_id != prompt_id
+    )
+
+
+def _request_tokens(query: dict) -> int:
+    request = _ai_prompt_request(**query)
+    return estimate_tokens(request["instructions"] + request["input"])
+
+
+def main():
+    rng = random.Random(7)
+    financial_data = _financial_data(rng)
+    stock = Stock(id=1, user_id=1, company_name="Acme Industries", country="US")
+    stock.exchange = Exchange(name="New York Stock Exchange")
+    # Stored answers are capped at 500 characters
+    answers = {
+        prompt_id: " ".join(rng.choices(PROMPTS[prompt_id].split(), k=200))[:500]
+        for prompt_id in PROMPTS
+    }
+
+    results = {}
+    for prompt_id in prompts_take_data:
+        takes_answers = prompt_id in prompts_take_previous_prompts
+        query = _prompt_query(
+            stock,
+            prompt_id,
+            financial_data,
+            format_previous_answers(answers, prompt_id) if takes_answers else "",
+        )
+        legacy_query = {
+            **query,
+            "data": _legacy_financial_data(financial_data),
+            "prev_queries": (
+                _legacy_previous_answers(answers, prompt_id) if takes_answers else ""
+            ),
+        }
+
+        before = _request_tokens(legacy_query)
+        after = _request_tokens(query)
+        results[prompt_id] = {
+            "data_before": estimate_tokens(legacy_query["data"]),
+            "data_after": estimate_tokens(query["data"]),
+            "years_kept": len(query["data"].split("\n")[0].split("|")) - 1,
+            "input_before": before,
+            "input_after": after,
+            "saved_%": (1 - after / before) * 100,
+        }
+
+    report(
+        f"Estimated input tokens per prompt, {YEARS} years of financial data",
+        results,
+    )
+
+
+if __name__ == "__main__":
+    main()
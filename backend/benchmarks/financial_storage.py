@@ -0,0 +1,198 @@
+"""
+Financial statements stored one row per metric (the legacy financials table)
+against one wide row per period (financial_statements): on-disk size of the
+table and its indexes, latency of reading one stock, and CPU time of pivoting
+the fetched rows into FinancialMetrics per period.
+"""
+
+import asyncio
+import time
+from datetime import date
+
+from sqlalchemy import insert, select, text
+
+from . import percentiles, report, timed, use_scratch_database
+
+use_scratch_database()
+
+from ..database import async_session, create_tables  # noqa: E402
+from ..models import Financial, FinancialStatement, Stock, User  # noqa: E402
+from ..models.financial import METRIC_COLUMNS  # noqa: E402
+from ..schemas import FinancialMetrics  # noqa: E402
+from ..services.financial import get_financial_statements  # noqa: E402
+
+STOCKS = 200
+YEARS = 10
+REPEAT = 200
+
+
+def _value(stock_id: int, year: int, i: int) -> float:
+    return round(stock_id * 1000.25 + year * 10 + i, 2)
+
+
+def _pivot_fields(rows):
+    """The legacy read: group (year, field, value) rows by period"""
+    data = {}
+    for year, field, value in rows:
+        data.setdefault(year.strftime("%Y-%m-%d"), {})[field] = value
+    return {key: FinancialMetrics(**metrics) for key, metrics in data.items()}
+
+
+def _pivot_statements(rows):
+    return {
+        row[0].strftime("%Y-%m-%d"): FinancialMetrics(
+            **dict(zip(METRIC_COLUMNS, row[1:]))
+        )
+        for row in rows
+    }
+
+
+async def _populate(user_id: int):
+    async with async_session() as db:
+        stocks = [
+            Stock(user_id=user_id, ticker=f"S{n}", company_name=f"Stock {n}")
+            for n in range(STOCKS)
+        ]
+        db.add_all(stocks)
+        await db.flush()
+
+        years = [date(2000 + year, 12, 31) for year in range(YEARS)]
+        await db.execute(
+            insert(Financial),
+            [
+                {
+                    "user_id": user_id,
+                    "stock_id": stock.id,
+                    "year": year,
+                    "field": column,
+                    "value": _value(stock.id, year.year, i),
+                }
+                for stock in stocks
+                for year in years
+                for i, column in enumerate(METRIC_COLUMNS)
+            ],
+        )
+        await db.execute(
+            insert(FinancialStatement),
+            [
+                {
+                    "user_id": user_id,
+                    "stock_id": stock.id,
+                    "year": year,
+                    **{
+                        column: _value(stock.id, year.year, i)
+                        for i, column in enumerate(METRIC_COLUMNS)
+                    },
+                }
+                for stock in stocks
+                for year in years
+            ],
+        )
+        await db.commit()
+        return [stock.id for stock in stocks]
+
+
+async def _sizes():
+    """Bytes of each table with its indexes, from SQLite's dbstat"""
+    async with async_session() as db:
+        result = await db.execute(
+            text(
+                "SELECT m.tbl_name, count(*), sum(d.pgsize) FROM dbstat d "
+                "JOIN sqlite_master m ON d.name = m.name GROUP BY m.tbl_name"
+            )
+        )
+        return {table: (pages, size) for table, pages, size in result.all()}
+
+
+async def _read_fields(db, user_id: int, stock_id: int):
+    result = await db.execute(
+        select(Financial.year, Financial.field, Financial.value).where(
+            Financial.user_id == user_id, Financial.stock_id == stock_id
+        )
+    )
+    return _pivot_fields(result.all())
+
+
+async def _read_latency(read, user_id: int, stock_ids):
+    samples = []
+    async with async_session() as db:
+        for n in range(REPEAT):
+            start = time.perf_counter()
+            await read(db, user_id, stock_ids[n % len(stock_ids)])
+            samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+async def main():
+    await create_tables()
+    async with async_session() as db:
+        user = User(username="bench", email="bench@example.com", password_hash="x")
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+
+    stock_ids = await _populate(user_id)
+    async with async_session() as db:
+        await db.execute(text("VACUUM"))
+
+    sizes = await _sizes()
+    report(
+        f"On disk, {STOCKS} stocks x {YEARS} years x {len(METRIC_COLUMNS)} metrics",
+        {
+            table: {"rows": rows, "kib": sizes[table][1] / 1024}
+            for table, rows in (
+                ("financials", STOCKS * YEARS * len(METRIC_COLUMNS)),
+                ("financial_statements", STOCKS * YEARS),
+            )
+        },
+    )
+
+    report(
+        f"Reading one stock ({YEARS} years)",
+        {
+            "one row per metric": await _read_latency(
+                _read_fields, user_id, stock_ids
+            ),
+            "one row per period": await _read_latency(
+                get_financial_statements, user_id, stock_ids
+            ),
+        },
+    )
+
+    stock_id = stock_ids[0]
+    async with async_session() as db:
+        field_rows = (
+            await db.execute(
+                select(Financial.year, Financial.field, Financial.value).where(
+                    Financial.user_id == user_id, Financial.stock_id == stock_id
+                )
+            )
+        ).all()
+        statement_rows = (
+            await db.execute(
+                select(
+                    FinancialStatement.year,
+                    *(getattr(FinancialStatement, c) for c in METRIC_COLUMNS),
+                ).where(
+                    FinancialStatement.user_id == user_id,
+                    FinancialStatement.stock_id == stock_id,
+                )
+            )
+        ).all()
+
+    assert _pivot_fields(field_rows) == _pivot_statements(statement_rows)
+    report(
+        f"Pivoting fetched rows of one stock ({YEARS} years)",
+        {
+            f"{len(field_rows)} metric rows": timed(
+                lambda: _pivot_fields(field_rows)
+            ),
+            f"{len(statement_rows)} period rows": timed(
+                lambda: _pivot_statements(statement_rows)
+            ),
+        },
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
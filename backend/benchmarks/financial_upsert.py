@@ -0,0 +1,143 @@
+"""
+Round trips and latency of saving financial statements by payload size: the
+former per-field SELECT then INSERT/UPDATE of the financials table against
+the single upsert of financial_statements. Runs on a throwaway SQLite file,
+so the latency has no network in it; "at 1ms RTT" adds one millisecond per
+round trip, as a database on another host would.
+"""
+
+import asyncio
+import statistics
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import event, select
+
+from . import report, use_scratch_database
+
+use_scratch_database()
+
+from ..database import async_session, create_tables  # noqa: E402
+from ..database.database import engine  # noqa: E402
+from ..models import Financial, Stock, User  # noqa: E402
+from ..schemas import FinancialMetrics  # noqa: E402
+from ..services.financial import upsert_financial_statements  # noqa: E402
+
+YEARS = (1, 5, 10, 20)
+REPEAT = 5
+RTT_SECONDS = 0.001
+
+_round_trips = 0
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_round_trip(*args):
+    global _round_trips
+    _round_trips += 1
+
+
+def _payload(years: int, scale: float = 1.0):
+    return {
+        f"{2000 + year}-12-31": FinancialMetrics(
+            **{
+                name: round((i + 1) * 1000.5 * scale, 2)
+                for i, name in enumerate(FinancialMetrics.model_fields)
+            }
+        )
+        for year in range(years)
+    }
+
+
+async def _legacy_save(db, user_id: int, stock_id: int, data):
+    """The per-field writes save_financial_data made before the bulk upsert"""
+    for date_str, metrics in data.items():
+        financial_year = datetime.strptime(date_str, "%Y-%m-%d").date()
+
+        for field_name, value in metrics.model_dump().items():
+            if value is not None:
+                db_data = await db.execute(
+                    select(Financial).where(
+                        Financial.user_id == user_id,
+                        Financial.year == financial_year,
+                        Financial.field == field_name,
+                        Financial.stock_id == stock_id,
+                    )
+                )
+                current_record = db_data.scalar_one_or_none()
+
+                if current_record and current_record.value != value:
+                    current_record.value = value
+                    current_record.created_at = datetime.now(timezone.utc)
+                    db.add(current_record)
+
+                elif not current_record:
+                    db.add(
+                        Financial(
+                            stock_id=stock_id,
+                            user_id=user_id,
+                            year=financial_year,
+                            field=field_name,
+                            value=value,
+                        )
+                    )
+
+
+async def _bulk_save(db, user_id: int, stock_id: int, data):
+    await upsert_financial_statements(db, user_id, stock_id, data)
+
+
+async def _measure(save, user_id: int, stock_id: int, data):
+    global _round_trips
+    async with async_session() as db:
+        _round_trips = 0
+        start = time.perf_counter()
+        await save(db, user_id, stock_id, data)
+        await db.commit()
+        return time.perf_counter() - start, _round_trips
+
+
+async def main():
+    await create_tables()
+    async with async_session() as db:
+        user = User(username="bench", email="bench@example.com", password_hash="x")
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+
+    async def new_stock() -> int:
+        async with async_session() as db:
+            stock = Stock(user_id=user_id, ticker="BNCH", company_name="Bench")
+            db.add(stock)
+            await db.commit()
+            return stock.id
+
+    results = {}
+    for years in YEARS:
+        for name, save in (("per field", _legacy_save), ("bulk upsert", _bulk_save)):
+            for write, scale in (("insert", 1.0), ("update", 1.5)):
+                samples = []
+                for _ in range(REPEAT):
+                    stock_id = await new_stock()
+                    if write == "update":
+                        await _measure(save, user_id, stock_id, _payload(years))
+                    samples.append(
+                        await _measure(save, user_id, stock_id, _payload(years, scale))
+                    )
+
+                latency = statistics.median(seconds for seconds, _ in samples)
+                round_trips = samples[0][1]
+                results[f"{years}y {name} {write}"] = {
+                    "round_trips": round_trips,
+                    "local_ms": latency * 1000,
+                    "at_1ms_rtt_ms": (latency + round_trips * RTT_SECONDS) * 1000,
+                }
+
+    report(
+        f"Saving financial statements, {len(FinancialMetrics.model_fields)} "
+        "metrics per year",
+        results,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
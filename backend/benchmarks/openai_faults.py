@@ -0,0 +1,80 @@
+"""
+Tail latency of AI calls against a degraded provider: the local fake server
+answers in 50ms but fails some requests and is slow on others. Compares the
+plain retries against hedging the calls slower than their p95. The usage
+ledger is not written, so only the AI call path is measured.
+"""
+
+import asyncio
+import logging
+
+from . import percentiles, report, timed_concurrently, use_scratch_database
+
+use_scratch_database()
+
+from ..services import openai as openai_service  # noqa: E402
+from ..tests.fake_openai import FakeResponsesServer  # noqa: E402
+
+CALLS = 400
+CONCURRENCY = 20
+
+SCENARIOS = {
+    "healthy": dict(fault_rate=0.0, slow_rate=0.0),
+    "5% errors": dict(fault_rate=0.05, slow_rate=0.0),
+    "2% slow (1s)": dict(fault_rate=0.0, slow_rate=0.02),
+    "5% slow (1s)": dict(fault_rate=0.0, slow_rate=0.05),
+    "5% errors, 5% slow": dict(fault_rate=0.05, slow_rate=0.05),
+}
+
+
+async def _skip_ledger(*args, **kwargs):
+    pass
+
+
+async def _run(scenario: dict, hedge: bool) -> dict:
+    async with FakeResponsesServer(latency=0.05, seed=1) as server:
+        server.fault_rate = scenario["fault_rate"]
+        server.slow_rate = scenario["slow_rate"]
+        server.slow_latency = 1.0
+
+        openai_service.OPENAI_HEDGE = hedge
+        openai_service.OPENAI_BACKOFF_BASE_SECONDS = 0.05
+        openai_service._breaker = openai_service.CircuitBreaker(1000, 30)
+        openai_service._latencies = {}
+        openai_service._async_openai_client = openai_service.openai.AsyncOpenAI(
+            base_url=server.base_url, api_key="fake", max_retries=0
+        )
+
+        async def call():
+            return await openai_service.query_company_description_async(
+                "Apple Inc", "NASDAQ", "United States"
+            )
+
+        try:
+            await call()
+            server.requests = 0
+            samples, errors = await timed_concurrently(call, CALLS, CONCURRENCY)
+        finally:
+            await openai_service.close_async_openai_client()
+
+        return {
+            **percentiles(samples),
+            "errors": errors,
+            "requests": server.requests,
+        }
+
+
+async def main():
+    logging.disable(logging.CRITICAL)
+    openai_service.record_ai_usage = _skip_ledger
+
+    results = {}
+    for name, scenario in SCENARIOS.items():
+        results[name] = await _run(scenario, hedge=False)
+        results[f"{name}, hedged"] = await _run(scenario, hedge=True)
+
+    report(f"{CALLS} company descriptions, {CONCURRENCY} concurrent", results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Load test of login bursts: latency of GET /stocks/ from other clients while
+logins run bcrypt, with the hashing pool of services/password.py and with
+bcrypt called inline on the event loop as before it. Requests go through
+the ASGI app in process, so a blocked event loop shows up in every one.
+"""
+
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from . import percentiles, report, timed_concurrently, use_scratch_database
+
+use_scratch_database()
+
+from ..database import create_tables  # noqa: E402
+from ..routes.stocks import router as stocks_router  # noqa: E402
+from ..routes.users import router as users_router  # noqa: E402
+from ..services import password  # noqa: E402
+from ..services.serialization import FastJSONResponse  # noqa: E402
+
+LOGINS = 32
+READS = 400
+READERS = 4
+CREDENTIALS = {"email": "bench@example.com", "password": "correct horse"}
+
+
+async def _inline(func, *args):
+    """bcrypt on the event loop, as logins ran before the hashing pool"""
+    return func(*args)
+
+
+async def _measure(client: httpx.AsyncClient, headers: dict, logins: int):
+    async def read():
+        response = await client.get("/stocks/", headers=headers)
+        response.raise_for_status()
+
+    async def login():
+        response = await client.post("/users/login", json=CREDENTIALS)
+        response.raise_for_status()
+
+    start = time.perf_counter()
+    burst = asyncio.gather(*(login() for _ in range(logins)))
+    samples, errors = await timed_concurrently(read, READS, READERS)
+    await burst
+    assert not errors
+    return {
+        **percentiles(samples),
+        "logins_s": time.perf_counter() - start if logins else 0.0,
+    }
+
+
+async def main():
+    await create_tables()
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.include_router(users_router)
+    app.include_router(stocks_router)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        response = await client.post(
+            "/users/register", json={"username": "bench", **CREDENTIALS}
+        )
+        response.raise_for_status()
+        response = await client.post("/users/login", json=CREDENTIALS)
+        token = response.json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        # Warm-up, the first requests build caches and schemas
+        await _measure(client, headers, 0)
+        results = {"no logins": await _measure(client, headers, 0)}
+        results[f"{LOGINS} logins, pool"] = await _measure(client, headers, LOGINS)
+
+        pooled = password._run_in_pool
+        password._run_in_pool = _inline
+        try:
+            results[f"{LOGINS} logins, inline"] = await _measure(
+                client, headers, LOGINS
+            )
+        finally:
+            password._run_in_pool = pooled
+
+    report(
+        f"GET /stocks/ from {READERS} clients during a login burst "
+        f"(bcrypt rounds {password.BCRYPT_ROUNDS}, "
+        f"pool of {password.PASSWORD_HASH_CONCURRENCY})",
+        results,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
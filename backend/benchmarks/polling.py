@@ -0,0 +1,163 @@
+"""
+Replayed polling workload: a dashboard refreshing the stock list and the
+financials of its watched stocks every tick while the user occasionally saves
+new figures. A client sending If-None-Match with its cached ETags against one
+refetching everything: bytes downloaded, 304 share, request latency and the
+process CPU time of the run. Requests go through the ASGI app in process,
+with the compression middleware.
+"""
+
+import asyncio
+import json
+import random
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from . import percentiles, report, use_scratch_database
+
+use_scratch_database()
+
+from ..database import async_session, create_tables  # noqa: E402
+from ..models import Stock, User  # noqa: E402
+from ..routes.financial import router as financial_router  # noqa: E402
+from ..routes.stocks import router as stocks_router  # noqa: E402
+from ..schemas import FinancialMetrics  # noqa: E402
+from ..services.auth import create_access_token  # noqa: E402
+from ..services.compression import CompressionMiddleware  # noqa: E402
+from ..services.financial import upsert_financial_statements  # noqa: E402
+from ..services.serialization import FastJSONResponse  # noqa: E402
+
+STOCKS = 100
+WATCHED = 5
+YEARS = 10
+TICKS = 200
+# Share of ticks in which the user saves a year of figures of a watched stock
+WRITE_RATE = 0.05
+
+
+def _metrics(rng: random.Random) -> FinancialMetrics:
+    return FinancialMetrics(
+        **{
+            name: round(rng.uniform(1e6, 1e9), 2)
+            for name in FinancialMetrics.model_fields
+        }
+    )
+
+
+async def _populate(rng: random.Random) -> User:
+    async with async_session() as db:
+        user = User(username="bench", email="bench@example.com", password_hash="x")
+        db.add(user)
+        await db.flush()
+        stocks = [
+            Stock(
+                user_id=user.id,
+                ticker=f"S{i}",
+                company_name=f"Stock {i} Holdings",
+                country="Malaysia",
+                description="Makes things. " * 10,
+            )
+            for i in range(STOCKS)
+        ]
+        db.add_all(stocks)
+        await db.flush()
+        for stock in stocks[:WATCHED]:
+            await upsert_financial_statements(
+                db,
+                user.id,
+                stock.id,
+                {f"{2010 + year}-12-31": _metrics(rng) for year in range(YEARS)},
+            )
+        await db.commit()
+        return user
+
+
+async def _replay(client: httpx.AsyncClient, headers: dict, conditional: bool):
+    """Run the workload, the same writes for both clients thanks to the seed"""
+    rng = random.Random(1)
+    urls = ["/stocks/", *(f"/stocks/{i}/financials" for i in range(1, WATCHED + 1))]
+    cache = {}
+    samples = []
+    downloaded = 0
+    not_modified = 0
+
+    cpu_started = time.process_time()
+    for _ in range(TICKS):
+        if rng.random() < WRITE_RATE:
+            stock_id = rng.randint(1, WATCHED)
+            payload = {
+                "stock_id": stock_id,
+                "data": {"2019-12-31": _metrics(rng).model_dump()},
+            }
+            response = await client.post(
+                f"/stocks/{stock_id}/financials", json=payload, headers=headers
+            )
+            response.raise_for_status()
+
+        for url in urls:
+            request_headers = dict(headers)
+            if conditional and url in cache:
+                request_headers["If-None-Match"] = cache[url][0]
+
+            started = time.perf_counter()
+            response = await client.get(url, headers=request_headers)
+            samples.append(time.perf_counter() - started)
+            downloaded += response.num_bytes_downloaded
+
+            if response.status_code == 304:
+                not_modified += 1
+            else:
+                response.raise_for_status()
+                cache[url] = (response.headers["ETag"], response.content)
+    cpu = time.process_time() - cpu_started
+
+    return cache, {
+        "requests": len(samples),
+        "not_modified": not_modified,
+        "kib": downloaded / 1024,
+        **percentiles(samples),
+        "cpu_s": cpu,
+    }
+
+
+async def main():
+    await create_tables()
+    user = await _populate(random.Random(0))
+    token = create_access_token(
+        {"sub": user.email, "username": user.username, "uid": user.id}
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(CompressionMiddleware)
+    app.include_router(stocks_router)
+    app.include_router(financial_router)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        # Warm-up, the first requests build caches and schemas
+        await _replay(client, headers, conditional=False)
+
+        _, plain = await _replay(client, headers, conditional=False)
+        cache, conditional = await _replay(client, headers, conditional=True)
+
+        # The bodies kept on 304 are the current ones, but for the time of
+        # the response the financials carry as updated_at
+        for url, (_, body) in cache.items():
+            response = await client.get(url, headers=headers)
+            current, kept = response.json(), json.loads(body)
+            if isinstance(current, dict):
+                del current["updated_at"], kept["updated_at"]
+            assert current == kept, url
+
+    report(
+        f"{TICKS} polls of the stock list and {WATCHED} financials, "
+        f"{WRITE_RATE:.0%} of them after a write",
+        {"refetch": plain, "If-None-Match": conditional},
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Response serialization per route: FastAPI's response_model path (validate,
+jsonable_encoder, json.dumps) against trusted_dict and orjson, on rows as
+the database returns them. Also checks both produce the same JSON.
+"""
+
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from ..schemas import ExchangeResponse, InvestSummaryResponse, StockResponse
+from ..services.serialization import dumps, trusted_dict
+from . import report, timed
+
+ROWS = 500
+
+
+def _stock(i: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=i,
+        ticker=f"T{i}",
+        company_name=f"Company {i} Holdings",
+        abbreviation=f"C{i}",
+        exchange_id=i % 7 or None,
+        sector="Technology",
+        country="United States",
+        created_at=datetime(2024, 1, 1, 12, 30, i % 60, 1000, tzinfo=timezone.utc),
+        description="Makes things. " * 20,
+        ai_description=None,
+    )
+
+
+def _exchange(i: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=i,
+        abbreviation=f"X{i}",
+        name=f"Exchange {i}",
+        country="Malaysia",
+        created_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def _investment(i: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        curr_date=date(2024, 6, 30),
+        current_share_price=Decimal("123.4500"),
+        past_4q_revenue=Decimal("1234567.89"),
+        past_4q_net_profit=Decimal("234567.89"),
+        past_4q_earnings_per_share=Decimal("1.2300"),
+        stock_type="Growth",
+        invest="Yes",
+        investment_reasoning="Growing revenue and margins. " * 10,
+        created_at=datetime(2024, 6, 30, 8, tzinfo=timezone.utc),
+    )
+
+
+ROUTES = {
+    "GET /stocks/": (StockResponse, _stock),
+    "GET /exchanges/": (ExchangeResponse, _exchange),
+    "GET /investment/{id}": (InvestSummaryResponse, _investment),
+}
+
+
+def main():
+    results = {}
+    for route, (schema, make_row) in ROUTES.items():
+        rows = [make_row(i) for i in range(ROWS)]
+        adapter = TypeAdapter(List[schema])
+
+        def response_model():
+            content = adapter.dump_python(
+                adapter.validate_python(rows, from_attributes=True), mode="json"
+            )
+            return json.dumps(jsonable_encoder(content)).encode("utf-8")
+
+        def trusted():
+            return dumps([trusted_dict(schema, row) for row in rows])
+
+        assert json.loads(response_model()) == json.loads(trusted()), route
+
+        results[f"{route} response_model"] = timed(response_model)
+        results[f"{route} trusted_dict"] = timed(trusted)
+
+    report(f"Serialization of {ROWS} rows", results)
+
+
+if __name__ == "__main__":
+    main()
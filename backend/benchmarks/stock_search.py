@@ -0,0 +1,48 @@
+"""
+In-memory stock search: index build time, search latency of exact, prefix
+and misspelled queries, and the cost of incremental writes, by index size.
+"""
+
+import random
+import string
+
+from ..services.stock_search import StockSearchIndex
+from . import report, timed
+
+SIZES = (1_000, 10_000, 50_000)
+WORDS = (
+    "global", "holdings", "technology", "bank", "energy", "resources",
+    "pharma", "capital", "industries", "foods", "systems", "motors",
+)  # fmt: skip
+
+
+def _rows(count: int, rng: random.Random):
+    for stock_id in range(1, count + 1):
+        ticker = "".join(rng.choices(string.ascii_uppercase, k=rng.randint(2, 5)))
+        name = " ".join(rng.sample(WORDS, 3)).title()
+        yield stock_id, ticker, ticker[:3], name
+
+
+def main():
+    rng = random.Random(42)
+    for size in SIZES:
+        rows = list(_rows(size, rng))
+        index = StockSearchIndex.build(rows)
+        _, ticker, _, name = rows[size // 2]
+        misspelled = name.split()[0][:-1] + "x"
+        removed = iter(range(1, size + 1))
+
+        results = {
+            "build": timed(lambda: StockSearchIndex.build(rows), repeat=5),
+            "search exact ticker": timed(lambda: index.search(ticker)),
+            "search one letter": timed(lambda: index.search(ticker[0])),
+            "search name prefix": timed(lambda: index.search(name[:5])),
+            "search misspelled": timed(lambda: index.search(misspelled)),
+            "add": timed(lambda: index.add(size + 1, "NEWT", None, "New Test Co")),
+            "remove": timed(lambda: index.remove(next(removed))),
+        }
+        report(f"Stock search index of {size} stocks", results)
+
+
+if __name__ == "__main__":
+    main()
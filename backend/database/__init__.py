@@ -1,3 +1,15 @@
-from .database import create_tables, get_db
+from .database import (
+    async_session,
+    create_tables,
+    get_db,
+    insert_on_conflict,
+    pool_stats,
+)
 
-__all__ = ["get_db", "create_tables"]
+__all__ = [
+    "get_db",
+    "create_tables",
+    "async_session",
+    "insert_on_conflict",
+    "pool_stats",
+]
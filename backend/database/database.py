@@ -1,11 +1,14 @@
 import logging
 import os
+import time
 
-from sqlalchemy import text
+from sqlalchemy import event, text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from ..models import Base
+from .migrations import run_migrations
 
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -20,6 +23,50 @@ engine = create_async_engine(DATABASE_URL, echo=False)
 # Create async session factory
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# How long pooled connections stay checked out, to spot sessions held across slow calls
+_pool_stats = {
+    "checkouts": 0,
+    "checked_out": 0,
+    "max_checked_out": 0,
+    "total_held_seconds": 0.0,
+    "max_held_seconds": 0.0,
+}
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checkout_ts"] = time.perf_counter()
+    _pool_stats["checkouts"] += 1
+    _pool_stats["checked_out"] += 1
+    _pool_stats["max_checked_out"] = max(
+        _pool_stats["max_checked_out"], _pool_stats["checked_out"]
+    )
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _on_pool_checkin(dbapi_connection, connection_record):
+    checkout_ts = connection_record.info.pop("checkout_ts", None)
+    if checkout_ts is None:
+        return
+
+    held = time.perf_counter() - checkout_ts
+    _pool_stats["checked_out"] -= 1
+    _pool_stats["total_held_seconds"] += held
+    _pool_stats["max_held_seconds"] = max(_pool_stats["max_held_seconds"], held)
+
+
+def pool_stats() -> dict:
+    """
+    Connection pool checkout counters of this worker
+    """
+    checkouts = _pool_stats["checkouts"]
+    return {
+        **_pool_stats,
+        "avg_held_seconds": (
+            _pool_stats["total_held_seconds"] / checkouts if checkouts else 0.0
+        ),
+    }
+
 
 async def test_db_connection():
     """Test database connection on startup"""
@@ -34,6 +81,21 @@ async def test_db_connection():
         raise RuntimeError(f"Cannot connect to database: {e}")
 
 
+def insert_on_conflict(model):
+    """
+    INSERT construct of the engine's dialect, supporting ON CONFLICT upserts
+    """
+    dialect = engine.dialect.name
+
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+
+    raise RuntimeError(f"Upserts are not supported for the {dialect} dialect")
+
+
 async def get_db():
     """
     Dependency to get database session
@@ -54,6 +116,7 @@ async def create_tables():
 
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await run_migrations(conn)
 
         logging.info("[SUCCESS] Database tables created")
 
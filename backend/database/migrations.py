@@ -0,0 +1,320 @@
+import logging
+import os
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# Metric fields as they were when the per-field financials table was pivoted into
+# financial_statements. Frozen on purpose, later column changes get their own
+# migration.
+_PIVOTED_FINANCIAL_FIELDS = (
+    "share_price_at_report_date",
+    "max_share_price",
+    "min_share_price",
+    "earnings_per_share",
+    "dividend_per_share",
+    "revenue",
+    "gross_profit",
+    "profit_before_tax",
+    "profit_after_tax",
+    "profit_after_tax_for_shareholders",
+    "cash",
+    "inventories",
+    "receivables",
+    "investments_in_securities",
+    "other_current_assets",
+    "property_plant_equipment",
+    "land_and_real_estate",
+    "investments_subsidiaries",
+    "intangible_assets",
+    "non_current_investments",
+    "other_non_current_assets",
+    "borrowings",
+    "payables",
+    "lease_liabilities",
+    "tax_liabilities",
+    "other_current_liabilities",
+    "long_term_debts",
+    "long_term_lease_liabilities",
+    "deferred_tax_liabilities",
+    "other_non_current_liabilities",
+    "share_capital",
+    "retained_earnings",
+    "reserves",
+    "non_controlling_interests",
+    "net_cash_from_operating_activities",
+    "investments_in_ppe",
+    "investments_in_subsidiaries",
+    "investments_in_acquisitions",
+)
+
+
+def _pivot_financials_sql() -> str:
+    """
+    Copy per-field financials rows into one financial_statements row per period
+    """
+    columns = ", ".join(_PIVOTED_FINANCIAL_FIELDS)
+    pivots = ",\n".join(
+        f"MAX(CASE WHEN field = '{field}' THEN value END)"
+        for field in _PIVOTED_FINANCIAL_FIELDS
+    )
+    return (
+        f"INSERT INTO financial_statements "
+        f"(user_id, stock_id, year, {columns}, created_at, updated_at)\n"
+        f"SELECT user_id, stock_id, year,\n{pivots},\n"
+        f"MIN(created_at), MAX(created_at)\n"
+        f"FROM financials GROUP BY user_id, stock_id, year"
+    )
+
+
+def add_column(table: str, column: str, definition: str):
+    """
+    Migration step adding a column unless create_all already created it
+    """
+
+    async def step(conn: AsyncConnection):
+        columns = await conn.run_sync(
+            lambda sync_conn: [c["name"] for c in inspect(sync_conn).get_columns(table)]
+        )
+        if column not in columns:
+            await conn.execute(
+                text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            )
+
+    return step
+
+
+async def _create_trigram_indexes(conn: AsyncConnection):
+    """
+    Trigram indexes of the pg_trgm stock search backend, PostgreSQL only.
+    Left pending until that backend is enabled, creating the extension needs a
+    sufficiently privileged database user.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    if os.getenv("STOCK_SEARCH_BACKEND", "memory").lower() != "pg_trgm":
+        return False
+
+    await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    await conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_stocks_ticker_trgm "
+            "ON stocks USING gin (lower(ticker) gin_trgm_ops)"
+        )
+    )
+    await conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_stocks_company_name_trgm "
+            "ON stocks USING gin (lower(company_name) gin_trgm_ops)"
+        )
+    )
+
+
+async def _create_full_text_indexes(conn: AsyncConnection):
+    """
+    GIN indexes of the full-text search over AI answers and descriptions,
+    PostgreSQL only. The expressions must match the ones in
+    services/text_search.py for the planner to use them.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+
+    for table, column in (
+        ("stock_ai_prompts", "response"),
+        ("ai_answer_cache", "response"),
+        ("stocks", "description"),
+        ("stocks", "ai_description"),
+    ):
+        await conn.execute(
+            text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_{column}_fts ON {table} "
+                f"USING gin (to_tsvector('english', coalesce({column}, '')))"
+            )
+        )
+
+
+# Ordered list of (name, statements). create_all only creates missing tables, so
+# anything added to an existing table (indexes, columns, data moves) goes here.
+# Statements must also be safe on a fresh database where create_all already
+# built the current schema. A statement is SQL text or an async step(conn), a
+# step returning False leaves the migration pending to be retried on next start.
+MIGRATIONS = [
+    (
+        "0001_per_stock_access_indexes",
+        [
+            # Remove duplicates left by the old read-then-write code paths so the
+            # unique indexes can be created, keeping the most recent row.
+            """
+            DELETE FROM financials WHERE id NOT IN (
+                SELECT MAX(id) FROM financials
+                GROUP BY user_id, stock_id, year, field
+            )
+            """,
+            """
+            DELETE FROM stock_ai_prompts WHERE id NOT IN (
+                SELECT MAX(id) FROM stock_ai_prompts
+                GROUP BY user_id, stock_id, prompt
+            )
+            """,
+            """
+            DELETE FROM investments WHERE id NOT IN (
+                SELECT MAX(id) FROM investments GROUP BY user_id, stock_id
+            )
+            """,
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_financials_user_stock_year_field
+            ON financials (user_id, stock_id, year, field)
+            """,
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_stock_ai_prompts_user_stock_prompt
+            ON stock_ai_prompts (user_id, stock_id, prompt)
+            """,
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_investments_user_stock
+            ON investments (user_id, stock_id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_stocks_user_id_id
+            ON stocks (user_id, id)
+            """,
+        ],
+    ),
+    (
+        "0002_pivot_financials_into_statements",
+        [
+            # financial_statements is created empty by create_all just before
+            _pivot_financials_sql(),
+        ],
+    ),
+    (
+        "0003_shared_ai_answer_cache",
+        [
+            add_column(
+                "stock_ai_prompts",
+                "cache_entry_id",
+                "INTEGER REFERENCES ai_answer_cache (id) ON DELETE SET NULL",
+            ),
+        ],
+    ),
+    (
+        "0004_stock_ai_prompt_history",
+        [
+            # stock_ai_prompt_history is created by create_all just before, and
+            # starts with the answers written from now on
+            add_column(
+                "stock_ai_prompts",
+                "latest_history_id",
+                "INTEGER REFERENCES stock_ai_prompt_history (id) ON DELETE SET NULL",
+            ),
+        ],
+    ),
+    (
+        "0005_list_pagination_indexes",
+        [
+            """
+            CREATE INDEX IF NOT EXISTS ix_stocks_user_id_company_name_id
+            ON stocks (user_id, company_name, id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_stocks_user_id_ticker_id
+            ON stocks (user_id, ticker, id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_stocks_user_id_created_at_id
+            ON stocks (user_id, created_at, id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_stocks_user_id_sector
+            ON stocks (user_id, sector)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_stocks_user_id_country
+            ON stocks (user_id, country)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_stocks_user_id_exchange_id
+            ON stocks (user_id, exchange_id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_exchanges_user_id_name_id
+            ON exchanges (user_id, name, id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_exchanges_user_id_created_at_id
+            ON exchanges (user_id, created_at, id)
+            """,
+        ],
+    ),
+    (
+        "0006_stock_search_trigram_indexes",
+        [_create_trigram_indexes],
+    ),
+    (
+        "0007_full_text_search_indexes",
+        [_create_full_text_indexes],
+    ),
+    (
+        # Change sequence columns of GET /sync, rows written before start out
+        # NULL and are only returned by a full sync
+        "0008_sync_change_seq",
+        [
+            step
+            for table in (
+                "stocks",
+                "financial_statements",
+                "stock_ai_prompts",
+                "investments",
+            )
+            for step in (
+                add_column(table, "change_seq", "BIGINT"),
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_user_id_change_seq "
+                f"ON {table} (user_id, change_seq)",
+            )
+        ],
+    ),
+    (
+        "0009_exchanges_abbreviation_index",
+        [
+            """
+            CREATE INDEX IF NOT EXISTS ix_exchanges_user_id_abbreviation_id
+            ON exchanges (user_id, abbreviation, id)
+            """,
+        ],
+    ),
+]
+
+
+async def run_migrations(conn: AsyncConnection):
+    """
+    Apply pending migrations in order, recording each one in schema_migrations
+    """
+    await conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "name VARCHAR(100) PRIMARY KEY, "
+            "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        )
+    )
+    result = await conn.execute(text("SELECT name FROM schema_migrations"))
+    applied = set(result.scalars().all())
+
+    for name, statements in MIGRATIONS:
+        if name in applied:
+            continue
+
+        pending = False
+        for statement in statements:
+            if callable(statement):
+                pending = await statement(conn) is False or pending
+            else:
+                await conn.execute(text(statement))
+
+        if pending:
+            logging.info(f"Migration {name} left pending")
+            continue
+
+        await conn.execute(
+            text("INSERT INTO schema_migrations (name) VALUES (:name)"),
+            {"name": name},
+        )
+        logging.info(f"[SUCCESS] Applied migration {name}")
@@ -10,13 +10,22 @@ import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from .routes.bootstrap import router as bootstrap_router
 from .routes.exchanges import router as exchanges_router
 from .routes.financial import router as financial_router
 from .routes.investment import router as investment_router
+from .routes.jobs import router as jobs_router
+from .routes.metrics import router as metrics_router
 from .routes.prompt import router as prompt_router
 from .routes.reference_data import router as reference_router
+from .routes.scheduler import router as scheduler_router
+from .routes.search import router as search_router
 from .routes.stocks import router as stocks_router
+from .routes.sync import router as sync_router
+from .routes.usage import router as usage_router
 from .routes.users import router as users_router
+from .services.compression import CompressionMiddleware
+from .services.serialization import FastJSONResponse
 
 # Configure logging
 logging.basicConfig(
@@ -32,13 +41,24 @@ logging.getLogger("watchfiles").setLevel(logging.WARNING)
 async def lifespan(app: FastAPI):
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
     from .database import create_tables
+    from .services.jobs import start_job_workers, stop_job_workers
+    from .services.openai import close_async_openai_client, open_async_openai_client
+    from .services.scheduler import start_scheduler, stop_scheduler
+
     await create_tables()
+    open_async_openai_client()
+    await start_job_workers()
+    start_scheduler()
     yield
+    await stop_scheduler()
+    await stop_job_workers()
+    await close_async_openai_client()
 
 environment = os.getenv("APP_ENV", "")
 app = FastAPI(
     lifespan=lifespan,
     title="Stocks App API",
+    default_response_class=FastJSONResponse,
     # Disable docs in production
     docs_url="/docs" if environment.lower() == "development" else None,
     redoc_url="/redoc" if environment.lower() == "development" else None,
@@ -73,6 +93,9 @@ app.add_middleware(
 )
 logging.info(f"CORS origins set to: {origins if origins else 'None'}")
 
+# gzip/brotli above a size threshold, see services/compression.py
+app.add_middleware(CompressionMiddleware)
+
 
 app.include_router(stocks_router)
 app.include_router(users_router)
@@ -81,6 +104,13 @@ app.include_router(reference_router)
 app.include_router(financial_router)
 app.include_router(prompt_router)
 app.include_router(investment_router)
+app.include_router(jobs_router)
+app.include_router(metrics_router)
+app.include_router(usage_router)
+app.include_router(search_router)
+app.include_router(bootstrap_router)
+app.include_router(sync_router)
+app.include_router(scheduler_router)
 
 
 def main():
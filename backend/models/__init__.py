@@ -1,7 +1,13 @@
+from .ai_answer import AiAnswerCache
+from .ai_usage import AiUsage
 from .base import Base
-from .financial import Financial
+from .financial import Financial, FinancialStatement
 from .investment import Investment
-from .stock import Exchange, Stock, StockAiPrompt
+from .job import AiJob
+from .nightly_task_lease import NightlyTaskLease
+from .resource_version import ResourceVersion
+from .stock import Exchange, Stock, StockAiPrompt, StockAiPromptHistory
+from .sync_tombstone import SyncTombstone
 from .user import User
 
 __all__ = [
@@ -10,6 +16,14 @@ __all__ = [
     "Exchange",
     "Stock",
     "StockAiPrompt",
+    "StockAiPromptHistory",
     "Financial",
+    "FinancialStatement",
     "Investment",
+    "AiJob",
+    "NightlyTaskLease",
+    "AiAnswerCache",
+    "AiUsage",
+    "ResourceVersion",
+    "SyncTombstone",
 ]
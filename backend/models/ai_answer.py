@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class AiAnswerCache(Base):
+    """
+    AI answers that only depend on the company, shared between all users who
+    track it. Keyed by normalized company identity, prompt and instruction version.
+    """
+
+    __tablename__ = "ai_answer_cache"
+    __table_args__ = (
+        Index(
+            "ux_ai_answer_cache_company_prompt_version",
+            "company_key",
+            "prompt",
+            "instruction_version",
+            unique=True,
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    company_key: Mapped[str] = mapped_column(String(200), nullable=False)
+    prompt: Mapped[str] = mapped_column(String(20), nullable=False)
+    instruction_version: Mapped[str] = mapped_column(String(16), nullable=False)
+    response: Mapped[str] = mapped_column(Text, nullable=False)
+
+    # provenance of the answer
+    model: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    input_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    output_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    source_user_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    source_stock_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("stocks.id", ondelete="SET NULL"), nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<AiAnswerCache(id={self.id}, company_key='{self.company_key}', "
+            f"prompt='{self.prompt}', created_at={self.created_at})>"
+        )
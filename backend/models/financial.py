@@ -1,13 +1,38 @@
 from datetime import datetime
+from typing import Optional
 
-from sqlalchemy import DECIMAL, Date, DateTime, ForeignKey, String, func
+from sqlalchemy import (
+    DECIMAL,
+    BigInteger,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    String,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
 
 
 class Financial(Base):
+    """
+    Legacy one-row-per-metric storage, superseded by FinancialStatement.
+    Kept so existing data can be migrated and rolled back.
+    """
+
     __tablename__ = "financials"
+    __table_args__ = (
+        Index(
+            "ux_financials_user_stock_year_field",
+            "user_id",
+            "stock_id",
+            "year",
+            "field",
+            unique=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(
@@ -26,3 +51,126 @@ class Financial(Base):
 
     user = relationship("User", back_populates="financial")
     stock = relationship("Stock", back_populates="financial")
+
+
+class FinancialStatement(Base):
+    """
+    One row per (user, stock, period) with a typed column per financial metric.
+    Column names match the FinancialMetrics schema fields.
+    """
+
+    __tablename__ = "financial_statements"
+    __table_args__ = (
+        Index(
+            "ux_financial_statements_user_stock_year",
+            "user_id",
+            "stock_id",
+            "year",
+            unique=True,
+        ),
+        Index("ix_financial_statements_user_id_change_seq", "user_id", "change_seq"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    stock_id: Mapped[int] = mapped_column(
+        ForeignKey("stocks.id", ondelete="CASCADE"), nullable=False
+    )
+    year: Mapped[Date] = mapped_column(Date, nullable=False)
+
+    # per share infor
+    share_price_at_report_date: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    max_share_price: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    min_share_price: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    earnings_per_share: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    dividend_per_share: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+
+    # profit loss
+    revenue: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    gross_profit: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    profit_before_tax: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    profit_after_tax: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    profit_after_tax_for_shareholders: Mapped[Optional[float]] = mapped_column(
+        DECIMAL(12, 2)
+    )
+
+    # current assets
+    cash: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    inventories: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    receivables: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    investments_in_securities: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    other_current_assets: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+
+    # non-current assets
+    property_plant_equipment: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    land_and_real_estate: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    investments_subsidiaries: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    intangible_assets: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    non_current_investments: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    other_non_current_assets: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+
+    # current liabilities
+    borrowings: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    payables: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    lease_liabilities: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    tax_liabilities: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    other_current_liabilities: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+
+    # non-current liabilities
+    long_term_debts: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    long_term_lease_liabilities: Mapped[Optional[float]] = mapped_column(
+        DECIMAL(12, 2)
+    )
+    deferred_tax_liabilities: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    other_non_current_liabilities: Mapped[Optional[float]] = mapped_column(
+        DECIMAL(12, 2)
+    )
+
+    # equity
+    share_capital: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    retained_earnings: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    reserves: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    non_controlling_interests: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+
+    # cash flow
+    net_cash_from_operating_activities: Mapped[Optional[float]] = mapped_column(
+        DECIMAL(12, 2)
+    )
+    investments_in_ppe: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2))
+    investments_in_subsidiaries: Mapped[Optional[float]] = mapped_column(
+        DECIMAL(12, 2)
+    )
+    investments_in_acquisitions: Mapped[Optional[float]] = mapped_column(
+        DECIMAL(12, 2)
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    # Per-user change sequence of the last write, for GET /sync
+    change_seq: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+
+    user = relationship("User", back_populates="financial_statement")
+    stock = relationship("Stock", back_populates="financial_statement")
+
+
+# Metric columns of FinancialStatement, in declaration order
+METRIC_COLUMNS = tuple(
+    column.name
+    for column in FinancialStatement.__table__.columns
+    if column.name
+    not in {
+        "id",
+        "user_id",
+        "stock_id",
+        "year",
+        "created_at",
+        "updated_at",
+        "change_seq",
+    }
+)
@@ -1,7 +1,16 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DECIMAL, Date, DateTime, ForeignKey, String, func
+from sqlalchemy import (
+    DECIMAL,
+    BigInteger,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    String,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -9,6 +18,10 @@ from .base import Base
 
 class Investment(Base):
     __tablename__ = "investments"
+    __table_args__ = (
+        Index("ux_investments_user_stock", "user_id", "stock_id", unique=True),
+        Index("ix_investments_user_id_change_seq", "user_id", "change_seq"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[Optional[int]] = mapped_column(
@@ -42,6 +55,8 @@ class Investment(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
+    # Per-user change sequence of the last write, for GET /sync
+    change_seq: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
 
     user = relationship("User", back_populates="investment")
     stock = relationship("Stock", back_populates="investment")
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, ForeignKey, Index, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from .base import Base
+
+
+class AiJob(Base):
+    __tablename__ = "ai_jobs"
+    __table_args__ = (Index("ix_ai_jobs_status_created_at", "status", "created_at"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+    stock_id: Mapped[int] = mapped_column(
+        ForeignKey("stocks.id", ondelete="CASCADE"), nullable=False
+    )
+
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    prompt: Mapped[Optional[str]] = mapped_column(String(10), nullable=True)
+    # JSON input of the job, e.g. the financial data sent with a prompt
+    payload: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    status: Mapped[str] = mapped_column(String(10), nullable=False, default="queued")
+    result: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    started_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    user = relationship("User", back_populates="ai_job")
+    stock = relationship("Stock", back_populates="ai_job")
+
+    def __repr__(self) -> str:
+        return (
+            f"<AiJob(id={self.id}, kind='{self.kind}', "
+            f"stock_id={self.stock_id}, status='{self.status}')>"
+        )
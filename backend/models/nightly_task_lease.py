@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class NightlyTaskLease(Base):
+    """
+    Lease of a nightly task, only the worker holding an unexpired lease runs it
+    """
+
+    __tablename__ = "nightly_task_leases"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    # Worker process running the task, None once released
+    holder: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    # Renewed while the task runs, a crashed worker's lease simply runs out
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<NightlyTaskLease(name='{self.name}', holder='{self.holder}', "
+            f"expires_at={self.expires_at})>"
+        )
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class ResourceVersion(Base):
+    """
+    Version counter of a resource of a user, bumped by every write to it.
+    Read endpoints expose it as ETag and Last-Modified.
+    """
+
+    __tablename__ = "resource_versions"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    # e.g. "stocks" or "financials:42"
+    resource: Mapped[str] = mapped_column(String(100), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<ResourceVersion(user_id={self.user_id}, "
+            f"resource='{self.resource}', version={self.version})>"
+        )
@@ -1,7 +1,17 @@
+import zlib
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, ForeignKey, String, func
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -9,6 +19,14 @@ from .base import Base
 
 class Exchange(Base):
     __tablename__ = "exchanges"
+    __table_args__ = (
+        # Keyset pagination per sort order
+        Index("ix_exchanges_user_id_name_id", "user_id", "name", "id"),
+        Index(
+            "ix_exchanges_user_id_abbreviation_id", "user_id", "abbreviation", "id"
+        ),
+        Index("ix_exchanges_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(
@@ -35,6 +53,17 @@ class Exchange(Base):
 
 class Stock(Base):
     __tablename__ = "stocks"
+    __table_args__ = (
+        Index("ix_stocks_user_id_id", "user_id", "id"),
+        # Keyset pagination per sort order, and the list filters
+        Index("ix_stocks_user_id_company_name_id", "user_id", "company_name", "id"),
+        Index("ix_stocks_user_id_ticker_id", "user_id", "ticker", "id"),
+        Index("ix_stocks_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_stocks_user_id_sector", "user_id", "sector"),
+        Index("ix_stocks_user_id_country", "user_id", "country"),
+        Index("ix_stocks_user_id_exchange_id", "user_id", "exchange_id"),
+        Index("ix_stocks_user_id_change_seq", "user_id", "change_seq"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(
@@ -57,11 +86,16 @@ class Stock(Base):
     ai_description_created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
+    # Per-user change sequence of the last write, for GET /sync
+    change_seq: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
 
     user = relationship("User", back_populates="stock")
     financial = relationship(
         "Financial", back_populates="stock", cascade="all, delete-orphan"
     )
+    financial_statement = relationship(
+        "FinancialStatement", back_populates="stock", cascade="all, delete-orphan"
+    )
     investment = relationship(
         "Investment", back_populates="stock", cascade="all, delete-orphan"
     )
@@ -69,6 +103,10 @@ class Stock(Base):
     stock_ai_prompt = relationship(
         "StockAiPrompt", back_populates="stock", cascade="all, delete-orphan"
     )
+    stock_ai_prompt_history = relationship(
+        "StockAiPromptHistory", back_populates="stock", cascade="all, delete-orphan"
+    )
+    ai_job = relationship("AiJob", back_populates="stock", cascade="all, delete-orphan")
 
     def __repr__(self) -> str:
         return (
@@ -80,6 +118,16 @@ class Stock(Base):
 
 class StockAiPrompt(Base):
     __tablename__ = "stock_ai_prompts"
+    __table_args__ = (
+        Index(
+            "ux_stock_ai_prompts_user_stock_prompt",
+            "user_id",
+            "stock_id",
+            "prompt",
+            unique=True,
+        ),
+        Index("ix_stock_ai_prompts_user_id_change_seq", "user_id", "change_seq"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(
@@ -90,16 +138,81 @@ class StockAiPrompt(Base):
         ForeignKey("stocks.id", ondelete="CASCADE"), nullable=False
     )
     prompt: Mapped[str] = mapped_column(String(10), nullable=True)
+    # Empty when the answer is shared through cache_entry
     response: Mapped[str] = mapped_column(String(500), nullable=True)
+    cache_entry_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("ai_answer_cache.id", ondelete="SET NULL"), nullable=True
+    )
+    # Full, untruncated version of the answer in the history
+    latest_history_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("stock_ai_prompt_history.id", ondelete="SET NULL"), nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
+    # Per-user change sequence of the last write, for GET /sync
+    change_seq: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
 
     user = relationship("User", back_populates="stock_ai_prompt")
     stock = relationship("Stock", back_populates="stock_ai_prompt")
+    cache_entry = relationship("AiAnswerCache")
+    latest_history = relationship("StockAiPromptHistory")
 
     def __repr__(self) -> str:
         return (
             f"<StockAiPrompt(id={self.id}, stock_id={self.stock_id}, "
             f"created_at={self.created_at})>"
         )
+
+
+class StockAiPromptHistory(Base):
+    """
+    Append-only history of the AI answers of a prompt. Answers are kept in full
+    and zlib-compressed, StockAiPrompt holds the latest one truncated.
+    """
+
+    __tablename__ = "stock_ai_prompt_history"
+    __table_args__ = (
+        Index(
+            "ix_stock_ai_prompt_history_user_stock_prompt",
+            "user_id",
+            "stock_id",
+            "prompt",
+            "id",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    stock_id: Mapped[int] = mapped_column(
+        ForeignKey("stocks.id", ondelete="CASCADE"), nullable=False
+    )
+    prompt: Mapped[str] = mapped_column(String(10), nullable=False)
+    response_zlib: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    # Characters of the uncompressed answer
+    response_length: Mapped[int] = mapped_column(Integer, nullable=False)
+    cache_entry_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("ai_answer_cache.id", ondelete="SET NULL"), nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    user = relationship("User", back_populates="stock_ai_prompt_history")
+    stock = relationship("Stock", back_populates="stock_ai_prompt_history")
+
+    @staticmethod
+    def compress(response: str) -> bytes:
+        return zlib.compress(response.encode("utf-8"), 9)
+
+    @property
+    def response(self) -> str:
+        return zlib.decompress(self.response_zlib).decode("utf-8")
+
+    def __repr__(self) -> str:
+        return (
+            f"<StockAiPromptHistory(id={self.id}, stock_id={self.stock_id}, "
+            f"prompt='{self.prompt}', created_at={self.created_at})>"
+        )
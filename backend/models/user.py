@@ -20,8 +20,14 @@ class User(Base):
     exchange = relationship("Exchange", back_populates="user")
     stock = relationship("Stock", back_populates="user")
     financial = relationship("Financial", back_populates="user")
+    financial_statement = relationship("FinancialStatement", back_populates="user")
     investment = relationship("Investment", back_populates="user")
     stock_ai_prompt = relationship("StockAiPrompt", back_populates="user")
+    stock_ai_prompt_history = relationship(
+        "StockAiPromptHistory", back_populates="user"
+    )
+    ai_job = relationship("AiJob", back_populates="user")
+    ai_usage = relationship("AiUsage", back_populates="user")
 
     def __repr__(self) -> str:
         return (
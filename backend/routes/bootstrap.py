@@ -0,0 +1,93 @@
+import asyncio
+
+import orjson
+from fastapi import APIRouter, Depends, Request, Response, status
+from sqlalchemy import select
+
+from ..database import async_session
+from ..models import Exchange, Stock, User  # SQLAlchemy database model
+from ..schemas import ExchangeResponse, StockResponse  # Pydantic API schemas
+from ..services.auth import get_current_user
+from ..services.serialization import dumps, trusted_dict
+from ..services.versions import (
+    PRIVATE_CACHE_CONTROL,
+    STATIC_CACHE_CONTROL,
+    content_etag,
+    not_modified,
+)
+from .prompt import PROMPTS
+from .reference_data import COUNTRIES, SECTORS
+
+router = APIRouter(prefix="/bootstrap", tags=["bootstrap"])
+
+# Reference data and prompts only change with a deployment, serialize them once
+STATIC_DATA = {
+    "countries": [{"name": country} for country in sorted(COUNTRIES)],
+    "sectors": [{"name": sector} for sector in sorted(SECTORS)],
+    "prompts": PROMPTS,
+}
+STATIC_JSON = orjson.dumps(STATIC_DATA)
+STATIC_ETAG = content_etag(STATIC_DATA)
+
+
+async def _select_rows(model, schema, user_id: int) -> bytes:
+    """Serialized schema fields of a user's rows, read in a session of its own"""
+    async with async_session() as db:
+        result = await db.execute(
+            select(*(model.__table__.c[name] for name in schema.model_fields)).where(
+                model.user_id == user_id
+            )
+        )
+        return dumps([trusted_dict(schema, row) for row in result])
+
+
+@router.get("/static", status_code=status.HTTP_200_OK)
+async def get_bootstrap_static(request: Request, response: Response):
+    """
+    Get the countries, sectors and prompts, cacheable by clients for a day
+    """
+    cached = not_modified(
+        request, response, STATIC_ETAG, cache_control=STATIC_CACHE_CONTROL
+    )
+    if cached:
+        return cached
+
+    return Response(
+        STATIC_JSON, media_type="application/json", headers=dict(response.headers)
+    )
+
+
+@router.get("/", status_code=status.HTTP_200_OK)
+async def get_bootstrap(
+    include_static: bool = True,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get the start-up data of the app in one response: the user's stocks and
+    exchanges, and unless include_static is false the data of /bootstrap/static
+    under "static" with its ETag as "static_etag".
+    The user's stocks and exchanges are read concurrently.
+    """
+    stocks, exchanges = await asyncio.gather(
+        _select_rows(Stock, StockResponse, current_user.id),
+        _select_rows(Exchange, ExchangeResponse, current_user.id),
+    )
+
+    # Spliced together, the parts are already serialized
+    parts = [
+        b'{"stocks":',
+        stocks,
+        b',"exchanges":',
+        exchanges,
+        b',"static_etag":',
+        orjson.dumps(STATIC_ETAG),
+    ]
+    if include_static:
+        parts += [b',"static":', STATIC_JSON]
+    parts.append(b"}")
+
+    return Response(
+        b"".join(parts),
+        media_type="application/json",
+        headers={"Cache-Control": PRIVATE_CACHE_CONTROL},
+    )
@@ -1,14 +1,17 @@
-from typing import List
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
 from ..models import Exchange, Financial, Stock, User  # SQLAlchemy database model
 from ..schemas import ExchangeCreate  # Pydantic API schemas
-from ..schemas import ExchangeResponse, ExchangeUpdate
+from ..schemas import ExchangeResponse, ExchangeUpdate, Page
 from ..services.auth import get_current_user
+from ..services.pagination import keyset_page
+from ..services.sync import next_change_seq
+from ..services.versions import bump_versions
 
 router = APIRouter(prefix="/exchanges", tags=["exchanges"])
 
@@ -50,6 +53,50 @@ async def get_all_exchanges(
     return exchanges.scalars().all()
 
 
+EXCHANGE_SORT_COLUMNS = {
+    "name": Exchange.name,
+    "abbreviation": Exchange.abbreviation,
+    "created_at": Exchange.created_at,
+    "id": Exchange.id,
+}
+
+
+@router.get(
+    "/page", response_model=Page[ExchangeResponse], status_code=status.HTTP_200_OK
+)
+async def get_exchanges_page(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    sort: Literal["name", "abbreviation", "created_at", "id"] = "name",
+    order: Literal["asc", "desc"] = "asc",
+    country: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get one page of the exchanges of the current user, filtered and sorted.
+    Pass next_cursor of a page as cursor to get the next one.
+    """
+    stmt = select(Exchange).where(Exchange.user_id == current_user.id)
+
+    if country is not None:
+        stmt = stmt.where(Exchange.country == country)
+
+    items, next_cursor, total = await keyset_page(
+        db,
+        stmt,
+        EXCHANGE_SORT_COLUMNS[sort],
+        Exchange.id,
+        order=order,
+        cursor=cursor,
+        limit=limit,
+        include_total=include_total,
+    )
+
+    return {"items": items, "next_cursor": next_cursor, "total": total}
+
+
 @router.put(
     "/{exchange_id}", response_model=ExchangeResponse, status_code=status.HTTP_200_OK
 )
@@ -108,6 +155,13 @@ async def delete_exchange(
             status_code=status.HTTP_404_NOT_FOUND, detail="Exchange not found"
         )
 
+    # Unlink its stocks explicitly, stamped so GET /sync reports the change
+    await bump_versions(db, current_user.id, ["stocks"])
+    await db.execute(
+        update(Stock)
+        .where(Stock.exchange_id == exchange_id, Stock.user_id == current_user.id)
+        .values(exchange_id=None, change_seq=await next_change_seq(db, current_user.id))
+    )
     await db.delete(exchange)
     await db.commit()
 
@@ -1,19 +1,37 @@
 import logging
 import time
 from datetime import datetime, timezone
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from typing import Literal, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
-from ..models import Financial, User  # SQLAlchemy database model
-from ..schemas import FinancialCreate, FinancialMetrics, FinancialResponse
+from ..models import User  # SQLAlchemy database model
+from ..schemas import FinancialCreate, FinancialResponse
 from ..services.auth import get_current_user
+from ..services.financial import (
+    get_financial_columns,
+    get_financial_statements,
+    upsert_financial_statements,
+)
+from ..services.serialization import FastJSONResponse
+from ..services.versions import bump_versions, resource_not_modified, stock_resource
 from .stocks import get_stock_by_id
 
 router = APIRouter(prefix="/stocks", tags=["financials"])
 
+# Accept header selecting the columnar financial data, like ?format=columnar
+COLUMNAR_MEDIA_TYPE = "application/vnd.stocks.columnar+json"
+
 
 @router.post(
     "/{stock_id}/financials",
@@ -38,39 +56,19 @@ async def save_financial_data(
             detail="Stock ID in path and body do not match",
         )
 
-    for date_str, metrics in data.data.items():
-        financial_year = datetime.strptime(date_str, "%Y-%m-%d").date()
-
-        for field_name, value in metrics.model_dump().items():
-            if value is not None:
-                db_data = await db.execute(
-                    select(Financial).where(
-                        Financial.user_id == current_user.id,
-                        Financial.year == financial_year,
-                        Financial.field == field_name,
-                        Financial.stock_id == stock.id,
-                    )
-                )
-                current_record = db_data.scalar_one_or_none()
-
-                if current_record and current_record.value != value:
-                    current_record.value = value
-                    current_record.created_at = datetime.now(timezone.utc)
-                    db.add(current_record)
-
-                elif not current_record:
-                    new_record = Financial(
-                        stock_id=stock.id,
-                        user_id=current_user.id,
-                        year=financial_year,
-                        field=field_name,
-                        value=value,
-                    )
-                    db.add(new_record)
+    await bump_versions(
+        db, current_user.id, [stock_resource("financials", stock.id)]
+    )
+    written = await upsert_financial_statements(
+        db, current_user.id, stock.id, data.data
+    )
 
     await db.commit()
     elapsed = time.perf_counter() - start_ts
-    logging.info(f"Saved financial data for stock {stock_id} in {elapsed:.4f} seconds")
+    logging.info(
+        f"Saved financial data for stock {stock_id} "
+        f"({written} rows written) in {elapsed:.4f} seconds"
+    )
     return FinancialResponse(**data.model_dump(), updated_at=datetime.now(timezone.utc))
 
 
@@ -81,43 +79,69 @@ async def save_financial_data(
 )
 async def get_financial_data(
     stock_id: int,
+    request: Request,
+    response: Response,
+    response_format: Optional[Literal["columnar"]] = Query(None, alias="format"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
-    Get financial records
+    Get financial records, 304 when If-None-Match is current.
+
+    With ?format=columnar or "Accept: application/vnd.stocks.columnar+json"
+    the records are returned as FinancialColumns instead: field names and
+    periods once, and a matrix of values without per-year objects.
     """
     start_ts = time.perf_counter()
+    columnar = response_format == "columnar" or COLUMNAR_MEDIA_TYPE in (
+        request.headers.get("accept", "")
+    )
+    response.headers["Vary"] = "Accept"
+
+    cached = await resource_not_modified(
+        request,
+        response,
+        db,
+        current_user.id,
+        stock_resource("financials", stock_id),
+        "columnar" if columnar else "",
+    )
+    if cached:
+        return cached
+
     stock = await get_stock_by_id(stock_id, db, current_user)
 
-    result = await db.execute(
-        select(Financial).where(
-            (Financial.stock_id == stock.id) & (Financial.user_id == current_user.id)
+    if columnar:
+        columns = await get_financial_columns(db, current_user.id, stock.id)
+        if columns is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No financial data found for this stock",
+            )
+
+        columns.updated_at = datetime.now(timezone.utc)
+        logging.info(
+            f"Fetched columnar financial data for stock {stock_id} "
+            f"in {time.perf_counter() - start_ts:.4f} seconds"
+        )
+        return FastJSONResponse(
+            columns.model_dump(),
+            headers=dict(response.headers),
+            media_type=COLUMNAR_MEDIA_TYPE,
         )
-    )
-    data = result.scalars().all()
 
-    if not data:
+    statements = await get_financial_statements(db, current_user.id, stock.id)
+
+    if not statements:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No financial data found for this stock",
         )
 
-    financial_data = {"stock_id": stock.id, "data": {}}
-
-    for record in data:
-        date_key = record.year.strftime("%Y-%m-%d")
-
-        if date_key not in financial_data["data"]:
-            financial_data["data"][date_key] = {}
-
-        financial_data["data"][date_key][record.field] = record.value
-
-    for date_key, metrics_dict in financial_data["data"].items():
-        financial_data["data"][date_key] = FinancialMetrics(**metrics_dict)
-
     elapsed = time.perf_counter() - start_ts
     logging.info(
         f"Fetched financial data for stock {stock_id} in {elapsed:.4f} seconds"
     )
-    return FinancialResponse(**financial_data, updated_at=datetime.now(timezone.utc))
+    return FinancialResponse(
+        stock_id=stock.id, data=statements, updated_at=datetime.now(timezone.utc)
+    )
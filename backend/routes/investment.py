@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
+from ..database import get_db, insert_on_conflict
 from ..models import Investment, User  # SQLAlchemy database model
 from ..schemas import InvestSummaryCreate, InvestSummaryResponse
 from ..services.auth import get_current_user
+from ..services.serialization import FastJSONResponse, trusted_dict
+from ..services.sync import next_change_seq
+from ..services.versions import bump_versions, resource_not_modified, stock_resource
 from .stocks import get_stock_by_id
 
 router = APIRouter(prefix="/investment_summary", tags=["investment_summary"])
@@ -16,10 +19,18 @@ router = APIRouter(prefix="/investment_summary", tags=["investment_summary"])
 )
 async def get_investment_summary(
     stock_id: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> InvestSummaryResponse:
 
+    cached = await resource_not_modified(
+        request, response, db, current_user.id, stock_resource("investment", stock_id)
+    )
+    if cached:
+        return cached
+
     await get_stock_by_id(stock_id, db, current_user)
 
     result = await db.execute(
@@ -34,7 +45,10 @@ async def get_investment_summary(
             status_code=status.HTTP_404_NOT_FOUND, detail="Investment summary not found"
         )
 
-    return investment_summary
+    return FastJSONResponse(
+        trusted_dict(InvestSummaryResponse, investment_summary),
+        headers=dict(response.headers),
+    )
 
 
 @router.post(
@@ -51,36 +65,25 @@ async def save_investment_summary(
 
     stock = await get_stock_by_id(stock_id, db, current_user)
 
-    result = await db.execute(
-        select(Investment).where(
-            Investment.stock_id == stock_id, Investment.user_id == current_user.id
-        )
+    await bump_versions(
+        db, current_user.id, [stock_resource("investment", stock.id)]
     )
-    investment_summary = result.scalar_one_or_none()
-
-    if investment_summary:
-        updated_data = data.model_dump(exclude_unset=True)
-        for field, value in updated_data.items():
-            setattr(investment_summary, field, value)
-
-        await db.commit()
-        await db.refresh(investment_summary)
-        return investment_summary
+    change_seq = await next_change_seq(db, current_user.id)
+    stmt = insert_on_conflict(Investment).values(
+        stock_id=stock.id,
+        user_id=current_user.id,
+        change_seq=change_seq,
+        **data.model_dump(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Investment.user_id, Investment.stock_id],
+        # update only provided fields
+        set_={**data.model_dump(exclude_unset=True), "change_seq": change_seq},
+    )
+    result = await db.scalars(
+        stmt.returning(Investment), execution_options={"populate_existing": True}
+    )
+    investment_summary = result.one()
+    await db.commit()
 
-    else:
-        new_investment_summary = Investment(
-            stock_id=stock.id,
-            user_id=current_user.id,
-            curr_date=data.curr_date,
-            current_share_price=data.current_share_price,
-            past_4q_revenue=data.past_4q_revenue,
-            past_4q_net_profit=data.past_4q_net_profit,
-            past_4q_earnings_per_share=data.past_4q_earnings_per_share,
-            stock_type=data.stock_type,
-            invest=data.invest,
-            investment_reasoning=data.investment_reasoning,
-        )
-        db.add(new_investment_summary)
-        await db.commit()
-        await db.refresh(new_investment_summary)
-        return new_investment_summary
+    return investment_summary
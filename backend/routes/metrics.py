@@ -0,0 +1,48 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from ..database import pool_stats
+from ..models import User  # SQLAlchemy database model
+from ..services.answer_cache import answer_cache_stats
+from ..services.auth import get_current_admin_user, principal_cache
+from ..services.compression import compression_stats
+from ..services.jobs import job_queue_stats
+from ..services.openai import openai_stats
+from ..services.password import password_pool_stats
+from ..services.scheduler import scheduler_stats
+from ..services.singleflight import ai_single_flight
+from ..services.stock_search import stock_search_indexes
+from ..services.text_search import text_search_indexes
+from ..services.usage import usage_limit_stats
+from ..services.versions import conditional_get_stats
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+# Set to false to hide the worker internals entirely, e.g. on public deployments
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+
+@router.get("/", status_code=status.HTTP_200_OK)
+async def get_metrics(current_user: User = Depends(get_current_admin_user)):
+    """
+    Get in-process counters of this worker, admins only (see ADMIN_EMAILS)
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_hashing": password_pool_stats(),
+        "db_pool": pool_stats(),
+        "ai_jobs": job_queue_stats(),
+        "ai_single_flight": ai_single_flight.stats(),
+        "ai_answer_cache": answer_cache_stats(),
+        "openai": openai_stats(),
+        "ai_usage_limits": usage_limit_stats(),
+        "scheduler": scheduler_stats(),
+        "stock_search": stock_search_indexes.stats(),
+        "text_search": text_search_indexes.stats(),
+        "conditional_get": conditional_get_stats(),
+        "compression": compression_stats(),
+    }
@@ -1,20 +1,60 @@
+import asyncio
 import logging
+import os
 from datetime import datetime, timezone
-from typing import Dict
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
-from sqlalchemy import select
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.models.stock import StockAiPrompt
-
-from ..database import get_db
-from ..models import User  # SQLAlchemy database model
-from ..schemas import FinancialCreate, FinancialMetrics  # Pydantic API schemas
+from ..database import async_session, get_db, insert_on_conflict
+from ..models import (  # SQLAlchemy database model
+    AiAnswerCache,
+    AiJob,
+    Stock,
+    StockAiPrompt,
+    StockAiPromptHistory,
+    User,
+)
+from ..schemas import (  # Pydantic API schemas
+    FinancialCreate,
+    FinancialMetrics,
+    JobResponse,
+)
+from ..services.answer_cache import (
+    company_key,
+    latest_answer_response,
+    shared_ai_answer,
+)
 from ..services.auth import get_current_user
-from ..services.openai import query_ai_prompt
-from .stocks import get_stock_by_id
+from ..services.financial_context import (
+    build_financial_context,
+    trim_to_token_budget,
+)
+from ..services.jobs import register_job_handler, submit_job
+from ..services.openai import (
+    AiAnswer,
+    ai_prompt_version,
+    cancel_on_disconnect,
+    query_ai_prompt_async,
+    stream_ai_prompt,
+)
+from ..services.singleflight import ai_single_flight, input_hash
+from ..services.streaming import sse_answer_response
+from ..services.sync import next_change_seq
+from ..services.text_search import index_prompt_answer
+from ..services.versions import bump_versions, resource_not_modified, stock_resource
+from .stocks import get_job_stock, get_stock_by_id
 
 
 class PromptsResponse(BaseModel):
@@ -23,6 +63,25 @@ class PromptsResponse(BaseModel):
     prompts: Dict[str, str]
 
 
+class PromptHistoryResponse(BaseModel):
+    """Response schema for an answer in the prompt history"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    prompt: str
+    response: str
+    response_length: int
+    cache_entry_id: Optional[int]
+    created_at: datetime
+
+
+class RunAllPromptsResponse(PromptsResponse):
+    """Response schema for the full analysis endpoint"""
+
+    errors: Dict[str, str]
+
+
 router = APIRouter(prefix="/prompts", tags=["prompts"])
 
 PROMPTS = {
@@ -64,6 +123,71 @@ VALUE_INVESTOR_RULES = """
 
 prompts_take_data = ["Q3", "Q4", "Q7", "Q10", "Q100", "Q101"]
 prompts_take_previous_prompts = ["Q100", "Q101"]
+# Prompts whose answer only depends on the company, shared between users
+shared_answer_prompts = ["Q1", "Q2", "Q5", "Q6", "Q8", "Q11", "Q12"]
+
+# Prompts taking previous answers build on every prompt before them
+PROMPT_DEPENDENCIES = {
+    prompt_id: (
+        list(PROMPTS)[:index] if prompt_id in prompts_take_previous_prompts else []
+    )
+    for index, prompt_id in enumerate(PROMPTS)
+}
+
+# Financial data each prompt needs: metrics, ratios (see RATIOS and
+# GROWTH_RATIOS) and most recent years, None for all of them
+PROMPT_FINANCIAL_CONTEXT = {
+    "Q3": (
+        [
+            "revenue",
+            "gross_profit",
+            "profit_before_tax",
+            "profit_after_tax",
+            "earnings_per_share",
+        ],
+        ["gross_margin_%", "net_margin_%", "revenue_growth_%", "eps_growth_%"],
+        None,
+    ),
+    "Q4": (
+        ["revenue", "profit_after_tax", "earnings_per_share", "dividend_per_share"],
+        ["net_margin_%", "revenue_growth_%", "eps_growth_%"],
+        None,
+    ),
+    "Q7": (
+        [
+            "revenue",
+            "profit_after_tax",
+            "intangible_assets",
+            "investments_subsidiaries",
+            "net_cash_from_operating_activities",
+            "investments_in_ppe",
+            "investments_in_subsidiaries",
+            "investments_in_acquisitions",
+        ],
+        ["roe_%", "revenue_growth_%", "eps_growth_%"],
+        6,
+    ),
+    "Q10": (
+        [
+            "share_price_at_report_date",
+            "max_share_price",
+            "min_share_price",
+            "earnings_per_share",
+            "dividend_per_share",
+        ],
+        ["pe", "dividend_yield_%", "eps_growth_%", "roe_%"],
+        5,
+    ),
+}
+
+# Token budget of the previous answers sent with a prompt
+AI_PREVIOUS_ANSWERS_TOKENS = int(os.getenv("AI_PREVIOUS_ANSWERS_TOKENS", 2000))
+
+# Stored length of the latest answers, the history keeps them in full
+ANSWER_MAX_LENGTH = 500
+
+# Max AI calls running at once for one full analysis
+AI_RUN_ALL_CONCURRENCY = int(os.getenv("AI_RUN_ALL_CONCURRENCY", 4))
 
 
 @router.get("/", response_model=PromptsResponse, status_code=status.HTTP_200_OK)
@@ -72,6 +196,21 @@ async def get_prompts(current_user: User = Depends(get_current_user)):
     return {"prompts": PROMPTS}
 
 
+def select_prompt_answers(user_id: int, stock_id: int):
+    """Select (prompt, response) of a stock's answers, resolving shared answers"""
+    return (
+        select(
+            StockAiPrompt.prompt,
+            latest_answer_response().label("response"),
+        )
+        .outerjoin(AiAnswerCache, StockAiPrompt.cache_entry_id == AiAnswerCache.id)
+        .where(
+            StockAiPrompt.stock_id == stock_id,
+            StockAiPrompt.user_id == user_id,
+        )
+    )
+
+
 @router.get(
     "/responses/{stock_id}",
     response_model=PromptsResponse,
@@ -79,39 +218,285 @@ async def get_prompts(current_user: User = Depends(get_current_user)):
 )
 async def get_responses(
     stock_id: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Get all AI responses for the current user"""
+    """Get all AI responses for the current user, 304 when If-None-Match is current"""
+    cached = await resource_not_modified(
+        request, response, db, current_user.id, stock_resource("prompts", stock_id)
+    )
+    if cached:
+        return cached
+
+    result = await db.execute(select_prompt_answers(current_user.id, stock_id))
+    ai_responses = result.all()
+
+    return {"prompts": {resp.prompt: resp.response for resp in ai_responses}}
 
+
+@router.get(
+    "/history/{stock_id}/{prompt_id}",
+    response_model=List[PromptHistoryResponse],
+    status_code=status.HTTP_200_OK,
+)
+async def get_prompt_history(
+    stock_id: int,
+    prompt_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Get the full answers of a prompt for a stock over time, newest first"""
     result = await db.execute(
-        select(StockAiPrompt).where(
-            StockAiPrompt.stock_id == stock_id,
-            StockAiPrompt.user_id == current_user.id,
+        select(StockAiPromptHistory)
+        .where(
+            StockAiPromptHistory.user_id == current_user.id,
+            StockAiPromptHistory.stock_id == stock_id,
+            StockAiPromptHistory.prompt == prompt_id,
         )
+        .order_by(StockAiPromptHistory.id.desc())
+        .limit(limit)
     )
-    ai_responses = result.scalars().all()
+    return result.scalars().all()
 
-    return {"prompts": {resp.prompt: resp.response for resp in ai_responses}}
 
+def extract_financial_data(
+    financial_data: Dict[str, FinancialMetrics], prompt_id: Optional[str] = None
+) -> str:
+    """Convert financial data to a compact table for OpenAI"""
+    fields, ratios, max_years = PROMPT_FINANCIAL_CONTEXT.get(
+        prompt_id, (None, None, None)
+    )
+
+    return build_financial_context(
+        {
+            date: metrics.model_dump(exclude_none=True)
+            for date, metrics in financial_data.items()
+        },
+        fields=fields,
+        ratios=ratios,
+        max_years=max_years,
+    )
 
-def extract_financial_data(financial_data: Dict[str, FinancialMetrics]) -> str:
-    """Convert financial data to simple string for OpenAI"""
-    lines = []
 
-    for date, metrics in financial_data.items():
-        metrics_dict = metrics.model_dump(exclude_none=True)
+async def load_previous_answers(
+    db: AsyncSession, user_id: int, stock_id: int, prompt_id: str
+) -> str:
+    """Read the stored answers of the other prompts as input for prompt_id"""
+    ai_responses = await db.execute(select_prompt_answers(user_id, stock_id))
+    answers = {response.prompt: response.response for response in ai_responses}
+
+    return format_previous_answers(answers, prompt_id)
+
+
+def format_previous_answers(answers: Dict[str, str], prompt_id: str) -> str:
+    """
+    Convert answers of the other prompts to simple string for OpenAI, in
+    PROMPTS order and within AI_PREVIOUS_ANSWERS_TOKENS
+    """
+    lines = [
+        f"Prompt id: {answer_prompt_id}, Prompt: {PROMPTS[answer_prompt_id]}, Answer: {answers[answer_prompt_id]}.\n"
+        for answer_prompt_id in PROMPTS
+        if answer_prompt_id in answers and answer_prompt_id != prompt_id
+    ]
+
+    return "".join(trim_to_token_budget(lines, AI_PREVIOUS_ANSWERS_TOKENS))
+
+
+def _prompt_query(
+    stock: Stock,
+    prompt_id: str,
+    financial_data: Dict[str, FinancialMetrics],
+    previous_answers: str = "",
+) -> dict:
+    """Arguments of the AI query for a prompt of a stock"""
+    if prompt_id in prompts_take_data:
+        financial_info = extract_financial_data(financial_data, prompt_id)
+    else:
+        financial_info = "No financial data provided."
+
+    return dict(
+        company_name=stock.company_name,
+        exchange=stock.exchange.name,
+        country=stock.country,
+        prompt=PROMPTS[prompt_id],
+        add_instruction=VALUE_INVESTOR_RULES if prompt_id in prompts_take_data else "",
+        data=financial_info,
+        prev_queries=previous_answers,
+    )
+
+
+async def ask_prompt(
+    stock: Stock,
+    prompt_id: str,
+    financial_data: Dict[str, FinancialMetrics],
+    previous_answers: str = "",
+) -> AiAnswer:
+    """
+    Query the AI for a prompt of a stock, needs no database session.
+    Identical concurrent queries of the same user share one AI call, and
+    answers of shared_answer_prompts come from the cross-user cache.
+    """
+    query = _prompt_query(stock, prompt_id, financial_data, previous_answers)
+    owner = dict(user_id=stock.user_id, stock_id=stock.id)
+
+    if prompt_id in shared_answer_prompts:
+        company = company_key(stock.company_name, stock.exchange.name, stock.country)
+        version = ai_prompt_version(query["prompt"], query["add_instruction"])
+
+        return await ai_single_flight.do(
+            f"shared:{company}:{prompt_id}:{version}",
+            lambda: shared_ai_answer(
+                company,
+                prompt_id,
+                version,
+                lambda: query_ai_prompt_async(**query, **owner),
+                source_user_id=stock.user_id,
+                source_stock_id=stock.id,
+            ),
+        )
+
+    key = f"prompt:{stock.user_id}:{stock.id}:{prompt_id}:{input_hash(query)}"
+    started_at = datetime.now(timezone.utc)
+
+    async def recent_answer() -> Optional[AiAnswer]:
+        async with async_session() as db:
+            result = await db.execute(
+                select_prompt_answers(stock.user_id, stock.id).where(
+                    StockAiPrompt.prompt == prompt_id,
+                    StockAiPrompt.created_at >= started_at,
+                )
+            )
+            row = result.first()
+
+        return AiAnswer(True, row.response) if row else None
+
+    return await ai_single_flight.do(
+        key, lambda: query_ai_prompt_async(**query, **owner), recheck=recent_answer
+    )
+
+
+def ai_answer_text(answer: AiAnswer, stock: Stock) -> str:
+    """Check an AI answer and truncate it to the stored ANSWER_MAX_LENGTH"""
+    if not answer.ok:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get AI answer",
+        )
+
+    elif "company not found" in answer.text.lower():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Company not found by AI"
+        )
+
+    logging.info(f"AI answer for {stock.company_name} received.")
+
+    if len(answer.text) > ANSWER_MAX_LENGTH:
+        logging.warning(
+            f"AI answer length ({len(answer.text)}) exceeds "
+            f"{ANSWER_MAX_LENGTH} characters. "
+            "Response will be truncated, the full answer is kept in the history."
+        )
+        return answer.text[:ANSWER_MAX_LENGTH]
+
+    return answer.text
+
+
+async def save_prompt_answer(
+    db: AsyncSession,
+    user_id: int,
+    stock_id: int,
+    prompt_id: str,
+    answer: AiAnswer,
+):
+    """
+    Write the answer of a prompt in a short transaction, see save_prompt_answers
+    """
+    await save_prompt_answers(db, user_id, stock_id, {prompt_id: answer})
 
-        # Format each metric as "Field: Value"
-        metric_strings = [
-            f"{field.replace('_', ' ').title()}: {value:,.2f}"
-            for field, value in metrics_dict.items()
-            if value is not None
-        ]
 
-        lines.append(f"Financial Results: {date} " + ", ".join(metric_strings))
+async def save_prompt_answers(
+    db: AsyncSession,
+    user_id: int,
+    stock_id: int,
+    answers: Dict[str, AiAnswer],
+):
+    """
+    Write checked answers of several prompts in a short transaction.
 
-    return "\n".join(lines)
+    Every answer is appended in full to the history, then the latest answers
+    are upserted in one statement, truncated and pointing to their history
+    entry. A shared answer is stored as a reference to its cache entry
+    instead of a copy.
+    """
+    if not answers:
+        return
+
+    history = await db.execute(
+        insert(StockAiPromptHistory)
+        .values(
+            [
+                {
+                    "user_id": user_id,
+                    "stock_id": stock_id,
+                    "prompt": prompt_id,
+                    "response_zlib": StockAiPromptHistory.compress(answer.text),
+                    "response_length": len(answer.text),
+                    "cache_entry_id": answer.cache_entry_id,
+                }
+                for prompt_id, answer in answers.items()
+            ]
+        )
+        .returning(StockAiPromptHistory.prompt, StockAiPromptHistory.id)
+    )
+    history_ids = dict(history.all())
+    await bump_versions(db, user_id, [stock_resource("prompts", stock_id)])
+    change_seq = await next_change_seq(db, user_id)
+
+    stmt = insert_on_conflict(StockAiPrompt).values(
+        [
+            {
+                "stock_id": stock_id,
+                "user_id": user_id,
+                "prompt": prompt_id,
+                "response": (
+                    None
+                    if answer.cache_entry_id
+                    else answer.text[:ANSWER_MAX_LENGTH]
+                ),
+                "cache_entry_id": answer.cache_entry_id,
+                "latest_history_id": history_ids[prompt_id],
+                "change_seq": change_seq,
+            }
+            for prompt_id, answer in answers.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            StockAiPrompt.user_id,
+            StockAiPrompt.stock_id,
+            StockAiPrompt.prompt,
+        ],
+        set_={
+            "response": stmt.excluded.response,
+            "cache_entry_id": stmt.excluded.cache_entry_id,
+            "latest_history_id": stmt.excluded.latest_history_id,
+            "created_at": func.now(),
+            "change_seq": stmt.excluded.change_seq,
+        },
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+    for prompt_id, answer in answers.items():
+        index_prompt_answer(
+            user_id,
+            stock_id,
+            prompt_id,
+            answer.text if answer.cache_entry_id else answer.text[:ANSWER_MAX_LENGTH],
+        )
 
 
 @router.post(
@@ -120,6 +505,7 @@ def extract_financial_data(financial_data: Dict[str, FinancialMetrics]) -> str:
 async def get_ai_response(
     prompt_id: str,
     data: FinancialCreate,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -131,86 +517,232 @@ async def get_ai_response(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid prompt ID"
         )
 
-    if prompt_id in prompts_take_data:
-        financial_info = extract_financial_data(data.data)
-    else:
-        financial_info = "No financial data provided."
-
     previous_answers = ""
-
     if prompt_id in prompts_take_previous_prompts:
-        ai_responses = await db.execute(
-            select(StockAiPrompt).where(
-                StockAiPrompt.stock_id == stock.id,
-                StockAiPrompt.user_id == current_user.id,
-            )
+        previous_answers = await load_previous_answers(
+            db, current_user.id, stock.id, prompt_id
         )
-        ai_responses_all = ai_responses.scalars().all()
 
-        if ai_responses_all:
-            for response in ai_responses_all:
-                if response.prompt in PROMPTS and response.prompt != prompt_id:
-                    previous_answers += f"Prompt id: {response.prompt}, Prompt: {PROMPTS[response.prompt]}, Answer: {response.response}.\n"
+    # Give the pooled connection back while waiting on the AI, the loaded stock
+    # stays usable and the session reconnects for the write below
+    await db.close()
 
-    ai_status, ai_response = query_ai_prompt(
-        company_name=stock.company_name,
-        exchange=stock.exchange.name,
-        country=stock.country,
-        prompt=PROMPTS[prompt_id],
-        add_instruction=VALUE_INVESTOR_RULES if prompt_id in prompts_take_data else "",
-        data=financial_info,
-        prev_queries=previous_answers,
+    answer = await cancel_on_disconnect(
+        request, ask_prompt(stock, prompt_id, data.data, previous_answers)
     )
+    truncated = ai_answer_text(answer, stock)
+
+    await save_prompt_answer(db, current_user.id, stock.id, prompt_id, answer)
+
+    return {"prompts": {prompt_id: truncated}}
+
 
-    if not ai_status:
+async def run_prompt_dag(
+    stock: Stock,
+    financial_data: Dict[str, FinancialMetrics],
+    stored_answers: Dict[str, str],
+) -> Tuple[Dict[str, Tuple[str, AiAnswer]], Dict[str, str]]:
+    """
+    Answer every prompt of a stock, needs no database session.
+
+    Prompts run concurrently, bounded by AI_RUN_ALL_CONCURRENCY, and a prompt
+    listed in PROMPT_DEPENDENCIES starts as soon as the answers it builds on
+    exist. A prompt is skipped when one of them failed, it would otherwise
+    build on a stale answer. Like a single prompt, it also sees the stored
+    answers of the other prompts.
+
+    Returns:
+        Checked answers keyed by prompt id as (truncated text, answer), and
+        error details keyed by prompt id
+    """
+    semaphore = asyncio.Semaphore(AI_RUN_ALL_CONCURRENCY)
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(prompt_id: str) -> Tuple[str, AiAnswer]:
+        dependencies = PROMPT_DEPENDENCIES[prompt_id]
+        await asyncio.gather(*(tasks[d] for d in dependencies), return_exceptions=True)
+
+        failed = [
+            dependency
+            for dependency in dependencies
+            if tasks[dependency].cancelled() or tasks[dependency].exception()
+        ]
+        if failed:
+            raise HTTPException(
+                status_code=status.HTTP_424_FAILED_DEPENDENCY,
+                detail=f"Skipped, depends on failed prompts {', '.join(failed)}",
+            )
+
+        inputs = dict(stored_answers) if dependencies else {}
+        for dependency in dependencies:
+            inputs[dependency] = tasks[dependency].result()[0]
+
+        async with semaphore:
+            answer = await ask_prompt(
+                stock,
+                prompt_id,
+                financial_data,
+                format_previous_answers(inputs, prompt_id),
+            )
+
+        return ai_answer_text(answer, stock), answer
+
+    # PROMPTS order puts dependencies first, their tasks exist when awaited
+    for prompt_id in PROMPTS:
+        tasks[prompt_id] = asyncio.ensure_future(run(prompt_id))
+
+    try:
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+    answers = {}
+    errors = {}
+    for prompt_id, task in tasks.items():
+        error = task.exception()
+        if error is None:
+            answers[prompt_id] = task.result()
+        elif isinstance(error, HTTPException):
+            errors[prompt_id] = str(error.detail)
+        else:
+            logging.error(f"Prompt {prompt_id} for {stock.company_name}: {error}")
+            errors[prompt_id] = "Failed to get AI answer"
+
+    return answers, errors
+
+
+@router.post(
+    "/run_all/{stock_id}",
+    response_model=RunAllPromptsResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def run_all_prompts(
+    stock_id: int,
+    data: FinancialCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Run the full analysis of a stock and save all answers at once"""
+    if stock_id != data.stock_id:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get AI answer",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Stock ID in path and body do not match",
         )
 
-    elif "company not found" in ai_response.lower():
+    stock = await get_stock_by_id(stock_id, db, current_user)
+
+    result = await db.execute(select_prompt_answers(current_user.id, stock.id))
+    stored_answers = {row.prompt: row.response for row in result}
+
+    await db.close()
+
+    answers, errors = await cancel_on_disconnect(
+        request, run_prompt_dag(stock, data.data, stored_answers)
+    )
+
+    await save_prompt_answers(
+        db,
+        current_user.id,
+        stock.id,
+        {prompt_id: answer for prompt_id, (_, answer) in answers.items()},
+    )
+
+    return {
+        "prompts": {prompt_id: text for prompt_id, (text, _) in answers.items()},
+        "errors": errors,
+    }
+
+
+@router.post("/{prompt_id}/stream", status_code=status.HTTP_200_OK)
+async def stream_ai_response(
+    prompt_id: str,
+    data: FinancialCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Stream the AI answer for a prompt as Server-Sent Events and save it"""
+    stock = await get_stock_by_id(data.stock_id, db, current_user)
+
+    if prompt_id not in PROMPTS:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Company not found by AI"
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid prompt ID"
         )
 
-    else:
-        logging.info(f"AI answer for {stock.company_name} received.")
+    previous_answers = ""
+    if prompt_id in prompts_take_previous_prompts:
+        previous_answers = await load_previous_answers(
+            db, current_user.id, stock.id, prompt_id
+        )
 
-        truncated = ""
-        if len(ai_response) > 500:
-            logging.warning(
-                f"AI answer length ({len(ai_response)}) exceeds 500 characters. "
-                "Response will be truncated."
-            )
-            truncated = ai_response[:500]
-        else:
-            truncated = ai_response
+    await db.close()
+    user_id = current_user.id
 
-        ai_result = await db.execute(
-            select(StockAiPrompt).where(
-                StockAiPrompt.stock_id == stock.id,
-                StockAiPrompt.user_id == current_user.id,
-                StockAiPrompt.prompt == prompt_id,
-            )
+    async def finish(text: str) -> dict:
+        answer = AiAnswer(bool(text), text or "No valid output from AI")
+        truncated = ai_answer_text(answer, stock)
+        async with async_session() as write_db:
+            await save_prompt_answer(write_db, user_id, stock.id, prompt_id, answer)
+
+        return {"prompts": {prompt_id: truncated}}
+
+    deltas = stream_ai_prompt(
+        **_prompt_query(stock, prompt_id, data.data, previous_answers),
+        user_id=stock.user_id,
+        stock_id=stock.id,
+    )
+    return sse_answer_response(deltas, finish)
+
+
+@router.post(
+    "/{prompt_id}/jobs",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submit_ai_response_job(
+    prompt_id: str,
+    data: FinancialCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Queue an AI answer for a prompt and return the job to poll"""
+    stock = await get_stock_by_id(data.stock_id, db, current_user)
+
+    if prompt_id not in PROMPTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid prompt ID"
         )
-        ai_record = ai_result.scalar_one_or_none()
-
-        # if no existing record, create new
-        if not ai_record:
-            ai_record = StockAiPrompt(
-                stock_id=stock.id,
-                user_id=current_user.id,
-                prompt=prompt_id,
-                response=truncated,
+
+    return await submit_job(
+        db,
+        current_user.id,
+        stock.id,
+        "prompt",
+        prompt=prompt_id,
+        payload=data.model_dump_json(),
+    )
+
+
+@register_job_handler("prompt")
+async def run_prompt_job(job: AiJob) -> str:
+    """Execute a queued prompt job in the same phases as get_ai_response"""
+    data = FinancialCreate.model_validate_json(job.payload)
+
+    async with async_session() as db:
+        stock = await get_job_stock(db, job)
+
+        previous_answers = ""
+        if job.prompt in prompts_take_previous_prompts:
+            previous_answers = await load_previous_answers(
+                db, job.user_id, stock.id, job.prompt
             )
-            db.add(ai_record)
 
-        else:
-            ai_record.prompt = prompt_id
-            ai_record.response = truncated
-            ai_record.created_at = datetime.now(timezone.utc)
+        await db.close()
+
+        answer = await ask_prompt(stock, job.prompt, data.data, previous_answers)
+        truncated = ai_answer_text(answer, stock)
 
-        await db.commit()
-        await db.refresh(ai_record)
+        await save_prompt_answer(db, job.user_id, stock.id, job.prompt, answer)
 
-        return {"prompts": {prompt_id: ai_record.response}}
+    return truncated
@@ -1,8 +1,10 @@
 from typing import List
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from pydantic import BaseModel
 
+from ..services.versions import STATIC_CACHE_CONTROL, content_etag, not_modified
+
 router = APIRouter(prefix="/reference", tags=["reference-data"])
 
 
@@ -78,19 +80,36 @@ SECTORS = [
 ]
 
 
+# The lists only change with a deployment, hash them once
+COUNTRIES_ETAG = content_etag(sorted(COUNTRIES))
+SECTORS_ETAG = content_etag(sorted(SECTORS))
+
+
 @router.get("/countries", response_model=List[CountryResponse])
-async def get_countries():
+async def get_countries(request: Request, response: Response):
     """
     Get list of supported countries
     """
+    cached = not_modified(
+        request, response, COUNTRIES_ETAG, cache_control=STATIC_CACHE_CONTROL
+    )
+    if cached:
+        return cached
+
     response = [CountryResponse(name=country) for country in sorted(COUNTRIES)]
     return response
 
 
 @router.get("/sectors", response_model=List[SectorResponse])
-async def get_sectors():
+async def get_sectors(request: Request, response: Response):
     """
     Get list of stock sectors
     """
+    cached = not_modified(
+        request, response, SECTORS_ETAG, cache_control=STATIC_CACHE_CONTROL
+    )
+    if cached:
+        return cached
+
     response = [SectorResponse(name=sector) for sector in sorted(SECTORS)]
     return response
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from ..models import User  # SQLAlchemy database model
+from ..services.auth import get_current_admin_user
+from ..services.scheduler import start_nightly_task
+
+router = APIRouter(prefix="/scheduler", tags=["scheduler"])
+
+
+@router.post("/tasks/{name}/run", status_code=status.HTTP_202_ACCEPTED)
+async def run_nightly_task_now(
+    name: str,
+    current_user: User = Depends(get_current_admin_user),
+):
+    """
+    Start a nightly task, e.g. refresh_ai_descriptions, in this worker now
+    instead of at AI_SCHEDULER_HOUR_UTC, admins only (see ADMIN_EMAILS).
+    Its last run shows under "scheduler" in /metrics/ once finished.
+    """
+    if not start_nightly_task(name):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Nightly task not found"
+        )
+
+    return {"task": name, "status": "started"}
@@ -0,0 +1,49 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_db
+from ..models import Stock, User  # SQLAlchemy database model
+from ..schemas import TextSearchResponse  # Pydantic API schemas
+from ..services.auth import get_current_user
+from ..services.text_search import search_texts
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get(
+    "/", response_model=List[TextSearchResponse], status_code=status.HTTP_200_OK
+)
+async def search_stock_texts(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Full-text search of the AI answers and descriptions of the current user's
+    stocks, e.g. "supply chain risk". Best ranked first, with a snippet.
+    """
+    matches = await search_texts(db, current_user.id, q, limit)
+    if not matches:
+        return []
+
+    result = await db.execute(
+        select(Stock.id, Stock.ticker, Stock.company_name).where(
+            Stock.id.in_({match.stock_id for match in matches}),
+            Stock.user_id == current_user.id,
+        )
+    )
+    stocks = {row.id: row for row in result}
+
+    return [
+        TextSearchResponse(
+            ticker=stocks[match.stock_id].ticker,
+            company_name=stocks[match.stock_id].company_name,
+            **match._asdict(),
+        )
+        for match in matches
+        if match.stock_id in stocks
+    ]
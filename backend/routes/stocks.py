@@ -1,20 +1,69 @@
+import asyncio
 import logging
+import os
 from datetime import datetime, timedelta, timezone
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from typing import Dict, List, Literal, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from sqlalchemy import exists, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from ..database import get_db
-from ..models import Stock, User  # SQLAlchemy database model
-from ..schemas import StockCreate, StockResponse, StockUpdate  # Pydantic API schemas
+from ..database import async_session, get_db
+from ..models import AiJob, FinancialStatement, Stock, User  # SQLAlchemy database model
+from ..schemas import (  # Pydantic API schemas
+    JobResponse,
+    Page,
+    StockCreate,
+    StockResponse,
+    StockUpdate,
+)
+from ..services.answer_cache import DESCRIPTION_PROMPT, company_key, shared_ai_answer
 from ..services.auth import get_current_user
-from ..services.openai import query_company_description
+from ..services.jobs import register_job_handler, submit_job
+from ..services.openai import (
+    AiAnswer,
+    cancel_on_disconnect,
+    company_description_version,
+    query_company_description_async,
+    stream_company_description,
+)
+from ..services.pagination import keyset_page
+from ..services.scheduler import register_nightly_task
+from ..services.serialization import FastJSONResponse, trusted_dict
+from ..services.singleflight import ai_single_flight
+from ..services.stock_search import search_stock_ids, stock_search_indexes
+from ..services.streaming import sse_answer_response, sse_done_response
+from ..services.sync import add_tombstone, next_change_seq
+from ..services.text_search import index_stock_text, remove_stock_text
+from ..services.versions import (
+    bump_versions,
+    resource_not_modified,
+    stock_resources,
+)
 
 router = APIRouter(prefix="/stocks", tags=["stocks"])
 
+# AI descriptions older than this are regenerated when requested
+AI_DESCRIPTION_MAX_AGE_DAYS = 30
+# The nightly refresh regenerates descriptions this many days before they expire
+AI_REFRESH_AHEAD_DAYS = int(os.getenv("AI_REFRESH_AHEAD_DAYS", 7))
+# Companies refreshed concurrently per batch, the pause between batches and the
+# max companies per night, to stay well within the provider rate limits
+AI_REFRESH_BATCH_SIZE = int(os.getenv("AI_REFRESH_BATCH_SIZE", 5))
+AI_REFRESH_BATCH_PAUSE_SECONDS = float(
+    os.getenv("AI_REFRESH_BATCH_PAUSE_SECONDS", 30)
+)
+AI_REFRESH_MAX_COMPANIES = int(os.getenv("AI_REFRESH_MAX_COMPANIES", 200))
+
 
 async def get_stock_by_id(
     stock_id: int,
@@ -39,6 +88,20 @@ async def get_stock_by_id(
     return stock
 
 
+async def get_job_stock(db: AsyncSession, job: AiJob) -> Stock:
+    """
+    Helper function to get the stock of a background job on behalf of its owner
+    """
+    user = await db.get(User, job.user_id) if job.user_id else None
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+
+    return await get_stock_by_id(job.stock_id, db, user)
+
+
 @router.post("/", response_model=StockResponse, status_code=status.HTTP_201_CREATED)
 async def create_stock(
     stock_data: StockCreate,
@@ -59,21 +122,122 @@ async def create_stock(
     )
 
     db.add(db_stock)
+    await bump_versions(db, current_user.id, ["stocks"])
+    db_stock.change_seq = await next_change_seq(db, current_user.id)
     await db.commit()
     await db.refresh(db_stock)
+    stock_search_indexes.add(db_stock)
+    index_stock_text(db_stock)
 
     return db_stock  # Pydantic will convert SQLAlchemy model to UserResponse
 
 
 @router.get("/", response_model=List[StockResponse], status_code=status.HTTP_200_OK)
 async def get_all_stocks(
-    db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get all stocks for the current user, 304 when If-None-Match is current
+    """
+    cached = await resource_not_modified(
+        request, response, db, current_user.id, "stocks"
+    )
+    if cached:
+        return cached
+
+    # Plain rows instead of Stock objects, returned without validating them
+    stocks = await db.execute(
+        select(*(Stock.__table__.c[name] for name in StockResponse.model_fields)).where(
+            Stock.user_id == current_user.id
+        )
+    )
+    return FastJSONResponse(
+        [trusted_dict(StockResponse, row) for row in stocks],
+        headers=dict(response.headers),
+    )
+
+
+@router.get(
+    "/search", response_model=List[StockResponse], status_code=status.HTTP_200_OK
+)
+async def search_stocks(
+    q: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Search the stocks of the current user by ticker, abbreviation or company
+    name, tolerating typos. Best matches first.
+    """
+    stock_ids = await search_stock_ids(db, current_user.id, q, limit)
+    if not stock_ids:
+        return []
+
+    result = await db.execute(
+        select(Stock).where(Stock.id.in_(stock_ids), Stock.user_id == current_user.id)
+    )
+    stocks = {stock.id: stock for stock in result.scalars()}
+
+    return [stocks[stock_id] for stock_id in stock_ids if stock_id in stocks]
+
+
+STOCK_SORT_COLUMNS = {
+    "company_name": Stock.company_name,
+    "ticker": Stock.ticker,
+    "created_at": Stock.created_at,
+    "id": Stock.id,
+}
+
+
+@router.get("/page", response_model=Page[StockResponse], status_code=status.HTTP_200_OK)
+async def get_stocks_page(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    sort: Literal["company_name", "ticker", "created_at", "id"] = "company_name",
+    order: Literal["asc", "desc"] = "asc",
+    sector: Optional[str] = None,
+    country: Optional[str] = None,
+    exchange_id: Optional[int] = None,
+    has_financials: Optional[bool] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
 ):
     """
-    Get all stocks for the current user
+    Get one page of the stocks of the current user, filtered and sorted.
+    Pass next_cursor of a page as cursor to get the next one.
     """
-    stocks = await db.execute(select(Stock).where(Stock.user_id == current_user.id))
-    return stocks.scalars().all()
+    stmt = select(Stock).where(Stock.user_id == current_user.id)
+
+    if sector is not None:
+        stmt = stmt.where(Stock.sector == sector)
+    if country is not None:
+        stmt = stmt.where(Stock.country == country)
+    if exchange_id is not None:
+        stmt = stmt.where(Stock.exchange_id == exchange_id)
+    if has_financials is not None:
+        financials = exists().where(
+            FinancialStatement.user_id == current_user.id,
+            FinancialStatement.stock_id == Stock.id,
+        )
+        stmt = stmt.where(financials if has_financials else ~financials)
+
+    items, next_cursor, total = await keyset_page(
+        db,
+        stmt,
+        STOCK_SORT_COLUMNS[sort],
+        Stock.id,
+        order=order,
+        cursor=cursor,
+        limit=limit,
+        include_total=include_total,
+    )
+
+    return {"items": items, "next_cursor": next_cursor, "total": total}
 
 
 @router.put("/{stock_id}", response_model=StockResponse, status_code=status.HTTP_200_OK)
@@ -93,8 +257,12 @@ async def update_stock(
     for field, value in updated_data.items():
         setattr(stock, field, value)
 
+    await bump_versions(db, current_user.id, ["stocks"])
+    stock.change_seq = await next_change_seq(db, current_user.id)
     await db.commit()
     await db.refresh(stock)
+    stock_search_indexes.add(stock)
+    index_stock_text(stock)
 
     return stock
 
@@ -111,12 +279,113 @@ async def delete_stock(
     stock = await get_stock_by_id(stock_id, db, current_user)
 
     await db.delete(stock)
+    await bump_versions(db, current_user.id, ["stocks", *stock_resources(stock_id)])
+    await add_tombstone(
+        db,
+        current_user.id,
+        "stocks",
+        stock_id,
+        await next_change_seq(db, current_user.id),
+    )
     await db.commit()
+    stock_search_indexes.remove(current_user.id, stock_id)
+    remove_stock_text(current_user.id, stock_id)
 
     # 204 No Content - successful deletion with no response body
     return None
 
 
+def ai_description_is_fresh(stock: Stock) -> bool:
+    """
+    Check if the stock has an AI description younger than 30 days
+    """
+    return bool(
+        stock.ai_description
+        and stock.ai_description_created_at
+        and (datetime.now(timezone.utc) - stock.ai_description_created_at)
+        < timedelta(days=AI_DESCRIPTION_MAX_AGE_DAYS)
+    )
+
+
+async def ask_company_description(stock: Stock) -> AiAnswer:
+    """
+    Query the AI for the description of a stock, needs no database session.
+    Descriptions only depend on the company, so they come from the cross-user
+    answer cache and identical concurrent queries share one AI call.
+    """
+    query = (stock.company_name, stock.exchange.name, stock.country)
+    company = company_key(*query)
+    version = company_description_version()
+
+    return await ai_single_flight.do(
+        f"shared:{company}:{DESCRIPTION_PROMPT}:{version}",
+        lambda: shared_ai_answer(
+            company,
+            DESCRIPTION_PROMPT,
+            version,
+            lambda: query_company_description_async(
+                *query, user_id=stock.user_id, stock_id=stock.id
+            ),
+            source_user_id=stock.user_id,
+            source_stock_id=stock.id,
+        ),
+    )
+
+
+def ai_description_text(answer: AiAnswer, stock: Stock) -> str:
+    """
+    Check an AI description and truncate it to the stored 500 characters
+    """
+    if not answer.ok:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get AI description",
+        )
+
+    elif "company not found" in answer.text.lower():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Company not found by AI"
+        )
+
+    logging.info(f"AI description for {stock.company_name} received.")
+
+    if len(answer.text) > 500:
+        logging.warning(
+            f"AI description length ({len(answer.text)}) exceeds 500 characters. "
+            "Response will be truncated."
+        )
+        return answer.text[:500]
+
+    return answer.text
+
+
+async def save_ai_description(
+    db: AsyncSession, stock: Stock, ai_description: str
+) -> Stock:
+    """
+    Write a new AI description of the stock in a short transaction
+    """
+    now = datetime.now(timezone.utc)
+
+    await bump_versions(db, stock.user_id, ["stocks"])
+    await db.execute(
+        update(Stock)
+        .where(Stock.id == stock.id)
+        .values(
+            ai_description=ai_description,
+            ai_description_created_at=now,
+            change_seq=await next_change_seq(db, stock.user_id),
+        )
+    )
+    await db.commit()
+
+    stock.ai_description = ai_description
+    stock.ai_description_created_at = now
+    index_stock_text(stock)
+
+    return stock
+
+
 @router.get(
     "/{stock_id}/ai_description",
     response_model=StockResponse,
@@ -124,6 +393,7 @@ async def delete_stock(
 )
 async def get_ai_description(
     stock_id: int,
+    request: Request,
     # stock_data: StockUpdate,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -133,44 +403,196 @@ async def get_ai_description(
     """
     stock = await get_stock_by_id(stock_id, db, current_user)
 
-    if stock.ai_description:
-        # check the ai_description_created_at time and reuse if < 30 days
-        if stock.ai_description_created_at and (
-            datetime.now(timezone.utc) - stock.ai_description_created_at
-        ) < timedelta(days=30):
-            logging.info("Returning existing AI description (within 30 days)")
-            return stock
+    # reuse the ai_description if < 30 days
+    if ai_description_is_fresh(stock):
+        logging.info("Returning existing AI description (within 30 days)")
+        return stock
 
-    ai_status, ai_response = query_company_description(
-        stock.company_name, stock.exchange.name, stock.country
-    )
+    # Give the pooled connection back while waiting on the AI, the loaded stock
+    # stays usable and the session reconnects for the write below
+    await db.close()
 
-    if not ai_status:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get AI description",
+    answer = await cancel_on_disconnect(request, ask_company_description(stock))
+    ai_description = ai_description_text(answer, stock)
+
+    return await save_ai_description(db, stock, ai_description)
+
+
+@router.get("/{stock_id}/ai_description/stream", status_code=status.HTTP_200_OK)
+async def stream_ai_description(
+    stock_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream the AI-generated description for a stock as Server-Sent Events and
+    save it. A fresh stored description is sent as a single "done" event.
+    """
+    stock = await get_stock_by_id(stock_id, db, current_user)
+    await db.close()
+
+    if ai_description_is_fresh(stock):
+        return sse_done_response(
+            StockResponse.model_validate(stock).model_dump(mode="json")
         )
 
-    elif "company not found" in ai_response.lower():
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Company not found by AI"
+    async def finish(text: str) -> dict:
+        ai_description = ai_description_text(
+            AiAnswer(bool(text), text or "No valid output from AI"), stock
         )
+        async with async_session() as write_db:
+            await save_ai_description(write_db, stock, ai_description)
 
-    else:
-        logging.info(f"AI description for {stock.company_name} received.")
+        return StockResponse.model_validate(stock).model_dump(mode="json")
 
-        if len(ai_response) > 500:
-            logging.warning(
-                f"AI description length ({len(ai_response)}) exceeds 500 characters. "
-                "Response will be truncated."
-            )
-            truncated = ai_response[:500]
-        else:
-            truncated = ai_response
+    deltas = stream_company_description(
+        stock.company_name,
+        stock.exchange.name,
+        stock.country,
+        user_id=stock.user_id,
+        stock_id=stock.id,
+    )
+    return sse_answer_response(deltas, finish)
+
+
+@router.post(
+    "/{stock_id}/ai_description/jobs",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submit_ai_description_job(
+    stock_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Queue an AI-generated description for a stock and return the job to poll
+    """
+    stock = await get_stock_by_id(stock_id, db, current_user)
+
+    return await submit_job(db, current_user.id, stock.id, "ai_description")
+
+
+@register_job_handler("ai_description")
+async def run_ai_description_job(job: AiJob) -> str:
+    """
+    Execute a queued AI description job in the same phases as get_ai_description
+    """
+    async with async_session() as db:
+        stock = await get_job_stock(db, job)
+
+        if ai_description_is_fresh(stock):
+            return stock.ai_description
+
+        await db.close()
+
+        answer = await ask_company_description(stock)
+        ai_description = ai_description_text(answer, stock)
+
+        await save_ai_description(db, stock, ai_description)
 
-        setattr(stock, "ai_description", truncated)
+    return ai_description
 
+
+async def refresh_company_description(stocks: List[Stock]):
+    """
+    Regenerate the AI description of one company and write it to every stock
+    tracking it. The call is not counted against the users' AI limits.
+    """
+    stock = stocks[0]
+    query = (stock.company_name, stock.exchange.name, stock.country)
+
+    answer = await shared_ai_answer(
+        company_key(*query),
+        DESCRIPTION_PROMPT,
+        company_description_version(),
+        lambda: query_company_description_async(*query, stock_id=stock.id),
+        source_user_id=stock.user_id,
+        source_stock_id=stock.id,
+        refresh=True,
+    )
+    ai_description = ai_description_text(answer, stock)
+
+    stocks_by_user: Dict[int, List[int]] = {}
+    for s in stocks:
+        stocks_by_user.setdefault(s.user_id, []).append(s.id)
+
+    async with async_session() as db:
+        # Users in a fixed order, each one's counter row stays locked until commit
+        for user_id in sorted(stocks_by_user):
+            await bump_versions(db, user_id, ["stocks"])
+            await db.execute(
+                update(Stock)
+                .where(Stock.id.in_(stocks_by_user[user_id]))
+                .values(
+                    ai_description=ai_description,
+                    ai_description_created_at=datetime.now(timezone.utc),
+                    change_seq=await next_change_seq(db, user_id),
+                )
+            )
         await db.commit()
-        await db.refresh(stock)
 
-        return stock
+    for s in stocks:
+        s.ai_description = ai_description
+        index_stock_text(s)
+
+
+@register_nightly_task("refresh_ai_descriptions")
+async def refresh_stale_ai_descriptions():
+    """
+    Regenerate AI descriptions about to become stale, so users opening a stock
+    rarely wait on the AI. Stocks of the same company share one AI call, and
+    companies are refreshed in throttled batches, the stalest first.
+    """
+    stale_before = datetime.now(timezone.utc) - timedelta(
+        days=AI_DESCRIPTION_MAX_AGE_DAYS - AI_REFRESH_AHEAD_DAYS
+    )
+
+    async with async_session() as db:
+        result = await db.execute(
+            select(Stock)
+            .options(selectinload(Stock.exchange))
+            .where(
+                # Stocks left behind by deleted users are not refreshed, nor
+                # stocks whose exchange was deleted, descriptions need one
+                Stock.user_id.is_not(None),
+                Stock.exchange_id.is_not(None),
+                Stock.ai_description.is_not(None),
+                Stock.ai_description_created_at < stale_before,
+            )
+            .order_by(Stock.ai_description_created_at)
+        )
+        stocks = result.scalars().all()
+
+    companies: Dict[str, List[Stock]] = {}
+    for stock in stocks:
+        key = company_key(stock.company_name, stock.exchange.name, stock.country)
+        if key in companies or len(companies) < AI_REFRESH_MAX_COMPANIES:
+            companies.setdefault(key, []).append(stock)
+
+    groups = list(companies.values())
+    refreshed = 0
+
+    for start in range(0, len(groups), AI_REFRESH_BATCH_SIZE):
+        if start:
+            await asyncio.sleep(AI_REFRESH_BATCH_PAUSE_SECONDS)
+
+        batch = groups[start:start + AI_REFRESH_BATCH_SIZE]
+        results = await asyncio.gather(
+            *(refresh_company_description(group) for group in batch),
+            return_exceptions=True,
+        )
+
+        for group, error in zip(batch, results):
+            if error is None:
+                refreshed += 1
+            else:
+                logging.warning(
+                    f"Failed to refresh AI description of "
+                    f"{group[0].company_name}: {error!r}"
+                )
+
+    logging.info(
+        f"Refreshed AI descriptions of {refreshed}/{len(groups)} companies "
+        f"({len(stocks)} stale stocks)"
+    )
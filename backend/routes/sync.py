@@ -0,0 +1,147 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_db
+from ..models import (  # SQLAlchemy database model
+    AiAnswerCache,
+    FinancialStatement,
+    Investment,
+    Stock,
+    StockAiPrompt,
+    SyncTombstone,
+    User,
+)
+from ..models.financial import METRIC_COLUMNS
+from ..schemas import InvestSummaryResponse, StockResponse  # Pydantic API schemas
+from ..services.answer_cache import latest_answer_response
+from ..services.auth import get_current_user
+from ..services.serialization import FastJSONResponse, trusted_dict
+from ..services.sync import current_change_seq
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+def _changed(stmt, model, user_id: int, since: Optional[int]):
+    """Rows of the user, only the ones written after since unless a full sync"""
+    stmt = stmt.where(model.user_id == user_id)
+    if since:
+        stmt = stmt.where(model.change_seq > since)
+    return stmt
+
+
+@router.get("/", status_code=status.HTTP_200_OK)
+async def sync(
+    since: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get the stocks, financial statements, AI answers and investment summaries
+    written since a cursor, and the ids of the stocks deleted since then.
+
+    Without since, everything is returned. Pass the returned cursor as since
+    on the next call. Empty sections are left out, so when nothing changed
+    the response is only {"cursor": ...}. Financial statements, answers and
+    investment summaries of a deleted stock are deleted with it.
+    """
+    # Read first, rows written meanwhile are sent again on the next call
+    cursor = await current_change_seq(db, current_user.id)
+    if since and since >= cursor:
+        return FastJSONResponse({"cursor": cursor})
+
+    changes = {"cursor": cursor}
+
+    stocks = await db.execute(
+        _changed(
+            select(*(Stock.__table__.c[name] for name in StockResponse.model_fields)),
+            Stock,
+            current_user.id,
+            since,
+        )
+    )
+    changes["stocks"] = [trusted_dict(StockResponse, row) for row in stocks]
+
+    table = FinancialStatement.__table__
+    statements = await db.execute(
+        _changed(
+            select(
+                table.c.stock_id,
+                table.c.year,
+                *(table.c[column] for column in METRIC_COLUMNS),
+            ),
+            FinancialStatement,
+            current_user.id,
+            since,
+        )
+    )
+    changes["financials"] = [
+        {
+            "stock_id": row[0],
+            "period": row[1].strftime("%Y-%m-%d"),
+            "metrics": {
+                column: value
+                for column, value in zip(METRIC_COLUMNS, row[2:])
+                if value is not None
+            },
+        }
+        for row in statements
+    ]
+
+    answers = await db.execute(
+        _changed(
+            select(
+                StockAiPrompt.stock_id,
+                StockAiPrompt.prompt,
+                latest_answer_response().label("response"),
+                StockAiPrompt.created_at,
+            ).outerjoin(
+                AiAnswerCache, StockAiPrompt.cache_entry_id == AiAnswerCache.id
+            ),
+            StockAiPrompt,
+            current_user.id,
+            since,
+        )
+    )
+    changes["prompts"] = [dict(row._mapping) for row in answers]
+
+    investments = await db.execute(
+        _changed(
+            select(
+                Investment.stock_id,
+                *(
+                    Investment.__table__.c[name]
+                    for name in InvestSummaryResponse.model_fields
+                ),
+            ),
+            Investment,
+            current_user.id,
+            since,
+        )
+    )
+    changes["investments"] = [
+        {"stock_id": row.stock_id, **trusted_dict(InvestSummaryResponse, row)}
+        for row in investments
+    ]
+
+    # A full sync only returns existing rows, nothing to delete
+    if since:
+        tombstones = await db.execute(
+            select(SyncTombstone.row_id).where(
+                SyncTombstone.user_id == current_user.id,
+                SyncTombstone.resource == "stocks",
+                SyncTombstone.change_seq > since,
+            )
+        )
+        changes["deleted_stocks"] = tombstones.scalars().all()
+
+    # The cursor is always sent, even 0 for a user who never wrote anything
+    return FastJSONResponse(
+        {
+            key: value
+            for key, value in changes.items()
+            if key == "cursor" or value
+        }
+    )
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_db
+from ..models import AiUsage, User  # SQLAlchemy database model
+from ..schemas import UsageDayResponse  # Pydantic API schemas
+from ..services.auth import get_current_admin_user, get_current_user
+from ..services.usage import USAGE_FAILED
+
+router = APIRouter(prefix="/usage", tags=["usage"])
+
+
+def select_usage_per_day(days: int):
+    """Select the AI usage per user and day of the last days"""
+    day = func.date(AiUsage.created_at)
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+
+    return (
+        select(
+            AiUsage.user_id,
+            day.label("day"),
+            func.count().label("calls"),
+            func.sum(case((AiUsage.status == USAGE_FAILED, 1), else_=0)).label(
+                "failed_calls"
+            ),
+            func.sum(AiUsage.input_tokens).label("input_tokens"),
+            func.sum(AiUsage.output_tokens).label("output_tokens"),
+        )
+        .where(AiUsage.created_at >= since)
+        .group_by(AiUsage.user_id, day)
+        .order_by(day.desc(), AiUsage.user_id)
+    )
+
+
+@router.get("/", response_model=List[UsageDayResponse], status_code=status.HTTP_200_OK)
+async def get_usage(
+    days: int = Query(30, ge=1, le=366),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get the AI usage of the current user per day
+    """
+    result = await db.execute(
+        select_usage_per_day(days).where(AiUsage.user_id == current_user.id)
+    )
+    return result.mappings().all()
+
+
+@router.get(
+    "/users", response_model=List[UsageDayResponse], status_code=status.HTTP_200_OK
+)
+async def get_usage_of_users(
+    days: int = Query(30, ge=1, le=366),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+):
+    """
+    Get the AI usage of every user per day, admins only (see ADMIN_EMAILS)
+    """
+    result = await db.execute(select_usage_per_day(days))
+    return result.mappings().all()
@@ -1,8 +1,7 @@
 from datetime import timedelta
 
-import bcrypt
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
@@ -17,44 +16,17 @@ from ..schemas import (
 )
 from ..services.auth import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
+    TOKEN_INCLUDE_USER_ID,
     create_access_token,
     get_current_user,
+    invalidate_cached_user,
     verify_token_user,
 )
+from ..services.password import hash_password, needs_rehash, verify_password
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
-def hash_password(password: str) -> str:
-    """
-    Hash password using bcrypt with salt.
-
-    Args:
-        password: Plain text password to hash
-
-    Returns:
-        Hashed password as string
-    """
-    # Generate salt and hash password
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
-    return hashed.decode("utf-8")
-
-
-def verify_password(password: str, hashed_password: str) -> bool:
-    """
-    Verify a password against its hash.
-
-    Args:
-        password: Plain text password to verify
-        hashed_password: Previously hashed password
-
-    Returns:
-        True if password matches, False otherwise
-    """
-    return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
-
-
 @router.post(
     "/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED
 )
@@ -65,7 +37,7 @@ async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_db))
     db_user = User(
         username=user_data.username,
         email=user_data.email,
-        password_hash=hash_password(user_data.password),
+        password_hash=await hash_password(user_data.password),
     )
 
     db.add(db_user)
@@ -84,20 +56,40 @@ async def login_user(credentials: UserLogin, db: AsyncSession = Depends(get_db))
     result = await db.execute(select(User).where(User.email == credentials.email))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(credentials.password, user.password_hash):
+    # Give the pooled connection back while bcrypt runs, a login burst would
+    # otherwise hold every connection and stall the other requests
+    await db.close()
+
+    if not user or not await verify_password(
+        credentials.password, user.password_hash
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Upgrade the hash to the current work factor while the password is known
+    if needs_rehash(user.password_hash):
+        user.password_hash = await hash_password(credentials.password)
+        await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(password_hash=user.password_hash)
+        )
+        await db.commit()
+
     # Create JWT token
+    token_data = {
+        "sub": user.email,
+        "username": user.username,
+    }
+    if TOKEN_INCLUDE_USER_ID:
+        token_data["uid"] = user.id
+
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={
-            "sub": user.email,
-            "username": user.username,
-        },
+        data=token_data,
         expires_delta=access_token_expires,
     )
 
@@ -152,20 +144,29 @@ async def update_user(
             detail="You can only update your own profile",
         )
 
+    # Hash before loading the user, so no pooled connection is held meanwhile
+    password_hash = None
+    if user_data.password is not None:
+        await db.close()
+        password_hash = await hash_password(user_data.password)
+
     user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    previous_email = user.email
+
     # Update only provided fields
     if user_data.username is not None:
         user.username = user_data.username
     if user_data.email is not None:
         user.email = user_data.email
-    if user_data.password is not None:
-        user.password_hash = hash_password(user_data.password)
+    if password_hash is not None:
+        user.password_hash = password_hash
 
     await db.commit()
     await db.refresh(user)
+    invalidate_cached_user(previous_email, user.email)
 
     return user
 
@@ -192,3 +193,4 @@ async def delete_user(
 
     await db.delete(user)
     await db.commit()
+    invalidate_cached_user(user.email)
@@ -1,10 +1,14 @@
 from .financial import (
+    FinancialColumns,
     FinancialCreate,
     FinancialDataBase,
     FinancialMetrics,
     FinancialResponse,
 )
 from .investment import InvestSummaryCreate, InvestSummaryResponse
+from .job import JobResponse
+from .pagination import Page
+from .search import TextSearchResponse
 from .stock import (
     ExchangeCreate,
     ExchangeResponse,
@@ -13,6 +17,7 @@ from .stock import (
     StockResponse,
     StockUpdate,
 )
+from .usage import UsageDayResponse
 from .user import (
     Token,
     TokenData,
@@ -41,6 +46,11 @@ __all__ = [
     "FinancialDataBase",
     "FinancialCreate",
     "FinancialResponse",
+    "FinancialColumns",
     "InvestSummaryCreate",
     "InvestSummaryResponse",
+    "JobResponse",
+    "Page",
+    "TextSearchResponse",
+    "UsageDayResponse",
 ]
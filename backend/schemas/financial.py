@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
@@ -96,3 +96,16 @@ class FinancialResponse(FinancialDataBase):
     # Add response-specific fields if needed
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+
+
+class FinancialColumns(BaseModel):
+    """
+    Compact financial data response: values[i][j] is the metric fields[j] of
+    the period periods[i] (YYYY-MM-DD), null when not reported
+    """
+
+    stock_id: int
+    fields: List[str]
+    periods: List[str]
+    values: List[List[Optional[float]]]
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,21 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class TextSearchResponse(BaseModel):
+    """
+    A stock text matching a full-text search, with a highlighted snippet.
+
+    The snippet is HTML: the stored text is escaped and matched words are
+    wrapped in <b></b>, the only markup it contains. Render it as HTML, or
+    drop the tags and unescape it to show plain text.
+    """
+
+    stock_id: int
+    ticker: str
+    company_name: str
+    source: str  # "prompt", "description" or "ai_description"
+    prompt: Optional[str]  # Prompt id of an AI answer
+    rank: float
+    snippet: str  # Escaped HTML, matched words in <b></b>
@@ -0,0 +1,15 @@
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class UsageDayResponse(BaseModel):
+    """AI usage of a user on one day"""
+
+    user_id: Optional[int]
+    day: date
+    calls: int
+    failed_calls: int
+    input_tokens: int
+    output_tokens: int
@@ -0,0 +1,176 @@
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import async_session, insert_on_conflict
+from ..models import AiAnswerCache, StockAiPrompt
+from .openai import AiAnswer
+from .sync import next_change_seq
+from .versions import bump_versions, stock_resource
+
+# Shared answers older than this are regenerated
+AI_SHARED_CACHE_MAX_AGE_DAYS = int(os.getenv("AI_SHARED_CACHE_MAX_AGE_DAYS", 30))
+# Shared answers are stored in full, read as the latest answer of a stock they
+# are cut to the per-stock answer column
+CACHED_ANSWER_MAX_LENGTH = 500
+
+# Cache key of the company description, next to the prompt ids
+DESCRIPTION_PROMPT = "description"
+
+_stats = {"hits": 0, "misses": 0, "tokens_saved": 0}
+
+
+def company_key(company_name: str, exchange: str, country: str) -> str:
+    """
+    Normalized company identity, so "Apple Inc" and " apple  inc " share answers
+    """
+    parts = [company_name, exchange, country]
+    return "|".join(
+        re.sub(r"\s+", " ", (part or "").strip().lower()) for part in parts
+    )
+
+
+def latest_answer_response():
+    """
+    Latest answer of a stock prompt joined with its cache entry, a shared answer
+    truncated like the per-stock answers
+    """
+    return func.coalesce(
+        StockAiPrompt.response,
+        func.substr(AiAnswerCache.response, 1, CACHED_ANSWER_MAX_LENGTH),
+    )
+
+
+async def shared_ai_answer(
+    company: str,
+    prompt: str,
+    instruction_version: str,
+    ask: Callable[[], Awaitable[AiAnswer]],
+    source_user_id: Optional[int] = None,
+    source_stock_id: Optional[int] = None,
+    refresh: bool = False,
+) -> AiAnswer:
+    """
+    Get an answer that only depends on the company from the shared cache, or ask
+    the AI and store the answer for every other user tracking the company.
+
+    Args:
+        company: Normalized company identity, see company_key
+        prompt: Prompt id, or DESCRIPTION_PROMPT
+        instruction_version: Version of the instructions producing the answer
+        ask: Coroutine function querying the AI on a cache miss
+        source_user_id: User whose request produced a new entry
+        source_stock_id: Stock whose request produced a new entry
+        refresh: Skip the lookup and always ask the AI
+
+    Returns:
+        The answer, with cache_entry_id set when it is shared
+    """
+    if not refresh:
+        fresh_after = datetime.now(timezone.utc) - timedelta(
+            days=AI_SHARED_CACHE_MAX_AGE_DAYS
+        )
+        async with async_session() as db:
+            result = await db.execute(
+                select(AiAnswerCache).where(
+                    AiAnswerCache.company_key == company,
+                    AiAnswerCache.prompt == prompt,
+                    AiAnswerCache.instruction_version == instruction_version,
+                    AiAnswerCache.created_at >= fresh_after,
+                )
+            )
+            entry = result.scalar_one_or_none()
+
+        if entry is not None:
+            _stats["hits"] += 1
+            _stats["tokens_saved"] += entry.input_tokens + entry.output_tokens
+            logging.info(f"Shared AI answer cache hit for {company} {prompt}")
+            return AiAnswer(True, entry.response, cache_entry_id=entry.id)
+
+    _stats["misses"] += 1
+    answer = await ask()
+
+    # Failures and unknown companies are not worth sharing
+    if not answer.ok or "company not found" in answer.text.lower():
+        return answer
+
+    values = dict(
+        response=answer.text,
+        model=answer.model,
+        input_tokens=answer.input_tokens,
+        output_tokens=answer.output_tokens,
+        source_user_id=source_user_id,
+        source_stock_id=source_stock_id,
+        created_at=datetime.now(timezone.utc),
+    )
+    stmt = insert_on_conflict(AiAnswerCache).values(
+        company_key=company,
+        prompt=prompt,
+        instruction_version=instruction_version,
+        **values,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            AiAnswerCache.company_key,
+            AiAnswerCache.prompt,
+            AiAnswerCache.instruction_version,
+        ],
+        set_=values,
+    ).returning(AiAnswerCache.id)
+
+    async with async_session() as db:
+        result = await db.execute(stmt)
+        entry_id = result.scalar_one()
+        await _touch_shared_answers(db, entry_id)
+        await db.commit()
+
+    return answer._replace(cache_entry_id=entry_id)
+
+
+async def _touch_shared_answers(db: AsyncSession, entry_id: int):
+    """
+    A refreshed entry is rewritten in place, which changes the answers of
+    every user sharing it: bump their prompt resource versions and stamp the
+    answers with their next change sequence value for GET /sync
+    """
+    result = await db.execute(
+        select(StockAiPrompt.user_id, StockAiPrompt.stock_id).where(
+            StockAiPrompt.cache_entry_id == entry_id,
+            StockAiPrompt.user_id.is_not(None),
+        )
+    )
+    stocks_by_user: Dict[int, List[int]] = {}
+    for user_id, stock_id in result:
+        stocks_by_user.setdefault(user_id, []).append(stock_id)
+
+    # Users in a fixed order, their version rows stay locked until commit
+    for user_id in sorted(stocks_by_user):
+        resources = [
+            stock_resource("prompts", stock_id) for stock_id in stocks_by_user[user_id]
+        ]
+        await bump_versions(db, user_id, resources)
+        await db.execute(
+            update(StockAiPrompt)
+            .where(
+                StockAiPrompt.cache_entry_id == entry_id,
+                StockAiPrompt.user_id == user_id,
+            )
+            .values(change_seq=await next_change_seq(db, user_id))
+        )
+
+
+def answer_cache_stats() -> dict:
+    """
+    Hit rate and estimated tokens saved by the shared answer cache
+    """
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "hit_rate": _stats["hits"] / lookups if lookups else 0.0,
+        "max_age_days": AI_SHARED_CACHE_MAX_AGE_DAYS,
+    }
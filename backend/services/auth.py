@@ -1,12 +1,15 @@
 import os
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from ..database import get_db
 from ..models import User
@@ -18,11 +21,103 @@ SECRET_KEY = os.getenv(
 )
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 600
+# Put the immutable user id in new tokens so a cache miss is a primary key lookup
+TOKEN_INCLUDE_USER_ID = os.getenv("TOKEN_INCLUDE_USER_ID", "true").lower() == "true"
+
+# Emails of the users allowed on admin endpoints, comma separated. Nobody is an
+# admin when empty.
+ADMIN_EMAILS = {
+    email.strip().lower()
+    for email in os.getenv("ADMIN_EMAILS", "").split(",")
+    if email.strip()
+}
+
+# Authenticated user cache configuration
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", 10000))
 
 # Security scheme
 security = HTTPBearer()
 
 
+class PrincipalCache:
+    """
+    Size-bounded LRU cache of authenticated users with a time-to-live, keyed by
+    the token subject (email). Each worker process holds its own cache, so the
+    TTL bounds how long another worker can serve a user that was changed.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+
+    def get(self, subject: str) -> Optional[User]:
+        entry = self._entries.get(subject)
+
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(subject, None)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, subject: str, user: User):
+        if self.max_size <= 0:
+            return
+
+        self._entries[subject] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(subject)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, subject: str):
+        self._entries.pop(subject, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_MAX_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def _detached_principal(user: User) -> User:
+    """
+    Copy of the user that is not bound to any session and is safe to share
+    between requests. The password hash is deliberately left out.
+    """
+    principal = User(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        created_at=user.created_at,
+    )
+    make_transient_to_detached(principal)
+    return principal
+
+
+def invalidate_cached_user(*emails: str):
+    """
+    Drop cached principals, to be called whenever a user is changed or deleted
+    """
+    for email in emails:
+        if email:
+            principal_cache.invalidate(email)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
     Create JWT access token
@@ -40,19 +135,21 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[str]:
+def verify_token(token: str) -> Optional[Tuple[str, str, Optional[int]]]:
     """
-    Verify JWT token and return username
+    Verify JWT token and return email, username and user id (None for tokens
+    issued without it)
     """
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         username: str = payload.get("username")
+        user_id: Optional[int] = payload.get("uid")
 
         if email is None or username is None:
             return None
 
-        return email, username
+        return email, username, user_id
 
     except JWTError:
         return None
@@ -66,12 +163,29 @@ async def verify_token_user(token: str, db: AsyncSession = Depends(get_db)):
     if not token_data:
         return None
 
-    email, username = token_data
+    email, username, user_id = token_data
+
+    user = principal_cache.get(email)
+    if user is not None:
+        if user.username == username and user_id in (None, user.id):
+            return user
+
+        return None
+
+    if user_id is not None:
+        user = await db.get(User, user_id)
+        if user is None or user.email != email or user.username != username:
+            return None
+
+    else:
+        result = await db.execute(
+            select(User).where((User.username == username) & (User.email == email))
+        )
+        user = result.scalar_one_or_none()
+
+    if user is not None:
+        principal_cache.set(email, _detached_principal(user))
 
-    result = await db.execute(
-        select(User).where((User.username == username) & (User.email == email))
-    )
-    user = result.scalar_one_or_none()
     return user
 
 
@@ -100,11 +214,12 @@ async def get_current_admin_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
     """
-    Dependency to get current authenticated admin user
-    (You can extend this later with role-based access)
+    Dependency to get current authenticated admin user, one whose email is in
+    ADMIN_EMAILS. Other users get 403.
     """
-    # For now, just return current user
-    # Later you can add admin role checking:
-    # if not current_user.is_admin:
-    #     raise HTTPException(status_code=403, detail="Not enough permissions")
+    if current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
+        )
+
     return current_user
@@ -0,0 +1,142 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import insert_on_conflict
+from ..models import FinancialStatement
+from ..models.financial import METRIC_COLUMNS
+from ..schemas import FinancialColumns, FinancialMetrics
+from .sync import next_change_seq
+
+
+async def upsert_financial_statements(
+    db: AsyncSession,
+    user_id: int,
+    stock_id: int,
+    data: Dict[str, FinancialMetrics],
+) -> int:
+    """
+    Write financial statements of a stock in bulk.
+
+    One row per period is sent in a single INSERT ... ON CONFLICT DO UPDATE on
+    the (user_id, stock_id, year) unique index. Metrics missing from the payload
+    keep their stored value. The rows are stamped with the user's next change
+    sequence value for GET /sync, bump the resource versions before.
+
+    Args:
+        db: Database session, the caller is responsible for committing
+        user_id: Owner of the statements
+        stock_id: Stock the statements belong to
+        data: Financial metrics keyed by date (YYYY-MM-DD)
+
+    Returns:
+        Number of inserted or updated rows
+    """
+    if not data:
+        return 0
+
+    change_seq = await next_change_seq(db, user_id)
+    rows = [
+        {
+            "stock_id": stock_id,
+            "user_id": user_id,
+            "year": datetime.strptime(date_str, "%Y-%m-%d").date(),
+            "change_seq": change_seq,
+            **metrics.model_dump(include=set(METRIC_COLUMNS)),
+        }
+        for date_str, metrics in data.items()
+    ]
+
+    stmt = insert_on_conflict(FinancialStatement).values(rows)
+    table = FinancialStatement.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            FinancialStatement.user_id,
+            FinancialStatement.stock_id,
+            FinancialStatement.year,
+        ],
+        set_={
+            **{
+                column: func.coalesce(stmt.excluded[column], table.c[column])
+                for column in METRIC_COLUMNS
+            },
+            "updated_at": func.now(),
+            "change_seq": stmt.excluded.change_seq,
+        },
+    )
+    result = await db.execute(stmt)
+
+    return result.rowcount
+
+
+async def get_financial_statements(
+    db: AsyncSession, user_id: int, stock_id: int
+) -> Dict[str, FinancialMetrics]:
+    """
+    Read financial statements of a stock, keyed by date (YYYY-MM-DD) in
+    chronological order
+    """
+    result = await db.execute(
+        select(FinancialStatement)
+        .where(
+            FinancialStatement.user_id == user_id,
+            FinancialStatement.stock_id == stock_id,
+        )
+        .order_by(FinancialStatement.year)
+    )
+
+    return _statements_from_rows(result.scalars())
+
+
+def _statements_from_rows(statements) -> Dict[str, FinancialMetrics]:
+    """FinancialMetrics keyed by date of FinancialStatement rows in period order"""
+    return {
+        statement.year.strftime("%Y-%m-%d"): FinancialMetrics(
+            **{column: getattr(statement, column) for column in METRIC_COLUMNS}
+        )
+        for statement in statements
+    }
+
+
+async def get_financial_columns(
+    db: AsyncSession, user_id: int, stock_id: int
+) -> Optional[FinancialColumns]:
+    """
+    Read financial statements of a stock in columnar form: the metrics with at
+    least one value, the periods in chronological order and a values matrix
+    with one row per period. Built straight from the result rows, without a
+    model per period. None when the stock has no statements.
+    """
+    table = FinancialStatement.__table__
+    result = await db.execute(
+        select(table.c.year, *(table.c[column] for column in METRIC_COLUMNS))
+        .where(table.c.user_id == user_id, table.c.stock_id == stock_id)
+        .order_by(table.c.year)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+
+    return _columns_from_rows(stock_id, rows)
+
+
+def _columns_from_rows(stock_id: int, rows) -> FinancialColumns:
+    """FinancialColumns of (year, *METRIC_COLUMNS) rows in period order"""
+    # Drop metrics without any value, e.g. ones a company does not report
+    indexes = [
+        i
+        for i in range(1, len(METRIC_COLUMNS) + 1)
+        if any(row[i] is not None for row in rows)
+    ]
+    values: List[List[Optional[float]]] = [
+        [None if row[i] is None else float(row[i]) for i in indexes] for row in rows
+    ]
+
+    return FinancialColumns.model_construct(
+        stock_id=stock_id,
+        fields=[METRIC_COLUMNS[i - 1] for i in indexes],
+        periods=[row[0].strftime("%Y-%m-%d") for row in rows],
+        values=values,
+    )
@@ -0,0 +1,219 @@
+import math
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Default token budget of the financial data sent with a prompt
+AI_FINANCIAL_CONTEXT_TOKENS = int(os.getenv("AI_FINANCIAL_CONTEXT_TOKENS", 1500))
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough local estimate of the tokens of a text, without a tokenizer.
+    Words and punctuation count as at least one token and long words as one
+    token per 4 characters, which slightly overestimates numbers and English.
+    """
+    return sum(
+        max(1, math.ceil(len(token) / 4)) for token in _TOKEN_PATTERN.findall(text)
+    )
+
+
+def _ratio(numerator: Optional[float], denominator: Optional[float]):
+    if numerator is None or not denominator:
+        return None
+    return numerator / denominator
+
+
+def _total(metrics: dict, *fields: str) -> Optional[float]:
+    values = [metrics[field] for field in fields if metrics.get(field) is not None]
+    return sum(values) if values else None
+
+
+def _equity(m: dict) -> Optional[float]:
+    return _total(m, "share_capital", "retained_earnings", "reserves")
+
+
+def _current_assets(m: dict) -> Optional[float]:
+    return _total(
+        m,
+        "cash",
+        "inventories",
+        "receivables",
+        "investments_in_securities",
+        "other_current_assets",
+    )
+
+
+def _current_liabilities(m: dict) -> Optional[float]:
+    return _total(
+        m,
+        "borrowings",
+        "payables",
+        "lease_liabilities",
+        "tax_liabilities",
+        "other_current_liabilities",
+    )
+
+
+def _debt(m: dict) -> Optional[float]:
+    return _total(
+        m,
+        "borrowings",
+        "lease_liabilities",
+        "long_term_debts",
+        "long_term_lease_liabilities",
+    )
+
+
+def _free_cash_flow(m: dict) -> Optional[float]:
+    if m.get("net_cash_from_operating_activities") is None:
+        return None
+    return m["net_cash_from_operating_activities"] - (m.get("investments_in_ppe") or 0)
+
+
+def _growth(previous: dict, current: dict, field: str) -> Optional[float]:
+    if current.get(field) is None or not previous.get(field):
+        return None
+    return (current[field] - previous[field]) / abs(previous[field])
+
+
+# Ratios computed per period, as percentages where the name ends with "%"
+RATIOS = {
+    "gross_margin_%": lambda m: _ratio(m.get("gross_profit"), m.get("revenue")),
+    "net_margin_%": lambda m: _ratio(m.get("profit_after_tax"), m.get("revenue")),
+    "roe_%": lambda m: _ratio(
+        m.get("profit_after_tax_for_shareholders") or m.get("profit_after_tax"),
+        _equity(m),
+    ),
+    "debt_to_equity": lambda m: _ratio(_debt(m), _equity(m)),
+    "current_ratio": lambda m: _ratio(_current_assets(m), _current_liabilities(m)),
+    "pe": lambda m: _ratio(
+        m.get("share_price_at_report_date"), m.get("earnings_per_share")
+    ),
+    "dividend_yield_%": lambda m: _ratio(
+        m.get("dividend_per_share"), m.get("share_price_at_report_date")
+    ),
+    "free_cash_flow": _free_cash_flow,
+}
+
+# Year over year growth of these metrics, as percentages
+GROWTH_RATIOS = {
+    "revenue_growth_%": "revenue",
+    "eps_growth_%": "earnings_per_share",
+}
+
+
+def _format_value(value: Optional[float], percent: bool = False) -> str:
+    """Short number for the table, e.g. 1234567 -> 1.23M"""
+    if value is None:
+        return "-"
+    if percent:
+        return f"{value * 100:.1f}"
+
+    for divisor, suffix in ((1e12, "T"), (1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(value) >= divisor:
+            return f"{value / divisor:.3g}{suffix}"
+
+    return f"{value:.3g}"
+
+
+def _period_labels(periods: List[str]) -> List[str]:
+    """Years as column labels, full dates when a year has several periods"""
+    years = [period[:4] for period in periods]
+    return years if len(set(years)) == len(years) else periods
+
+
+def _financial_table(
+    financial_data: Dict[str, Dict[str, float]],
+    periods: List[str],
+    fields: Iterable[str],
+    ratios: Iterable[str],
+) -> str:
+    rows = [["metric", *_period_labels(periods)]]
+
+    for field in fields:
+        values = [financial_data[period].get(field) for period in periods]
+        if any(value is not None for value in values):
+            rows.append([field, *(_format_value(value) for value in values)])
+
+    for name in ratios:
+        percent = name.endswith("%")
+        if name in GROWTH_RATIOS:
+            field = GROWTH_RATIOS[name]
+            values = [None] + [
+                _growth(financial_data[previous], financial_data[period], field)
+                for previous, period in zip(periods, periods[1:])
+            ]
+        else:
+            values = [RATIOS[name](financial_data[period]) for period in periods]
+
+        if any(value is not None for value in values):
+            rows.append([name, *(_format_value(value, percent) for value in values)])
+
+    if len(rows) == 1:
+        return ""
+
+    return "\n".join("|".join(row) for row in rows)
+
+
+def build_financial_context(
+    financial_data: Dict[str, Dict[str, float]],
+    fields: Optional[Iterable[str]] = None,
+    ratios: Optional[Iterable[str]] = None,
+    max_years: Optional[int] = None,
+    token_budget: int = AI_FINANCIAL_CONTEXT_TOKENS,
+) -> str:
+    """
+    Compact tabular encoding of financial data for AI prompts.
+
+    Periods are columns, metrics and precomputed ratios are rows, values are
+    shortened to 3 significant digits (e.g. 1.23M). The oldest periods are
+    dropped until the table fits the token budget, keeping at least one.
+
+    Args:
+        financial_data: Non-null metrics keyed by date (YYYY-MM-DD)
+        fields: Metrics to include, all metrics present when None
+        ratios: Names from RATIOS and GROWTH_RATIOS to include, all when None
+        max_years: Only keep this many most recent periods
+        token_budget: Max estimated tokens of the table, see estimate_tokens
+
+    Returns:
+        The table, one "|" separated line per row
+    """
+    periods = sorted(financial_data)
+    if max_years:
+        periods = periods[-max_years:]
+
+    if fields is None:
+        fields = dict.fromkeys(
+            field for period in periods for field in financial_data[period]
+        )
+    if ratios is None:
+        ratios = [*RATIOS, *GROWTH_RATIOS]
+
+    fields = list(fields)
+    ratios = list(ratios)
+
+    table = _financial_table(financial_data, periods, fields, ratios)
+    while len(periods) > 1 and estimate_tokens(table) > token_budget:
+        periods = periods[1:]
+        table = _financial_table(financial_data, periods, fields, ratios)
+
+    return table
+
+
+def trim_to_token_budget(texts: Iterable[str], token_budget: int) -> List[str]:
+    """
+    Keep texts in order while they fit the token budget together
+    """
+    kept = []
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if tokens > token_budget:
+            break
+        token_budget -= tokens
+        kept.append(text)
+
+    return kept
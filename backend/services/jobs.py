@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import async_session
+from ..models import AiJob
+
+# Number of AI jobs executed concurrently by this worker process
+AI_JOB_WORKERS = int(os.getenv("AI_JOB_WORKERS", 4))
+# A running job not finished after this long is considered orphaned and re-queued
+AI_JOB_LEASE_MINUTES = int(os.getenv("AI_JOB_LEASE_MINUTES", 10))
+# How often the database is checked for orphaned and unclaimed jobs
+AI_JOB_SWEEP_SECONDS = int(os.getenv("AI_JOB_SWEEP_SECONDS", 60))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+JobHandler = Callable[[AiJob], Awaitable[str]]
+
+_handlers: Dict[str, JobHandler] = {}
+_queue: Optional[asyncio.Queue] = None
+_tasks: List[asyncio.Task] = []
+# Ids in the queue or being run by this worker, never queued twice
+_pending: Set[int] = set()
+
+
+def register_job_handler(kind: str):
+    """
+    Decorator registering the coroutine that executes jobs of a kind.
+    The handler gets the job and returns its result text.
+    """
+
+    def decorator(handler: JobHandler) -> JobHandler:
+        _handlers[kind] = handler
+        return handler
+
+    return decorator
+
+
+async def submit_job(
+    db: AsyncSession,
+    user_id: int,
+    stock_id: int,
+    kind: str,
+    prompt: Optional[str] = None,
+    payload: Optional[str] = None,
+) -> AiJob:
+    """
+    Persist a new job and queue it for the worker pool
+    """
+    if kind not in _handlers:
+        raise ValueError(f"No handler registered for job kind: {kind}")
+
+    job = AiJob(
+        user_id=user_id,
+        stock_id=stock_id,
+        kind=kind,
+        prompt=prompt,
+        payload=payload,
+        status=JOB_QUEUED,
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    if _queue is not None:
+        _enqueue(job.id)
+
+    return job
+
+
+def _enqueue(job_id: int) -> bool:
+    if job_id in _pending:
+        return False
+    _pending.add(job_id)
+    _queue.put_nowait(job_id)
+    return True
+
+
+async def _set_job_state(job_id: int, **values):
+    async with async_session() as db:
+        await db.execute(update(AiJob).where(AiJob.id == job_id).values(**values))
+        await db.commit()
+
+
+async def _run_job(job_id: int):
+    """
+    Claim a queued job and execute it, recording the outcome
+    """
+    async with async_session() as db:
+        # Conditional update so a job is only ever claimed by one worker
+        claim = await db.execute(
+            update(AiJob)
+            .where(AiJob.id == job_id, AiJob.status == JOB_QUEUED)
+            .values(status=JOB_RUNNING, started_at=datetime.now(timezone.utc))
+        )
+        await db.commit()
+
+        if claim.rowcount != 1:
+            return
+
+        job = await db.get(AiJob, job_id)
+
+    logging.info(f"Running AI job {job_id} ({job.kind})")
+
+    try:
+        result = await _handlers[job.kind](job)
+
+    except asyncio.CancelledError:
+        # Shutting down, hand the job to the next start
+        await asyncio.shield(
+            _set_job_state(job_id, status=JOB_QUEUED, started_at=None)
+        )
+        raise
+
+    except HTTPException as e:
+        await _set_job_state(
+            job_id,
+            status=JOB_FAILED,
+            error=str(e.detail)[:500],
+            finished_at=datetime.now(timezone.utc),
+        )
+        return
+
+    except Exception as e:
+        logging.exception(f"AI job {job_id} failed")
+        await _set_job_state(
+            job_id,
+            status=JOB_FAILED,
+            error=str(e)[:500],
+            finished_at=datetime.now(timezone.utc),
+        )
+        return
+
+    await _set_job_state(
+        job_id,
+        status=JOB_DONE,
+        result=result,
+        finished_at=datetime.now(timezone.utc),
+    )
+    logging.info(f"AI job {job_id} done")
+
+
+async def _worker():
+    while True:
+        job_id = await _queue.get()
+        try:
+            await _run_job(job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logging.exception(f"AI job worker failed on job {job_id}")
+        finally:
+            _pending.discard(job_id)
+            _queue.task_done()
+
+
+async def _requeue_unfinished_jobs(min_age: timedelta):
+    """
+    Put orphaned running jobs back to queued and queue every job that is
+    waiting for longer than min_age, e.g. after a restart or a worker crash.
+    Jobs already queued by this worker are skipped.
+    """
+    now = datetime.now(timezone.utc)
+
+    async with async_session() as db:
+        await db.execute(
+            update(AiJob)
+            .where(
+                AiJob.status == JOB_RUNNING,
+                AiJob.started_at < now - timedelta(minutes=AI_JOB_LEASE_MINUTES),
+            )
+            .values(status=JOB_QUEUED, started_at=None)
+        )
+        await db.commit()
+
+        result = await db.execute(
+            select(AiJob.id)
+            .where(AiJob.status == JOB_QUEUED, AiJob.created_at <= now - min_age)
+            .order_by(AiJob.created_at)
+        )
+        job_ids = result.scalars().all()
+
+    requeued = sum(_enqueue(job_id) for job_id in job_ids)
+
+    if requeued:
+        logging.info(f"Re-queued {requeued} unfinished AI jobs")
+
+
+async def _sweeper():
+    while True:
+        await asyncio.sleep(AI_JOB_SWEEP_SECONDS)
+        try:
+            await _requeue_unfinished_jobs(timedelta(seconds=AI_JOB_SWEEP_SECONDS))
+        except Exception:
+            logging.exception("AI job sweep failed")
+
+
+async def start_job_workers():
+    """
+    Start the worker pool and pick up jobs left unfinished by a previous run
+    """
+    global _queue
+    _queue = asyncio.Queue()
+    _pending.clear()
+
+    await _requeue_unfinished_jobs(timedelta(0))
+
+    _tasks.extend(asyncio.create_task(_worker()) for _ in range(AI_JOB_WORKERS))
+    _tasks.append(asyncio.create_task(_sweeper()))
+    logging.info(f"[SUCCESS] Started {AI_JOB_WORKERS} AI job workers")
+
+
+async def stop_job_workers():
+    """
+    Cancel the worker pool, running jobs go back to queued
+    """
+    for task in _tasks:
+        task.cancel()
+
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+
+
+def job_queue_stats() -> dict:
+    """
+    Counters of the AI job worker pool
+    """
+    return {
+        "workers": AI_JOB_WORKERS,
+        "queued": _queue.qsize() if _queue is not None else 0,
+    }
@@ -1,28 +1,254 @@
+import asyncio
+import hashlib
+import json
 import logging
+import math
 import os
+import random
 import time
-from typing import Any
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, NamedTuple, Optional
 
+import httpx
 import openai
+from fastapi import HTTPException, Request
+
+from .usage import ai_user_slot, record_ai_usage
+
+# Default deadline of a single OpenAI call, web search completions can take a minute
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", 120))
+# Size of the HTTP connection pool shared by all async OpenAI calls
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 20))
+# How often an in-flight AI call checks whether the HTTP client went away
+DISCONNECT_POLL_SECONDS = 1.0
+
+# Overall deadline of an async call per purpose, retries and hedges included
+OPENAI_DEADLINES = {
+    "company description": float(
+        os.getenv("OPENAI_DESCRIPTION_DEADLINE_SECONDS", OPENAI_TIMEOUT_SECONDS)
+    ),
+    "company financial query": float(
+        os.getenv("OPENAI_PROMPT_DEADLINE_SECONDS", OPENAI_TIMEOUT_SECONDS)
+    ),
+}
+# Attempts of an async call failing with a rate limit, 5xx, timeout or
+# connection error, spaced by jittered exponential backoff or Retry-After
+OPENAI_MAX_ATTEMPTS = int(os.getenv("OPENAI_MAX_ATTEMPTS", 3))
+OPENAI_BACKOFF_BASE_SECONDS = float(os.getenv("OPENAI_BACKOFF_BASE_SECONDS", 1))
+OPENAI_BACKOFF_MAX_SECONDS = float(os.getenv("OPENAI_BACKOFF_MAX_SECONDS", 20))
+# Start a second identical call once the first is slower than the p95 latency of
+# its purpose. Trades extra tokens for tail latency, so off by default.
+OPENAI_HEDGE = os.getenv("OPENAI_HEDGE", "false").lower() == "true"
+OPENAI_HEDGE_MIN_SAMPLES = 20
+# Consecutive failed calls opening the circuit, and how long it stays open
+OPENAI_BREAKER_FAILURES = int(os.getenv("OPENAI_BREAKER_FAILURES", 5))
+OPENAI_BREAKER_RESET_SECONDS = float(os.getenv("OPENAI_BREAKER_RESET_SECONDS", 30))
+
+# Errors worth retrying, the provider may answer the same request later
+_TRANSIENT_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APIConnectionError,  # includes openai.APITimeoutError
+    asyncio.TimeoutError,
+)
 
 _openai_client = None
+_async_openai_client = None
 
 
-def _get_openai_client():
-    global _openai_client
-    if _openai_client is None:
-        _openai_client = openai.OpenAI()
+class AiAnswer(NamedTuple):
+    """Result of an async AI query"""
+
+    ok: bool
+    text: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    model: Optional[str] = None
+    # Shared answer cache entry the text came from or was stored in
+    cache_entry_id: Optional[int] = None
+
+
+class LatencyTracker:
+    """
+    Latencies of the recent successful calls, for percentiles
+    """
+
+    def __init__(self, size: int = 500):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def stats(self) -> dict:
+        return {
+            "count": len(self.samples),
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": max(self.samples, default=None),
+        }
+
+
+class CircuitBreaker:
+    """
+    Opens after consecutive transient failures so calls fail fast while the
+    provider is degraded. Once reset_seconds passed, a single trial call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_running:
+            self.trial_running = True
+            return True
+
+        self.rejected += 1
+        return False
+
+    def retry_after(self) -> int:
+        if self.opened_at is None:
+            return 0
+        remaining = self.reset_seconds - (time.monotonic() - self.opened_at)
+        return max(1, math.ceil(remaining))
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_running = False
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            if self.opened_at is None:
+                logging.warning("OpenAI circuit breaker opened")
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """The call ended without telling anything about the provider"""
+        self.trial_running = False
 
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+
+_breaker = CircuitBreaker(OPENAI_BREAKER_FAILURES, OPENAI_BREAKER_RESET_SECONDS)
+_latencies: Dict[str, LatencyTracker] = {}
+_stats = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "failures": 0}
+
+
+def _get_openai_api_key() -> str:
     openai_api_key = os.environ.get("OPENAI_API_KEY")
     if not openai_api_key:
         raise ValueError("OPENAI_API_KEY environment variable is not set.")
 
-    _openai_client.api_key = openai_api_key
+    return openai_api_key
+
+
+def _get_openai_client():
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = openai.OpenAI()
+
+    _openai_client.api_key = _get_openai_api_key()
     # openai.api_key = openai_api_key
 
     return _openai_client
 
 
+def _get_async_openai_client():
+    """
+    Shared async client, all calls reuse one pooled HTTP connection set
+    """
+    global _async_openai_client
+    if _async_openai_client is None:
+        _async_openai_client = openai.AsyncOpenAI(
+            api_key=_get_openai_api_key(),
+            timeout=OPENAI_TIMEOUT_SECONDS,
+            # Retries are done by _openai_response_async within the deadline
+            max_retries=0,
+            http_client=openai.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                ),
+            ),
+        )
+
+    return _async_openai_client
+
+
+def open_async_openai_client():
+    """
+    Create the shared async client on startup. Loading the TLS certificates and
+    the SDK's Responses resource blocks for a few hundred milliseconds, which
+    would otherwise stall the event loop during the first AI request.
+    """
+    if os.environ.get("OPENAI_API_KEY"):
+        client = _get_async_openai_client()
+        # Accessing the lazily imported resource loads it now
+        _ = client.responses
+
+
+async def close_async_openai_client():
+    """
+    Close the shared async client and its connection pool on shutdown
+    """
+    global _async_openai_client
+    if _async_openai_client is not None:
+        await _async_openai_client.close()
+        _async_openai_client = None
+
+
+def _log_openai_call(model: str, purpose: str, input: str, kwargs: dict):
+    logging.info(
+        f"Calling OpenAI model: {model}, "
+        f"Purpose: {purpose}, "
+        f"Input: {input} "
+        f"with params: {kwargs}"
+    )
+
+
+def _log_openai_usage(response: Any, purpose: str, elapsed: float):
+    logging.info(
+        f"OpenAI call status: {response.status}. "
+        f"Purpose: {purpose}, Tokens used: "
+        f"input_tokens: {response.usage.input_tokens}, "
+        f"output_tokens: {response.usage.output_tokens}, "
+        f"total_tokens: {response.usage.total_tokens}, "
+        f"elapsed={elapsed:.3f}s"
+    )
+
+
 def _openai_response(
     instructions: str,
     input: str,
@@ -33,12 +259,7 @@ def _openai_response(
     """
     Helper to call OpenAI ChatCompletion with standard parameters and extra kwargs.
     """
-    logging.info(
-        f"Calling OpenAI model: {model}, "
-        f"Purpose: {purpose}, "
-        f"Input: {input} "
-        f"with params: {kwargs}"
-    )
+    _log_openai_call(model, purpose, input, kwargs)
     client = _get_openai_client()
 
     try:
@@ -50,14 +271,7 @@ def _openai_response(
             **kwargs,
         )
         elapsed = time.perf_counter() - start_ts
-        logging.info(
-            f"OpenAI call status: {response.status}. "
-            f"Purpose: {purpose}, Tokens used: "
-            f"input_tokens: {response.usage.input_tokens}, "
-            f"output_tokens: {response.usage.output_tokens}, "
-            f"total_tokens: {response.usage.total_tokens}, "
-            f"elapsed={elapsed:.3f}s"
-        )
+        _log_openai_usage(response, purpose, elapsed)
 
     except Exception as e:
         msg = f"OpenAI request failed: {e}"
@@ -67,16 +281,401 @@ def _openai_response(
     return response
 
 
-def query_company_description(
-    company_name: str, 
-    exchange: str, 
-    country: str
+def _deadline(purpose: str, timeout: Optional[float]) -> float:
+    if timeout is None:
+        timeout = OPENAI_DEADLINES.get(purpose, OPENAI_TIMEOUT_SECONDS)
+    return time.monotonic() + timeout
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Delay requested by the provider in the Retry-After headers of an error
+    """
+    if not isinstance(error, openai.APIStatusError):
+        return None
+
+    headers = error.response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        pass
+
+    return None
+
+
+def _backoff_seconds(attempt: int, error: Exception) -> float:
+    """
+    Retry-After when the provider sent one, else exponential backoff with
+    full jitter so retrying callers do not hit the provider in lockstep
+    """
+    retry_after = _retry_after_seconds(error)
+    if retry_after is not None:
+        return max(0.0, retry_after)
+
+    ceiling = OPENAI_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1)
+    return random.uniform(0, min(OPENAI_BACKOFF_MAX_SECONDS, ceiling))
+
+
+def _provider_unavailable(error: Optional[Exception] = None) -> HTTPException:
+    if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError)):
+        return HTTPException(status_code=504, detail="AI provider timed out")
+
+    retry_after = _retry_after_seconds(error) if error else _breaker.retry_after()
+    # Whole seconds, rounded up so clients never retry before the provider allows
+    headers = (
+        {"Retry-After": str(math.ceil(retry_after))}
+        if retry_after and retry_after > 0
+        else None
+    )
+    return HTTPException(
+        status_code=503,
+        detail="AI provider is unavailable, try again later",
+        headers=headers,
+    )
+
+
+async def _openai_attempt(
+    purpose: str,
+    timeout: float,
+    request: dict,
+    user_id: Optional[int] = None,
+    stock_id: Optional[int] = None,
 ) -> Any:
     """
-    Get AI description about company.
+    One call through the circuit breaker, recording its latency and usage
+    """
+    if not _breaker.allow():
+        raise _provider_unavailable()
+
+    client = _get_async_openai_client()
+    _stats["calls"] += 1
+
+    try:
+        start_ts = time.perf_counter()
+        response = await asyncio.wait_for(
+            client.responses.parse(timeout=timeout, **request), timeout
+        )
+        elapsed = time.perf_counter() - start_ts
+
+    except _TRANSIENT_ERRORS:
+        _breaker.record_failure()
+        await record_ai_usage(
+            user_id,
+            stock_id,
+            purpose,
+            request["model"],
+            ok=False,
+            latency=time.perf_counter() - start_ts,
+        )
+        raise
+
+    except BaseException:
+        _breaker.release()
+        raise
+
+    _breaker.record_success()
+    _latencies.setdefault(purpose, LatencyTracker()).add(elapsed)
+    _log_openai_usage(response, purpose, elapsed)
+    await _record_response_usage(response, purpose, elapsed, user_id, stock_id)
+
+    return response
+
+
+async def _record_response_usage(
+    response: Any,
+    purpose: str,
+    elapsed: float,
+    user_id: Optional[int],
+    stock_id: Optional[int],
+):
+    await record_ai_usage(
+        user_id,
+        stock_id,
+        purpose,
+        response.model,
+        ok=True,
+        latency=elapsed,
+        input_tokens=response.usage.input_tokens,
+        output_tokens=response.usage.output_tokens,
+    )
+
+
+async def _hedged_openai_attempt(
+    purpose: str, timeout: float, request: dict, **owner
+) -> Any:
+    """
+    Call once, and with OPENAI_HEDGE once more when the first call is slower
+    than the p95 latency of its purpose. The first successful call wins.
+    """
+    latencies = _latencies.get(purpose)
+    hedge_after = None
+    if OPENAI_HEDGE and latencies:
+        if len(latencies.samples) >= OPENAI_HEDGE_MIN_SAMPLES:
+            hedge_after = latencies.percentile(0.95)
+
+    if hedge_after is None or hedge_after >= timeout:
+        return await _openai_attempt(purpose, timeout, request, **owner)
+
+    tasks = [
+        asyncio.ensure_future(_openai_attempt(purpose, timeout, request, **owner))
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done:
+            return tasks[0].result()
+
+        _stats["hedges"] += 1
+        logging.info(f"Hedging slow OpenAI call after {hedge_after:.1f}s")
+        tasks.append(
+            asyncio.ensure_future(
+                _openai_attempt(purpose, timeout - hedge_after, request, **owner)
+            )
+        )
+
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is tasks[1]:
+                        _stats["hedge_wins"] += 1
+                    return task.result()
+
+        # Both failed, report the error of the original call
+        return tasks[0].result()
+
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def _openai_response_async(
+    instructions: str,
+    input: str,
+    model: str,
+    purpose: str = "general",
+    timeout: Optional[float] = None,
+    user_id: Optional[int] = None,
+    stock_id: Optional[int] = None,
+    **kwargs,
+) -> Any:
+    """
+    Async version of _openai_response with retries, hedging and a circuit
+    breaker, all within one deadline (OPENAI_DEADLINES of the purpose unless
+    timeout is given). Cancelling the awaiting task aborts the HTTP request.
+    The call counts against the per-user limits and is recorded in the usage
+    ledger under user_id and stock_id.
+
+    Raises:
+        HTTPException: 429 when the user is over a limit, 503 while the
+            provider keeps failing or the circuit is open, 504 when the
+            deadline passed
+        RuntimeError: The request itself failed, e.g. invalid parameters
+    """
+    async with ai_user_slot(user_id):
+        return await _openai_response_with_retries(
+            instructions,
+            input,
+            model,
+            purpose,
+            timeout,
+            user_id=user_id,
+            stock_id=stock_id,
+            **kwargs,
+        )
+
+
+async def _openai_response_with_retries(
+    instructions: str,
+    input: str,
+    model: str,
+    purpose: str,
+    timeout: Optional[float],
+    user_id: Optional[int],
+    stock_id: Optional[int],
+    **kwargs,
+) -> Any:
+    _log_openai_call(model, purpose, input, kwargs)
+    request = dict(model=model, instructions=instructions, input=input, **kwargs)
+    deadline = _deadline(purpose, timeout)
+
+    for attempt in range(1, OPENAI_MAX_ATTEMPTS + 1):
+        try:
+            return await _hedged_openai_attempt(
+                purpose,
+                deadline - time.monotonic(),
+                request,
+                user_id=user_id,
+                stock_id=stock_id,
+            )
+
+        except asyncio.CancelledError:
+            logging.info(f"OpenAI call cancelled. Purpose: {purpose}")
+            raise
+
+        except HTTPException:
+            _stats["failures"] += 1
+            raise
+
+        except _TRANSIENT_ERRORS as e:
+            delay = _backoff_seconds(attempt, e)
+            if (
+                attempt == OPENAI_MAX_ATTEMPTS
+                or time.monotonic() + delay >= deadline
+            ):
+                _stats["failures"] += 1
+                logging.error(
+                    f"OpenAI request failed after {attempt} attempts: {e!r}. "
+                    f"Purpose: {purpose}"
+                )
+                raise _provider_unavailable(e)
+
+            _stats["retries"] += 1
+            logging.warning(
+                f"OpenAI request failed: {e!r}, retry {attempt} in {delay:.1f}s. "
+                f"Purpose: {purpose}"
+            )
+            await asyncio.sleep(delay)
+
+        except Exception as e:
+            _stats["failures"] += 1
+            msg = f"OpenAI request failed: {e}"
+            logging.exception(msg)
+            raise RuntimeError(msg)
+
+
+async def _openai_stream(
+    instructions: str,
+    input: str,
+    model: str,
+    purpose: str = "general",
+    timeout: Optional[float] = None,
+    user_id: Optional[int] = None,
+    stock_id: Optional[int] = None,
+    **kwargs,
+) -> AsyncIterator[str]:
+    """
+    Streaming version of _openai_response_async, yields the output text deltas
+    as the model produces them. Closing the iterator aborts the HTTP request.
+    Streams go through the circuit breaker but are not retried, deltas may
+    already be on their way to the client.
+    """
+    _log_openai_call(model, purpose, input, kwargs)
+    if timeout is None:
+        timeout = OPENAI_DEADLINES.get(purpose, OPENAI_TIMEOUT_SECONDS)
+
+    async with ai_user_slot(user_id):
+        if not _breaker.allow():
+            raise _provider_unavailable()
+
+        client = _get_async_openai_client()
+        _stats["calls"] += 1
+
+        try:
+            start_ts = time.perf_counter()
+            async with client.responses.stream(
+                model=model,
+                instructions=instructions,
+                input=input,
+                timeout=timeout,
+                **kwargs,
+            ) as stream:
+                async for event in stream:
+                    if event.type == "response.output_text.delta":
+                        yield event.delta
+
+                response = await stream.get_final_response()
+
+            elapsed = time.perf_counter() - start_ts
+            _breaker.record_success()
+            _log_openai_usage(response, purpose, elapsed)
+
+        except (asyncio.CancelledError, GeneratorExit):
+            _breaker.release()
+            logging.info(f"OpenAI stream closed early. Purpose: {purpose}")
+            raise
+
+        except _TRANSIENT_ERRORS as e:
+            _breaker.record_failure()
+            _stats["failures"] += 1
+            logging.error(f"OpenAI stream failed: {e!r}. Purpose: {purpose}")
+            await record_ai_usage(
+                user_id,
+                stock_id,
+                purpose,
+                model,
+                ok=False,
+                latency=time.perf_counter() - start_ts,
+            )
+            raise _provider_unavailable(e)
+
+        except Exception as e:
+            _breaker.release()
+            _stats["failures"] += 1
+            msg = f"OpenAI request failed: {e}"
+            logging.exception(msg)
+            raise RuntimeError(msg)
+
+        await _record_response_usage(response, purpose, elapsed, user_id, stock_id)
+
+
+def _answer_from_response(response: Any) -> AiAnswer:
+    output = response.output_text
+
+    if output is None:
+        msg = "No valid output from AI"
+        logging.error(msg)
+        return AiAnswer(False, msg)
+
+    return AiAnswer(
+        True,
+        output,
+        input_tokens=response.usage.input_tokens,
+        output_tokens=response.usage.output_tokens,
+        model=response.model,
+    )
+
+
+async def cancel_on_disconnect(request: Request, awaitable) -> Any:
+    """
+    Await an AI call, cancelling it when the HTTP client disconnects meanwhile
+    so no completion is paid for that nobody will read.
+    """
+    task = asyncio.ensure_future(awaitable)
+
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+
+            if await request.is_disconnected():
+                logging.info("Client disconnected, cancelling AI call")
+                raise HTTPException(status_code=499, detail="Client closed request")
+
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def _company_description_request(
+    company_name: str, exchange: str, country: str
+) -> dict:
+    """
+    Parameters of the company description call
     """
     instructions = """
-        You are a knowledgeable and experienced financial analyst with huge expertise in investment analysis. 
+        You are a knowledgeable and experienced financial analyst with huge expertise in investment analysis.
         For the company name provided within the stock exchange or country, provide
         brief and concise description of what is the company about, its main business activities and operations.
         I do not need citations or references.
@@ -99,34 +698,20 @@ def query_company_description(
     purpose = "company description"
     tools = [{"type": "web_search"}]
 
-    try:
-        response = _openai_response(
-            instructions=instructions,
-            input=input,
-            model=model,
-            purpose=purpose,
-            # max_output_tokens=max_output_tokens,
-            # text_format=AnalysisCompany,
-            reasoning=reasoning,
-            text=text,
-            tools=tools,
-        )
-
-        output = response.output_text
-
-        if output is None:
-            msg = "No valid output from AI"
-            logging.error(msg)
-            return False, msg
-
-        return True, output
-
-    except Exception as e:
-        logging.exception("Analysis API call failed")
-        raise RuntimeError(f"OpenAI request failed: {e}")
+    return dict(
+        instructions=instructions,
+        input=input,
+        model=model,
+        purpose=purpose,
+        # max_output_tokens=max_output_tokens,
+        # text_format=AnalysisCompany,
+        reasoning=reasoning,
+        text=text,
+        tools=tools,
+    )
 
 
-def query_ai_prompt(
+def _ai_prompt_request(
     company_name: str,
     exchange: str,
     country: str,
@@ -134,9 +719,9 @@ def query_ai_prompt(
     add_instruction: str = "",
     data: Any = None,
     prev_queries: str = "",
-) -> Any:
+) -> dict:
     """
-    Get AI answers about some prompts/questions
+    Parameters of the prompt/question call
     """
     instructions = """
         You are a knowledgeable and experienced financial analyst.
@@ -149,7 +734,7 @@ def query_ai_prompt(
         Strictly provide the answer in three or four sentences with a character limit of 500.
         If the company is not found, respond with "Company not found".
         """
-    
+
     if add_instruction:
         instructions += "\n" + add_instruction
 
@@ -171,28 +756,217 @@ def query_ai_prompt(
     purpose = "company financial query"
     tools = [{"type": "web_search"}]
 
+    return dict(
+        instructions=instructions,
+        input=input,
+        model=model,
+        purpose=purpose,
+        # max_output_tokens=max_output_tokens,
+        # text_format=AnalysisCompany,
+        reasoning=reasoning,
+        text=text,
+        tools=tools,
+    )
+
+
+def _instruction_version(request: dict) -> str:
+    """
+    Short hash of everything shaping an answer apart from the company itself
+    """
+    shape = {key: value for key, value in request.items() if key != "input"}
+    encoded = json.dumps(shape, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def company_description_version() -> str:
+    """
+    Version of the company description instructions, for shared answer caching
+    """
+    return _instruction_version(_company_description_request("", "", ""))
+
+
+def ai_prompt_version(prompt: str, add_instruction: str = "") -> str:
+    """
+    Version of a prompt and its instructions, for shared answer caching
+    """
+    request = _ai_prompt_request("", "", "", prompt, add_instruction=add_instruction)
+    return _instruction_version({**request, "prompt": prompt})
+
+
+def query_company_description(
+    company_name: str,
+    exchange: str,
+    country: str
+) -> Any:
+    """
+    Get AI description about company.
+    """
     try:
         response = _openai_response(
-            instructions=instructions,
-            input=input,
-            model=model,
-            purpose=purpose,
-            # max_output_tokens=max_output_tokens,
-            # text_format=AnalysisCompany,
-            reasoning=reasoning,
-            text=text,
-            tools=tools,
+            **_company_description_request(company_name, exchange, country)
         )
+        answer = _answer_from_response(response)
+        return answer.ok, answer.text
 
-        output = response.output_text
+    except Exception as e:
+        logging.exception("Analysis API call failed")
+        raise RuntimeError(f"OpenAI request failed: {e}")
 
-        if output is None:
-            msg = "No valid output from AI"
-            logging.error(msg)
-            return False, msg
 
-        return True, output
+async def query_company_description_async(
+    company_name: str,
+    exchange: str,
+    country: str,
+    timeout: Optional[float] = None,
+    user_id: Optional[int] = None,
+    stock_id: Optional[int] = None,
+) -> AiAnswer:
+    """
+    Get AI description about company without blocking the event loop.
+    """
+    try:
+        response = await _openai_response_async(
+            timeout=timeout,
+            user_id=user_id,
+            stock_id=stock_id,
+            **_company_description_request(company_name, exchange, country),
+        )
+        return _answer_from_response(response)
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        logging.exception("Analysis API call failed")
+        raise RuntimeError(f"OpenAI request failed: {e}")
+
+
+def query_ai_prompt(
+    company_name: str,
+    exchange: str,
+    country: str,
+    prompt: str,
+    add_instruction: str = "",
+    data: Any = None,
+    prev_queries: str = "",
+) -> Any:
+    """
+    Get AI answers about some prompts/questions
+    """
+    try:
+        response = _openai_response(
+            **_ai_prompt_request(
+                company_name,
+                exchange,
+                country,
+                prompt,
+                add_instruction=add_instruction,
+                data=data,
+                prev_queries=prev_queries,
+            )
+        )
+        answer = _answer_from_response(response)
+        return answer.ok, answer.text
 
     except Exception as e:
         logging.exception("Analysis API call failed")
         raise RuntimeError(f"OpenAI request failed: {e}")
+
+
+async def query_ai_prompt_async(
+    company_name: str,
+    exchange: str,
+    country: str,
+    prompt: str,
+    add_instruction: str = "",
+    data: Any = None,
+    prev_queries: str = "",
+    timeout: Optional[float] = None,
+    user_id: Optional[int] = None,
+    stock_id: Optional[int] = None,
+) -> AiAnswer:
+    """
+    Get AI answers about some prompts/questions without blocking the event loop
+    """
+    try:
+        response = await _openai_response_async(
+            timeout=timeout,
+            user_id=user_id,
+            stock_id=stock_id,
+            **_ai_prompt_request(
+                company_name,
+                exchange,
+                country,
+                prompt,
+                add_instruction=add_instruction,
+                data=data,
+                prev_queries=prev_queries,
+            ),
+        )
+        return _answer_from_response(response)
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        logging.exception("Analysis API call failed")
+        raise RuntimeError(f"OpenAI request failed: {e}")
+
+
+def stream_company_description(
+    company_name: str,
+    exchange: str,
+    country: str,
+    user_id: Optional[int] = None,
+    stock_id: Optional[int] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream AI description about company as text deltas.
+    """
+    return _openai_stream(
+        user_id=user_id,
+        stock_id=stock_id,
+        **_company_description_request(company_name, exchange, country),
+    )
+
+
+def stream_ai_prompt(
+    company_name: str,
+    exchange: str,
+    country: str,
+    prompt: str,
+    add_instruction: str = "",
+    data: Any = None,
+    prev_queries: str = "",
+    user_id: Optional[int] = None,
+    stock_id: Optional[int] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream AI answers about some prompts/questions as text deltas
+    """
+    return _openai_stream(
+        user_id=user_id,
+        stock_id=stock_id,
+        **_ai_prompt_request(
+            company_name,
+            exchange,
+            country,
+            prompt,
+            add_instruction=add_instruction,
+            data=data,
+            prev_queries=prev_queries,
+        ),
+    )
+
+
+def openai_stats() -> dict:
+    """
+    Retry, hedging and circuit breaker counters, and latency percentiles in
+    seconds of the successful async calls per purpose
+    """
+    return {
+        **_stats,
+        "circuit_breaker": _breaker.stats(),
+        "hedging": OPENAI_HEDGE,
+        "latency": {purpose: t.stats() for purpose, t in _latencies.items()},
+    }
@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    Opaque cursor of the sort key of the last row on a page
+    """
+    encoded = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ]
+    )
+    return base64.urlsafe_b64encode(encoded.encode("utf-8")).decode("ascii")
+
+
+def _cursor_value(value: Any, column: Any) -> Any:
+    """
+    Value of a cursor converted back to the type of its column. Cursors come
+    from clients, a value of another type would fail in the database.
+    """
+    python_type = column.type.python_type
+    if python_type is datetime:
+        if not isinstance(value, str):
+            raise TypeError("Cursor value is not a datetime")
+        return datetime.fromisoformat(value)
+
+    if python_type in (float, Decimal):
+        python_type = (int, float)
+    if isinstance(value, bool) or not isinstance(value, python_type):
+        raise TypeError(f"Cursor value does not match the type of {column.key}")
+    return value
+
+
+def decode_cursor(cursor: str, columns: List[Any]) -> List[Any]:
+    """
+    Sort key values of a cursor, converted back to the types of their columns.
+    Raises a 400 error for a cursor not made by encode_cursor for these columns.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("Cursor does not match the sort order")
+
+        return [_cursor_value(value, column) for value, column in zip(values, columns)]
+
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+async def keyset_page(
+    db: AsyncSession,
+    stmt: Select,
+    sort_column: Any,
+    id_column: Any,
+    order: str = "asc",
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    include_total: bool = False,
+) -> Tuple[list, Optional[str], Optional[int]]:
+    """
+    Fetch one page of a filtered select of ORM rows with keyset pagination.
+
+    Rows are ordered by (sort_column, id_column), so the sort key is unique and
+    a page continues right after the cursor with an index range scan instead of
+    skipping OFFSET rows. sort_column must not be nullable.
+
+    Args:
+        db: Database session
+        stmt: Select of the entity, filters applied but no ordering or limit
+        sort_column: Column sorted by
+        id_column: Primary key, breaking ties of the sort column
+        order: "asc" or "desc"
+        cursor: next_cursor of the previous page, None for the first page
+        limit: Max rows of the page
+        include_total: Also count all rows matching the filters, which costs an
+            extra query over every match
+
+    Returns:
+        Rows of the page, cursor of the next page (None on the last page) and
+        the total when include_total is set
+    """
+    total = None
+    if include_total:
+        total = await db.scalar(
+            select(func.count()).select_from(stmt.order_by(None).subquery())
+        )
+
+    key = tuple_(sort_column, id_column)
+    if cursor:
+        after = tuple_(*decode_cursor(cursor, [sort_column, id_column]))
+        stmt = stmt.where(key < after if order == "desc" else key > after)
+
+    if order == "desc":
+        stmt = stmt.order_by(sort_column.desc(), id_column.desc())
+    else:
+        stmt = stmt.order_by(sort_column, id_column)
+
+    result = await db.execute(stmt.limit(limit + 1))
+    rows = result.scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            [getattr(last, sort_column.key), getattr(last, id_column.key)]
+        )
+
+    return rows, next_cursor, total
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+# Work factor of new hashes, stored hashes with another factor are upgraded on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Max bcrypt operations running at once, each one keeps a CPU core busy
+PASSWORD_HASH_CONCURRENCY = int(
+    os.getenv("PASSWORD_HASH_CONCURRENCY", min(4, os.cpu_count() or 1))
+)
+
+# bcrypt releases the GIL while hashing, so a thread pool keeps the event loop free
+_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_CONCURRENCY, thread_name_prefix="bcrypt"
+)
+_semaphore = asyncio.Semaphore(PASSWORD_HASH_CONCURRENCY)
+
+_stats = {
+    "queued": 0,
+    "running": 0,
+    "completed": 0,
+    "max_queue_depth": 0,
+    "total_wait_seconds": 0.0,
+    "total_run_seconds": 0.0,
+}
+
+
+async def _run_in_pool(func, *args):
+    """
+    Run a bcrypt call in the pool, waiting for a free slot first
+    """
+    _stats["queued"] += 1
+    _stats["max_queue_depth"] = max(_stats["max_queue_depth"], _stats["queued"])
+    queued_ts = time.perf_counter()
+
+    try:
+        await _semaphore.acquire()
+    finally:
+        _stats["queued"] -= 1
+
+    start_ts = time.perf_counter()
+    _stats["total_wait_seconds"] += start_ts - queued_ts
+    _stats["running"] += 1
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, func, *args)
+
+    finally:
+        _semaphore.release()
+        _stats["running"] -= 1
+        _stats["completed"] += 1
+        _stats["total_run_seconds"] += time.perf_counter() - start_ts
+
+
+def _hash_password(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
+    return hashed.decode("utf-8")
+
+
+def _verify_password(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+
+async def hash_password(password: str) -> str:
+    """
+    Hash password using bcrypt with salt.
+
+    Args:
+        password: Plain text password to hash
+
+    Returns:
+        Hashed password as string
+    """
+    return await _run_in_pool(_hash_password, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against its hash.
+
+    Args:
+        password: Plain text password to verify
+        hashed_password: Previously hashed password
+
+    Returns:
+        True if password matches, False otherwise
+    """
+    return await _run_in_pool(_verify_password, password, hashed_password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Check if a hash was made with a different work factor than BCRYPT_ROUNDS
+    """
+    # bcrypt hashes look like $2b$12$<salt><hash>
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def password_pool_stats() -> dict:
+    """
+    Counters of the password hashing pool
+    """
+    return {
+        **_stats,
+        "concurrency": PASSWORD_HASH_CONCURRENCY,
+        "rounds": BCRYPT_ROUNDS,
+    }
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Set
+
+from sqlalchemy import update
+
+from ..database import async_session, insert_on_conflict
+from ..models import NightlyTaskLease
+
+# Run the nightly tasks in this worker, disable on all but one worker if wanted
+AI_SCHEDULER_ENABLED = os.getenv("AI_SCHEDULER_ENABLED", "true").lower() == "true"
+# Off-peak hour (UTC) the nightly tasks start at
+AI_SCHEDULER_HOUR_UTC = int(os.getenv("AI_SCHEDULER_HOUR_UTC", 3))
+# A running task's lease is renewed well before this, and runs out this long
+# after its worker died
+AI_SCHEDULER_LEASE_MINUTES = int(os.getenv("AI_SCHEDULER_LEASE_MINUTES", 10))
+
+_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+NightlyTask = Callable[[], Awaitable[None]]
+
+_nightly_tasks: Dict[str, NightlyTask] = {}
+_last_runs: Dict[str, dict] = {}
+_tasks: List[asyncio.Task] = []
+# Runs started on demand, see start_nightly_task
+_manual_runs: Set[asyncio.Task] = set()
+
+
+def register_nightly_task(name: str):
+    """
+    Decorator registering a coroutine function run once a night
+    """
+
+    def decorator(task: NightlyTask) -> NightlyTask:
+        _nightly_tasks[name] = task
+        return task
+
+    return decorator
+
+
+def _seconds_until_next_run(now: datetime) -> float:
+    next_run = now.replace(
+        hour=AI_SCHEDULER_HOUR_UTC, minute=0, second=0, microsecond=0
+    )
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+async def _claim_lease(name: str) -> bool:
+    """
+    Take the lease of a nightly task unless another worker holds it
+    """
+    now = datetime.now(timezone.utc)
+    async with async_session() as db:
+        await db.execute(
+            insert_on_conflict(NightlyTaskLease)
+            .values(name=name, holder=None, expires_at=now)
+            .on_conflict_do_nothing(index_elements=[NightlyTaskLease.name])
+        )
+        # Conditional update so a lease is only ever taken by one worker
+        claim = await db.execute(
+            update(NightlyTaskLease)
+            .where(NightlyTaskLease.name == name, NightlyTaskLease.expires_at <= now)
+            .values(
+                holder=_WORKER_ID,
+                expires_at=now + timedelta(minutes=AI_SCHEDULER_LEASE_MINUTES),
+            )
+        )
+        await db.commit()
+
+    return claim.rowcount == 1
+
+
+async def _set_lease(name: str, expires_at: datetime) -> bool:
+    async with async_session() as db:
+        result = await db.execute(
+            update(NightlyTaskLease)
+            .where(
+                NightlyTaskLease.name == name, NightlyTaskLease.holder == _WORKER_ID
+            )
+            .values(expires_at=expires_at)
+        )
+        await db.commit()
+
+    return result.rowcount == 1
+
+
+async def _renew_lease(name: str):
+    lease = timedelta(minutes=AI_SCHEDULER_LEASE_MINUTES)
+    while True:
+        await asyncio.sleep(lease.total_seconds() / 3)
+        if not await _set_lease(name, datetime.now(timezone.utc) + lease):
+            logging.warning(f"Nightly task {name} lost its lease")
+
+
+async def run_nightly_task(name: str):
+    """
+    Run a nightly task now. A lease row in the database makes sure only one
+    worker process runs it at a time, the others skip it. No connection is
+    held while the task runs, the lease is renewed in short transactions.
+    """
+    if not await _claim_lease(name):
+        logging.info(f"Nightly task {name} is running in another worker")
+        return
+
+    started_at = datetime.now(timezone.utc)
+    renewal = asyncio.create_task(_renew_lease(name))
+    try:
+        await _nightly_tasks[name]()
+
+    finally:
+        renewal.cancel()
+        await asyncio.shield(_set_lease(name, datetime.now(timezone.utc)))
+
+    _last_runs[name] = {
+        "started_at": started_at.isoformat(),
+        "seconds": (datetime.now(timezone.utc) - started_at).total_seconds(),
+    }
+
+
+async def _run_logged(name: str):
+    logging.info(f"Running nightly task {name}")
+    try:
+        await run_nightly_task(name)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logging.exception(f"Nightly task {name} failed")
+
+
+async def _scheduler():
+    while True:
+        await asyncio.sleep(_seconds_until_next_run(datetime.now(timezone.utc)))
+
+        for name in _nightly_tasks:
+            await _run_logged(name)
+
+
+def start_nightly_task(name: str) -> bool:
+    """
+    Start a nightly task in the background now instead of at the scheduled
+    hour, False if no task of that name is registered
+    """
+    if name not in _nightly_tasks:
+        return False
+
+    task = asyncio.create_task(_run_logged(name))
+    _manual_runs.add(task)
+    task.add_done_callback(_manual_runs.discard)
+    return True
+
+
+def start_scheduler():
+    """
+    Start running the registered nightly tasks
+    """
+    if not AI_SCHEDULER_ENABLED:
+        return
+
+    _tasks.append(asyncio.create_task(_scheduler()))
+    logging.info(
+        f"[SUCCESS] Scheduled {len(_nightly_tasks)} nightly tasks "
+        f"at {AI_SCHEDULER_HOUR_UTC}:00 UTC"
+    )
+
+
+async def stop_scheduler():
+    """
+    Cancel the scheduler, a running task is interrupted
+    """
+    tasks = [*_tasks, *_manual_runs]
+    for task in tasks:
+        task.cancel()
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _tasks.clear()
+
+
+def scheduler_stats() -> dict:
+    """
+    Last runs of the nightly tasks in this worker
+    """
+    return {
+        "enabled": AI_SCHEDULER_ENABLED,
+        "hour_utc": AI_SCHEDULER_HOUR_UTC,
+        "tasks": list(_nightly_tasks),
+        "manual_runs": len(_manual_runs),
+        "last_runs": _last_runs,
+    }
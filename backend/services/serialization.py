@@ -0,0 +1,46 @@
+from decimal import Decimal
+from typing import Any, Type
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+
+def _default(value: Any):
+    # DECIMAL columns read without a response model
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    JSON of content as FastAPI would render it through a response model:
+    UTC datetimes end in "Z" like Pydantic's, DECIMAL values are numbers
+    """
+    return orjson.dumps(
+        content,
+        default=_default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z,
+    )
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Default response class of the app, orjson instead of the json module
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def trusted_dict(schema: Type[BaseModel], row: Any) -> dict:
+    """
+    Fields of a response schema read from an ORM object or result row as is.
+
+    Fast path for data read back from the database, which was validated on
+    write: the response is built without validating it again. Return it in
+    a FastJSONResponse so FastAPI does not validate it against the
+    response_model either.
+    """
+    return {name: getattr(row, name) for name in schema.model_fields}
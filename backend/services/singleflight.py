@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+from sqlalchemy import text
+
+from ..database.database import engine
+from .usage import AiUserLimitExceeded
+
+T = TypeVar("T")
+
+# Also coalesce across uvicorn workers with a PostgreSQL advisory lock. The lock
+# holder keeps one pooled connection for the duration of the call.
+AI_SINGLE_FLIGHT_ADVISORY_LOCK = (
+    os.getenv("AI_SINGLE_FLIGHT_ADVISORY_LOCK", "false").lower() == "true"
+)
+
+
+def input_hash(value) -> str:
+    """
+    Stable short hash of JSON-serialisable call arguments, for flight keys
+    """
+    encoded = json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller starts the
+    call and every other caller awaits the same result. The call is cancelled
+    only once all of its callers are gone. An error in caller_errors only
+    concerns the caller that started the call, e.g. its own rate limit, the
+    others then retry with their own call.
+    """
+
+    def __init__(
+        self,
+        use_advisory_lock: bool = False,
+        caller_errors: Tuple[Type[BaseException], ...] = (),
+    ):
+        self.use_advisory_lock = use_advisory_lock
+        self.caller_errors = caller_errors
+        self.calls = 0
+        self.coalesced = 0
+        self.coalesced_across_workers = 0
+        self.retried = 0
+        self._flights: Dict[str, _Flight] = {}
+
+    async def do(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[T]],
+        recheck: Optional[Callable[[], Awaitable[Optional[T]]]] = None,
+    ) -> T:
+        """
+        Run func once per key at a time.
+
+        Args:
+            key: Identity of the call, e.g. user, stock, prompt and input hash
+            func: Coroutine function making the call
+            recheck: With the advisory lock, called once the lock is acquired to
+                pick up a result another worker stored meanwhile (None if none)
+        """
+        while True:
+            flight = self._flights.get(key)
+            started = flight is None
+
+            if started:
+                self.calls += 1
+                flight = self._start(key, func, recheck)
+
+            else:
+                self.coalesced += 1
+                logging.info(f"Coalesced AI call {key}")
+
+            flight.waiters += 1
+            try:
+                return await asyncio.shield(flight.task)
+
+            except self.caller_errors:
+                if started:
+                    raise
+                self.retried += 1
+                logging.info(f"Retrying AI call {key} after an error of its caller")
+                self._forget(key, flight)
+
+            finally:
+                flight.waiters -= 1
+                if flight.waiters == 0 and not flight.task.done():
+                    flight.task.cancel()
+                    # A new caller must start a new call, not await this one
+                    self._forget(key, flight)
+
+    def _start(self, key, func, recheck) -> _Flight:
+        flight = _Flight(asyncio.ensure_future(self._run(key, func, recheck)))
+        self._flights[key] = flight
+        flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        return flight
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def _run(self, key, func, recheck):
+        if not self.use_advisory_lock or engine.dialect.name != "postgresql":
+            return await func()
+
+        lock_id = int.from_bytes(
+            hashlib.sha256(key.encode("utf-8")).digest()[:8], "big", signed=True
+        )
+
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": lock_id})
+            try:
+                if recheck is not None:
+                    result = await recheck()
+                    if result is not None:
+                        self.coalesced_across_workers += 1
+                        logging.info(f"Coalesced AI call {key} across workers")
+                        return result
+
+                return await func()
+
+            finally:
+                await conn.execute(
+                    text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id}
+                )
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_across_workers": self.coalesced_across_workers,
+            "retried": self.retried,
+            "in_flight": len(self._flights),
+            "advisory_lock": self.use_advisory_lock,
+        }
+
+
+ai_single_flight = SingleFlight(
+    use_advisory_lock=AI_SINGLE_FLIGHT_ADVISORY_LOCK,
+    caller_errors=(AiUserLimitExceeded,),
+)
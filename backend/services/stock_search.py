@@ -0,0 +1,320 @@
+import asyncio
+import heapq
+import logging
+import os
+import re
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Stock
+
+# "memory" for the per-user in-process index, "pg_trgm" to query PostgreSQL
+# trigram indexes instead (see migration 0006_stock_search_trigram_indexes)
+STOCK_SEARCH_BACKEND = os.getenv("STOCK_SEARCH_BACKEND", "memory").lower()
+# Per-user indexes are rebuilt from the database after this long, which also
+# picks up changes made through other worker processes
+STOCK_SEARCH_INDEX_TTL_SECONDS = int(
+    os.getenv("STOCK_SEARCH_INDEX_TTL_SECONDS", 600)
+)
+STOCK_SEARCH_MAX_USERS = int(os.getenv("STOCK_SEARCH_MAX_USERS", 1000))
+
+# Min share of the query trigrams found in a fuzzy match, same default as
+# pg_trgm word_similarity
+MIN_WORD_SIMILARITY = 0.6
+# Bound on the prefix matches looked at, so one-letter queries stay fast
+MAX_PREFIX_CANDIDATES = 1000
+# Trigrams in more stocks than this, e.g. "  a", do not select fuzzy candidates
+MAX_TRIGRAM_POSTINGS = 2000
+
+
+def _normalize(text: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", (text or "").lower()).strip()
+
+
+def _trigrams(text: str) -> Set[str]:
+    """
+    Trigrams of every word padded like pg_trgm, e.g. "ab" -> "  a", " ab", "ab "
+    """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class StockSearchIndex:
+    """
+    In-memory prefix and trigram index over ticker, abbreviation and company
+    name of one user's stocks
+    """
+
+    def __init__(self):
+        self._tokens: Dict[int, List[str]] = {}
+        self._grams: Dict[int, Set[str]] = {}
+        self._names: Dict[int, str] = {}
+        # Sorted (token, stock id) pairs for prefix range lookups
+        self._prefixes: List[Tuple[str, int]] = []
+        self._postings: Dict[str, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    @classmethod
+    def build(cls, rows) -> "StockSearchIndex":
+        """
+        Index (id, ticker, abbreviation, company_name) rows, sorting the
+        prefixes once instead of inserting them one by one
+        """
+        index = cls()
+        for row in rows:
+            index._index(*row, keep_sorted=False)
+        index._prefixes.sort()
+        return index
+
+    def add(
+        self,
+        stock_id: int,
+        ticker: str,
+        abbreviation: Optional[str],
+        company_name: str,
+    ):
+        """Add a stock, or replace its entry"""
+        self.remove(stock_id)
+        self._index(stock_id, ticker, abbreviation, company_name)
+
+    def _index(
+        self,
+        stock_id: int,
+        ticker: str,
+        abbreviation: Optional[str],
+        company_name: str,
+        keep_sorted: bool = True,
+    ):
+        name = _normalize(company_name)
+        tokens = {_normalize(ticker), _normalize(abbreviation), name, *name.split()}
+        tokens.discard("")
+        grams = _trigrams(" ".join((_normalize(ticker), name)))
+
+        self._tokens[stock_id] = sorted(tokens)
+        self._grams[stock_id] = grams
+        self._names[stock_id] = name
+
+        for token in tokens:
+            if keep_sorted:
+                insort(self._prefixes, (token, stock_id))
+            else:
+                self._prefixes.append((token, stock_id))
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(stock_id)
+
+    def remove(self, stock_id: int):
+        """Remove a stock if indexed"""
+        tokens = self._tokens.pop(stock_id, None)
+        if tokens is None:
+            return
+
+        for token in tokens:
+            i = bisect_left(self._prefixes, (token, stock_id))
+            if i < len(self._prefixes) and self._prefixes[i] == (token, stock_id):
+                del self._prefixes[i]
+
+        for gram in self._grams.pop(stock_id):
+            postings = self._postings[gram]
+            postings.discard(stock_id)
+            if not postings:
+                del self._postings[gram]
+
+        del self._names[stock_id]
+
+    def search(self, query: str, limit: int = 20) -> List[int]:
+        """
+        Ids of the best matching stocks: exact and prefix matches of a ticker,
+        abbreviation or name word first, then fuzzy trigram matches
+        """
+        query = _normalize(query)
+        if not query:
+            return []
+
+        scores: Dict[int, float] = {}
+
+        i = bisect_left(self._prefixes, (query,))
+        end = min(len(self._prefixes), i + MAX_PREFIX_CANDIDATES)
+        while i < end and self._prefixes[i][0].startswith(query):
+            token, stock_id = self._prefixes[i]
+            score = 3.0 if token == query else 2.0
+            scores[stock_id] = max(scores.get(stock_id, 0.0), score)
+            i += 1
+
+        # Fuzzy matching for typos, only when prefixes do not fill the page
+        if len(scores) < limit:
+            query_grams = _trigrams(query)
+            candidates = set()
+            for gram in query_grams:
+                postings = self._postings.get(gram, ())
+                if len(postings) <= MAX_TRIGRAM_POSTINGS:
+                    candidates.update(postings)
+
+            for stock_id in candidates - scores.keys():
+                shared = len(query_grams & self._grams[stock_id])
+                similarity = shared / len(query_grams)
+                if similarity >= MIN_WORD_SIMILARITY:
+                    scores[stock_id] = similarity
+
+        return heapq.nsmallest(
+            limit, scores, key=lambda s: (-scores[s], self._names[s], s)
+        )
+
+
+class StockSearchIndexes:
+    """
+    Per-user StockSearchIndex instances, built from the database on first use
+    and rebuilt after a TTL. Least recently used users are evicted.
+    """
+
+    def __init__(self, ttl_seconds: int, max_users: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self.builds = 0
+        self._indexes: OrderedDict[int, Tuple[float, StockSearchIndex]] = (
+            OrderedDict()
+        )
+        self._build_locks: Dict[int, asyncio.Lock] = {}
+        # Index writes of the users whose index is being built, see get
+        self._build_writes: Dict[int, List[Tuple[str, tuple]]] = {}
+
+    async def get(self, db: AsyncSession, user_id: int) -> StockSearchIndex:
+        entry = self._indexes.get(user_id)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+            self._indexes.move_to_end(user_id)
+            return entry[1]
+
+        # One build per user at a time, concurrent searches wait for it
+        lock = self._build_locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            entry = self._indexes.get(user_id)
+            if entry is not None and entry[0] > time.monotonic() - self.ttl_seconds:
+                return entry[1]
+
+            # Writes committed while the build runs may be missing from the rows
+            # it read, they are recorded and replayed on the new index
+            writes = self._build_writes[user_id] = []
+            try:
+                index = await self._build(db, user_id)
+            finally:
+                del self._build_writes[user_id]
+            for method, args in writes:
+                getattr(index, method)(*args)
+
+            self._indexes[user_id] = (time.monotonic(), index)
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+
+        self._build_locks.pop(user_id, None)
+        return index
+
+    async def _build(self, db: AsyncSession, user_id: int) -> StockSearchIndex:
+        started_at = time.perf_counter()
+        result = await db.execute(
+            select(
+                Stock.id, Stock.ticker, Stock.abbreviation, Stock.company_name
+            ).where(Stock.user_id == user_id)
+        )
+
+        # Large indexes take seconds to build, keep the event loop responsive
+        index = await asyncio.to_thread(StockSearchIndex.build, result.all())
+
+        self.builds += 1
+        logging.info(
+            f"Built stock search index of user {user_id} ({len(index)} stocks) "
+            f"in {time.perf_counter() - started_at:.3f}s"
+        )
+        return index
+
+    def _write(self, user_id: int, method: str, *args):
+        writes = self._build_writes.get(user_id)
+        if writes is not None:
+            writes.append((method, args))
+
+        entry = self._indexes.get(user_id)
+        if entry is not None:
+            getattr(entry[1], method)(*args)
+
+    def add(self, stock: Stock):
+        """Index a created or updated stock, if its user's index is loaded"""
+        self._write(
+            stock.user_id,
+            "add",
+            stock.id,
+            stock.ticker,
+            stock.abbreviation,
+            stock.company_name,
+        )
+
+    def remove(self, user_id: int, stock_id: int):
+        """Drop a deleted stock, if its user's index is loaded"""
+        self._write(user_id, "remove", stock_id)
+
+    def stats(self) -> dict:
+        return {
+            "backend": STOCK_SEARCH_BACKEND,
+            "users": len(self._indexes),
+            "stocks": sum(len(index) for _, index in self._indexes.values()),
+            "builds": self.builds,
+        }
+
+
+stock_search_indexes = StockSearchIndexes(
+    STOCK_SEARCH_INDEX_TTL_SECONDS, STOCK_SEARCH_MAX_USERS
+)
+
+
+async def _search_pg_trgm(
+    db: AsyncSession, user_id: int, query: str, limit: int
+) -> List[int]:
+    query = _normalize(query)
+    prefix = re.sub(r"([\\%_])", r"\\\1", query) + "%"
+    ticker = func.lower(Stock.ticker)
+    name = func.lower(Stock.company_name)
+
+    result = await db.execute(
+        select(Stock.id)
+        .where(
+            Stock.user_id == user_id,
+            or_(
+                ticker.like(prefix, escape="\\"),
+                func.lower(Stock.abbreviation).like(prefix, escape="\\"),
+                name.like(prefix, escape="\\"),
+                name.op("%>")(query),
+                ticker.op("%>")(query),
+            ),
+        )
+        .order_by(
+            (ticker == query).desc(),
+            ticker.like(prefix, escape="\\").desc(),
+            func.greatest(
+                func.word_similarity(query, ticker), func.word_similarity(query, name)
+            ).desc(),
+            Stock.company_name,
+        )
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def search_stock_ids(
+    db: AsyncSession, user_id: int, query: str, limit: int = 20
+) -> List[int]:
+    """
+    Ids of the user's stocks best matching a search query, best first
+    """
+    if STOCK_SEARCH_BACKEND == "pg_trgm":
+        return await _search_pg_trgm(db, user_id, query, limit)
+
+    index = await stock_search_indexes.get(db, user_id)
+    return index.search(query, limit)
@@ -0,0 +1,76 @@
+import json
+import logging
+from typing import AsyncIterator, Awaitable, Callable
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop reverse proxies from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data: dict) -> str:
+    """
+    Format one Server-Sent Event with a JSON payload
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _answer_events(
+    deltas: AsyncIterator[str], finish: Callable[[str], Awaitable[dict]]
+) -> AsyncIterator[str]:
+    chunks = []
+
+    try:
+        # Comment line so the client gets its first byte right away
+        yield ": stream started\n\n"
+
+        async for delta in deltas:
+            chunks.append(delta)
+            yield sse_event("delta", {"delta": delta})
+
+        yield sse_event("done", await finish("".join(chunks)))
+
+    except HTTPException as e:
+        yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+
+    except Exception:
+        logging.exception("AI answer stream failed")
+        yield sse_event(
+            "error", {"status_code": 500, "detail": "Failed to get AI answer"}
+        )
+
+    finally:
+        # Aborts the upstream AI request if the client went away mid-stream
+        await deltas.aclose()
+
+
+def sse_answer_response(
+    deltas: AsyncIterator[str], finish: Callable[[str], Awaitable[dict]]
+) -> StreamingResponse:
+    """
+    Forward AI text deltas as "delta" events. Once the model is done, the full
+    text goes to finish, which persists it and returns the "done" event payload.
+    Failures are reported as an "error" event since the status is already sent.
+    """
+    return StreamingResponse(
+        _answer_events(deltas, finish),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+def sse_done_response(data: dict) -> StreamingResponse:
+    """
+    Stream made of a single "done" event, for answers that need no AI call
+    """
+
+    async def events():
+        yield sse_event("done", data)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers=SSE_HEADERS
+    )
@@ -0,0 +1,51 @@
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import insert_on_conflict
+from ..models import ResourceVersion, SyncTombstone
+
+# resource_versions row holding a user's change sequence counter
+SYNC_RESOURCE = "sync"
+
+
+async def next_change_seq(db: AsyncSession, user_id: int) -> int:
+    """
+    Next value of the user's change sequence, to stamp the rows of a write.
+
+    The counter row stays locked until the transaction ends, so writes of a
+    user commit in sequence order and a sync cursor never skips a row of a
+    transaction committed late. Call it just before committing, after
+    bump_versions: both lock resource_versions rows, always taken in that
+    order so concurrent writes of a user cannot deadlock.
+    """
+    stmt = insert_on_conflict(ResourceVersion).values(
+        user_id=user_id, resource=SYNC_RESOURCE
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ResourceVersion.user_id, ResourceVersion.resource],
+        set_={"version": ResourceVersion.version + 1, "updated_at": func.now()},
+    )
+    result = await db.execute(stmt.returning(ResourceVersion.version))
+    return result.scalar_one()
+
+
+async def current_change_seq(db: AsyncSession, user_id: int) -> int:
+    """Last change sequence value handed out to the user, 0 if none"""
+    result = await db.execute(
+        select(ResourceVersion.version).where(
+            ResourceVersion.user_id == user_id,
+            ResourceVersion.resource == SYNC_RESOURCE,
+        )
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def add_tombstone(
+    db: AsyncSession, user_id: int, resource: str, row_id: int, change_seq: int
+):
+    """Record a deleted row for GET /sync, in the transaction deleting it"""
+    await db.execute(
+        insert(SyncTombstone).values(
+            user_id=user_id, resource=resource, row_id=row_id, change_seq=change_seq
+        )
+    )
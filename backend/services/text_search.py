@@ -0,0 +1,415 @@
+import asyncio
+import heapq
+import html
+import logging
+import math
+import os
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import func, literal_column, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database.database import engine
+from ..models import AiAnswerCache, Stock, StockAiPrompt
+
+# "postgres" for tsvector queries backed by GIN indexes (migration
+# 0007_full_text_search_indexes), "memory" for a per-user inverted index.
+# "auto" picks postgres on PostgreSQL and memory elsewhere, e.g. SQLite in dev.
+TEXT_SEARCH_BACKEND = os.getenv("TEXT_SEARCH_BACKEND", "auto").lower()
+# Per-user indexes are rebuilt from the database after this long, which also
+# picks up answers written by other worker processes
+TEXT_SEARCH_INDEX_TTL_SECONDS = int(os.getenv("TEXT_SEARCH_INDEX_TTL_SECONDS", 600))
+TEXT_SEARCH_MAX_USERS = int(os.getenv("TEXT_SEARCH_MAX_USERS", 200))
+
+SOURCE_PROMPT = "prompt"
+SOURCE_DESCRIPTION = "description"
+SOURCE_AI_DESCRIPTION = "ai_description"
+
+# Same text search configuration as the GIN index expressions, inlined so the
+# planner can match them
+_TS_CONFIG = literal_column("'english'")
+_EMPTY = literal_column("''")
+# ts_headline marks matches with control characters, which are replaced by
+# <b></b> once the headline is HTML escaped
+_START_SEL = "\x02"
+_STOP_SEL = "\x03"
+_HEADLINE_OPTIONS = (
+    "MaxFragments=1, MaxWords=25, MinWords=10, "
+    f'StartSel="{_START_SEL}", StopSel="{_STOP_SEL}"'
+)
+
+# Words around a match in the snippets of the in-memory index
+SNIPPET_WORDS = 25
+
+_STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in",
+    "is", "it", "its", "of", "on", "or", "that", "the", "to", "was", "were",
+    "will", "with",
+}  # fmt: skip
+
+
+class TextMatch(NamedTuple):
+    """A stock text matching a full-text query"""
+
+    stock_id: int
+    source: str
+    prompt: Optional[str]
+    rank: float
+    snippet: str
+
+
+def _stem(word: str) -> str:
+    """Very light English stemming so "risks" finds "risk" """
+    for suffix, replacement in (("ies", "y"), ("ing", ""), ("ed", ""), ("es", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)] + replacement
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def _terms(text: str) -> List[str]:
+    return [
+        _stem(word)
+        for word in re.findall(r"\w+", text.lower())
+        if word not in _STOP_WORDS
+    ]
+
+
+def _highlighted(headline: str) -> str:
+    """HTML of a ts_headline result, matches in <b></b>"""
+    return (
+        html.escape(headline).replace(_START_SEL, "<b>").replace(_STOP_SEL, "</b>")
+    )
+
+
+def _snippet(text: str, terms: Set[str]) -> str:
+    """
+    HTML of the words around the first match with matches in <b></b>, like
+    ts_headline. The text is escaped, the only markup is <b></b>.
+    """
+    words = list(re.finditer(r"\w+", text))
+    hits = {i for i, w in enumerate(words) if _stem(w.group().lower()) in terms}
+    if not hits:
+        return html.escape(text[:200])
+
+    first = max(0, min(hits) - SNIPPET_WORDS // 3)
+    last = min(len(words), first + SNIPPET_WORDS) - 1
+
+    parts = []
+    position = words[first].start()
+    for i in range(first, last + 1):
+        word = words[i]
+        parts.append(html.escape(text[position:word.start()]))
+        if i in hits:
+            parts.append(f"<b>{html.escape(word.group())}</b>")
+        else:
+            parts.append(html.escape(word.group()))
+        position = word.end()
+
+    return "".join(parts).strip()
+
+
+DocKey = Tuple[int, str, str]  # stock id, source, prompt id ("" if none)
+
+
+class TextSearchIndex:
+    """
+    In-memory inverted index over the AI answers and descriptions of one
+    user's stocks, ranked with tf-idf
+    """
+
+    def __init__(self):
+        self._docs: Dict[DocKey, Tuple[str, Counter, int]] = {}
+        self._postings: Dict[str, Set[DocKey]] = {}
+        self._by_stock: Dict[int, Set[DocKey]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @classmethod
+    def build(cls, answers, stocks) -> "TextSearchIndex":
+        """
+        Index (stock_id, prompt, response) and (id, description,
+        ai_description) rows
+        """
+        index = cls()
+        for stock_id, prompt, response in answers:
+            index.set((stock_id, SOURCE_PROMPT, prompt), response)
+        for stock_id, description, ai_description in stocks:
+            index.set((stock_id, SOURCE_DESCRIPTION, ""), description)
+            index.set((stock_id, SOURCE_AI_DESCRIPTION, ""), ai_description)
+        return index
+
+    def set(self, key: DocKey, text: Optional[str]):
+        """Index the text of a document, replacing its previous text"""
+        self.remove(key)
+        if not text:
+            return
+
+        terms = _terms(text)
+        counts = Counter(terms)
+        self._docs[key] = (text, counts, len(terms))
+        self._by_stock.setdefault(key[0], set()).add(key)
+        for term in counts:
+            self._postings.setdefault(term, set()).add(key)
+
+    def remove(self, key: DocKey):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+
+        for term in doc[1]:
+            postings = self._postings[term]
+            postings.discard(key)
+            if not postings:
+                del self._postings[term]
+
+        keys = self._by_stock[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._by_stock[key[0]]
+
+    def remove_stock(self, stock_id: int):
+        for key in list(self._by_stock.get(stock_id, ())):
+            self.remove(key)
+
+    def search(self, query: str, limit: int = 20) -> List[TextMatch]:
+        """
+        Documents containing every query term, best tf-idf score first
+        """
+        terms = set(_terms(query))
+        if not terms:
+            return []
+
+        postings = sorted((self._postings.get(term, set()) for term in terms), key=len)
+        matches = postings[0].intersection(*postings[1:])
+        if not matches:
+            return []
+
+        idf = {
+            term: math.log(1 + len(self._docs) / len(self._postings[term]))
+            for term in terms
+        }
+
+        def score(key: DocKey) -> float:
+            _, counts, length = self._docs[key]
+            return sum(
+                (1 + math.log(counts[term])) * idf[term] for term in terms
+            ) / math.sqrt(length)
+
+        scored = heapq.nlargest(limit, ((score(key), key) for key in matches))
+        return [
+            TextMatch(
+                key[0],
+                key[1],
+                key[2] or None,
+                rank,
+                _snippet(self._docs[key][0], terms),
+            )
+            for rank, key in scored
+        ]
+
+
+class TextSearchIndexes:
+    """
+    Per-user TextSearchIndex instances, built from the database on first use
+    and rebuilt after a TTL. Least recently used users are evicted.
+    """
+
+    def __init__(self, ttl_seconds: int, max_users: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self.builds = 0
+        self._indexes: OrderedDict[int, Tuple[float, TextSearchIndex]] = (
+            OrderedDict()
+        )
+        self._build_locks: Dict[int, asyncio.Lock] = {}
+
+    async def get(self, db: AsyncSession, user_id: int) -> TextSearchIndex:
+        entry = self._indexes.get(user_id)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+            self._indexes.move_to_end(user_id)
+            return entry[1]
+
+        # One build per user at a time, concurrent searches wait for it
+        lock = self._build_locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            entry = self._indexes.get(user_id)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                return entry[1]
+
+            index = await self._build(db, user_id)
+            self._indexes[user_id] = (time.monotonic(), index)
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+
+        self._build_locks.pop(user_id, None)
+        return index
+
+    async def _build(self, db: AsyncSession, user_id: int) -> TextSearchIndex:
+        started_at = time.perf_counter()
+        answers = await db.execute(
+            select(
+                StockAiPrompt.stock_id,
+                StockAiPrompt.prompt,
+                func.coalesce(StockAiPrompt.response, AiAnswerCache.response),
+            )
+            .outerjoin(AiAnswerCache, StockAiPrompt.cache_entry_id == AiAnswerCache.id)
+            .where(StockAiPrompt.user_id == user_id)
+        )
+        stocks = await db.execute(
+            select(Stock.id, Stock.description, Stock.ai_description).where(
+                Stock.user_id == user_id
+            )
+        )
+
+        index = await asyncio.to_thread(
+            TextSearchIndex.build, answers.all(), stocks.all()
+        )
+
+        self.builds += 1
+        logging.info(
+            f"Built text search index of user {user_id} ({len(index)} texts) "
+            f"in {time.perf_counter() - started_at:.3f}s"
+        )
+        return index
+
+    def loaded(self, user_id: int) -> Optional[TextSearchIndex]:
+        """The user's index if loaded, for incremental updates"""
+        entry = self._indexes.get(user_id)
+        return entry[1] if entry is not None else None
+
+    def stats(self) -> dict:
+        return {
+            "backend": _backend(),
+            "users": len(self._indexes),
+            "documents": sum(len(index) for _, index in self._indexes.values()),
+            "builds": self.builds,
+        }
+
+
+text_search_indexes = TextSearchIndexes(
+    TEXT_SEARCH_INDEX_TTL_SECONDS, TEXT_SEARCH_MAX_USERS
+)
+
+
+def index_prompt_answer(
+    user_id: int, stock_id: int, prompt_id: str, response: Optional[str]
+):
+    """
+    Keep a loaded full-text index up to date with a written prompt answer
+    """
+    index = text_search_indexes.loaded(user_id)
+    if index is not None:
+        index.set((stock_id, SOURCE_PROMPT, prompt_id), response)
+
+
+def index_stock_text(stock: Stock):
+    """
+    Keep a loaded full-text index up to date with the descriptions of a stock
+    """
+    index = text_search_indexes.loaded(stock.user_id)
+    if index is not None:
+        index.set((stock.id, SOURCE_DESCRIPTION, ""), stock.description)
+        index.set((stock.id, SOURCE_AI_DESCRIPTION, ""), stock.ai_description)
+
+
+def remove_stock_text(user_id: int, stock_id: int):
+    """
+    Drop a deleted stock from a loaded full-text index
+    """
+    index = text_search_indexes.loaded(user_id)
+    if index is not None:
+        index.remove_stock(stock_id)
+
+
+def _backend() -> str:
+    if TEXT_SEARCH_BACKEND == "auto":
+        return "postgres" if engine.dialect.name == "postgresql" else "memory"
+    return TEXT_SEARCH_BACKEND
+
+
+def _tsvector(column):
+    return func.to_tsvector(_TS_CONFIG, func.coalesce(column, _EMPTY))
+
+
+async def _search_postgres(
+    db: AsyncSession, user_id: int, query: str, limit: int
+) -> List[TextMatch]:
+    tsquery = func.websearch_to_tsquery(_TS_CONFIG, query)
+
+    def arm(source, prompt, text, *joins_and_filters):
+        stmt = select(
+            Stock.id.label("stock_id"),
+            literal_column(f"'{source}'").label("source"),
+            prompt.label("prompt"),
+            text.label("text"),
+        )
+        for clause in joins_and_filters:
+            stmt = clause(stmt)
+        return stmt.where(Stock.user_id == user_id, _tsvector(text).op("@@")(tsquery))
+
+    matches = union_all(
+        # Answers stored per user, and answers shared through the cache
+        arm(
+            SOURCE_PROMPT,
+            StockAiPrompt.prompt,
+            StockAiPrompt.response,
+            lambda s: s.select_from(StockAiPrompt).join(
+                Stock, Stock.id == StockAiPrompt.stock_id
+            ),
+        ),
+        arm(
+            SOURCE_PROMPT,
+            StockAiPrompt.prompt,
+            AiAnswerCache.response,
+            lambda s: s.select_from(StockAiPrompt)
+            .join(Stock, Stock.id == StockAiPrompt.stock_id)
+            .join(AiAnswerCache, AiAnswerCache.id == StockAiPrompt.cache_entry_id)
+            .where(StockAiPrompt.response.is_(None)),
+        ),
+        arm(SOURCE_DESCRIPTION, literal_column("NULL"), Stock.description),
+        arm(SOURCE_AI_DESCRIPTION, literal_column("NULL"), Stock.ai_description),
+    ).subquery()
+
+    rank = func.ts_rank(_tsvector(matches.c.text), tsquery)
+    result = await db.execute(
+        select(
+            matches.c.stock_id,
+            matches.c.source,
+            matches.c.prompt,
+            rank.label("rank"),
+            func.ts_headline(
+                _TS_CONFIG,
+                # Stray markers in the text would unbalance the <b></b>
+                func.translate(matches.c.text, _START_SEL + _STOP_SEL, ""),
+                tsquery,
+                _HEADLINE_OPTIONS,
+            ).label("snippet"),
+        )
+        .order_by(rank.desc())
+        .limit(limit)
+    )
+    return [
+        TextMatch(stock_id, source, prompt, rank, _highlighted(snippet))
+        for stock_id, source, prompt, rank, snippet in result
+    ]
+
+
+async def search_texts(
+    db: AsyncSession, user_id: int, query: str, limit: int = 20
+) -> List[TextMatch]:
+    """
+    AI answers and descriptions of the user's stocks matching a full-text
+    query, best ranked first, with an HTML snippet around the match
+    """
+    if _backend() == "postgres":
+        return await _search_postgres(db, user_id, query, limit)
+
+    index = await text_search_indexes.get(db, user_id)
+    return index.search(query, limit)
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+
+from ..database import async_session
+from ..models import AiUsage
+
+# AI calls of one user running at once, further calls wait for a free slot
+AI_USER_MAX_CONCURRENCY = int(os.getenv("AI_USER_MAX_CONCURRENCY", 4))
+# AI calls of one user allowed to wait for a slot before new ones are rejected
+AI_USER_MAX_QUEUED = int(os.getenv("AI_USER_MAX_QUEUED", 20))
+# Tokens a user may spend within the rolling window, 0 disables the quota
+AI_USER_TOKEN_QUOTA = int(os.getenv("AI_USER_TOKEN_QUOTA", 1000000))
+AI_USER_QUOTA_WINDOW_HOURS = int(os.getenv("AI_USER_QUOTA_WINDOW_HOURS", 24))
+
+USAGE_OK = "ok"
+USAGE_FAILED = "failed"
+
+
+class _UserSlots:
+    def __init__(self):
+        self.semaphore = asyncio.Semaphore(AI_USER_MAX_CONCURRENCY)
+        # Calls running or waiting for the semaphore
+        self.pending = 0
+
+
+class AiUserLimitExceeded(HTTPException):
+    """429 of a per-user AI limit, it only concerns the user making the call"""
+
+    def __init__(self, detail: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers=headers,
+        )
+
+
+_slots: Dict[int, _UserSlots] = {}
+_stats = {"rejected_concurrency": 0, "rejected_quota": 0, "ledger_errors": 0}
+
+
+async def check_token_quota(user_id: int):
+    """
+    Reject with 429 once the user spent AI_USER_TOKEN_QUOTA tokens within the
+    last AI_USER_QUOTA_WINDOW_HOURS
+    """
+    if not AI_USER_TOKEN_QUOTA:
+        return
+
+    window = timedelta(hours=AI_USER_QUOTA_WINDOW_HOURS)
+    now = datetime.now(timezone.utc)
+
+    async with async_session() as db:
+        result = await db.execute(
+            select(
+                func.coalesce(
+                    func.sum(AiUsage.input_tokens + AiUsage.output_tokens), 0
+                ),
+                func.min(AiUsage.created_at),
+            ).where(AiUsage.user_id == user_id, AiUsage.created_at >= now - window)
+        )
+        used, oldest = result.one()
+
+    if used < AI_USER_TOKEN_QUOTA:
+        return
+
+    _stats["rejected_quota"] += 1
+    logging.warning(f"User {user_id} exceeded the AI token quota ({used} tokens)")
+
+    if oldest.tzinfo is None:
+        oldest = oldest.replace(tzinfo=timezone.utc)
+    retry_after = max(1, int((oldest + window - now).total_seconds()))
+
+    raise AiUserLimitExceeded(
+        "AI token quota exceeded, try again later",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+@asynccontextmanager
+async def ai_user_slot(user_id: Optional[int]):
+    """
+    Admit an AI call of a user: check the token quota, then wait for one of
+    the user's AI_USER_MAX_CONCURRENCY slots. Rejects with 429 when too many
+    calls of the user are already waiting. Calls without user are not limited.
+    """
+    if user_id is None:
+        yield
+        return
+
+    await check_token_quota(user_id)
+
+    slots = _slots.setdefault(user_id, _UserSlots())
+    if slots.pending >= AI_USER_MAX_CONCURRENCY + AI_USER_MAX_QUEUED:
+        _stats["rejected_concurrency"] += 1
+        raise AiUserLimitExceeded("Too many AI requests in progress, try again later")
+
+    slots.pending += 1
+    try:
+        async with slots.semaphore:
+            yield
+
+    finally:
+        slots.pending -= 1
+        if slots.pending == 0 and _slots.get(user_id) is slots:
+            del _slots[user_id]
+
+
+async def record_ai_usage(
+    user_id: Optional[int],
+    stock_id: Optional[int],
+    purpose: str,
+    model: Optional[str],
+    ok: bool,
+    latency: float,
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+):
+    """
+    Append an OpenAI call to the usage ledger. Failures to write are logged,
+    they never fail the call itself.
+    """
+    try:
+        async with async_session() as db:
+            db.add(
+                AiUsage(
+                    user_id=user_id,
+                    stock_id=stock_id,
+                    purpose=purpose,
+                    model=model,
+                    status=USAGE_OK if ok else USAGE_FAILED,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    latency_ms=int(latency * 1000),
+                )
+            )
+            await db.commit()
+
+    except Exception:
+        _stats["ledger_errors"] += 1
+        logging.exception("Failed to record AI usage")
+
+
+def usage_limit_stats() -> dict:
+    """
+    Per-user limit counters of this worker
+    """
+    return {
+        **_stats,
+        "users_with_calls": len(_slots),
+        "max_concurrency": AI_USER_MAX_CONCURRENCY,
+        "max_queued": AI_USER_MAX_QUEUED,
+        "token_quota": AI_USER_TOKEN_QUOTA,
+        "quota_window_hours": AI_USER_QUOTA_WINDOW_HOURS,
+    }
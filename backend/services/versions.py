@@ -0,0 +1,159 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, List, Optional
+
+from fastapi import Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import insert_on_conflict
+from ..models import ResourceVersion
+
+# Clients may keep per-user responses but have to revalidate them
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+# Static reference data only changes with a deployment
+STATIC_CACHE_CONTROL = "public, max-age=86400"
+
+_stats = {"not_modified": 0, "modified": 0}
+
+
+def stock_resource(kind: str, stock_id: int) -> str:
+    """Name of a per-stock resource, e.g. "financials:42" """
+    return f"{kind}:{stock_id}"
+
+
+def stock_resources(stock_id: int) -> List[str]:
+    """Every per-stock resource, bumped when the stock is deleted"""
+    return [
+        stock_resource(kind, stock_id)
+        for kind in ("financials", "prompts", "investment")
+    ]
+
+
+async def bump_versions(db: AsyncSession, user_id: int, resources: Iterable[str]):
+    """
+    Increment the versions of resources of a user in the current transaction,
+    to be committed with the write that changed them. The rows stay locked
+    until commit and are locked in sorted order, call it before
+    next_change_seq.
+    """
+    rows = [
+        {"user_id": user_id, "resource": resource}
+        for resource in sorted(set(resources))
+    ]
+    if not rows:
+        return
+
+    stmt = insert_on_conflict(ResourceVersion).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ResourceVersion.user_id, ResourceVersion.resource],
+        set_={"version": ResourceVersion.version + 1, "updated_at": func.now()},
+    )
+    await db.execute(stmt)
+
+
+def content_etag(content) -> str:
+    """Strong ETag of static JSON serializable content"""
+    data = json.dumps(content, sort_keys=True).encode("utf-8")
+    return f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, compressed responses carry a weak version of the ETag
+    return _opaque_tag(etag) in (
+        _opaque_tag(tag.strip()) for tag in if_none_match.split(",")
+    )
+
+
+def _opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def _not_modified_since(request: Request, last_modified: Optional[datetime]) -> bool:
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have second precision
+    return last_modified.replace(microsecond=0) <= since
+
+
+def not_modified(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = PRIVATE_CACHE_CONTROL,
+) -> Optional[Response]:
+    """
+    Conditional GET: a 304 response when the client's copy is current,
+    otherwise None after setting the validators on the response.
+    If-None-Match takes precedence over If-Modified-Since.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if "if-none-match" in request.headers:
+        current = _etag_matches(request, etag)
+    else:
+        current = _not_modified_since(request, last_modified)
+
+    if current:
+        _stats["not_modified"] += 1
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={**response.headers, **headers},
+        )
+
+    _stats["modified"] += 1
+    response.headers.update(headers)
+    return None
+
+
+async def resource_not_modified(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    user_id: int,
+    resource: str,
+    representation: str = "",
+) -> Optional[Response]:
+    """
+    Conditional GET of a versioned resource of a user, see not_modified.
+    Only reads the version row, call it before querying the resource so a
+    concurrent write can only make the ETag older than the body, never newer.
+    Alternative representations of a resource, e.g. "columnar", get their own
+    ETag.
+    """
+    result = await db.execute(
+        select(ResourceVersion.version, ResourceVersion.updated_at).where(
+            ResourceVersion.user_id == user_id, ResourceVersion.resource == resource
+        )
+    )
+    row = result.one_or_none()
+    version, updated_at = row if row is not None else (0, None)
+    if updated_at is not None and updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+
+    tag = hashlib.sha256(
+        f"{user_id}:{resource}:{version}:{representation}".encode("utf-8")
+    )
+    return not_modified(request, response, f'"{tag.hexdigest()[:32]}"', updated_at)
+
+
+def conditional_get_stats() -> dict:
+    """
+    Conditional GET responses of this worker
+    """
+    return dict(_stats)
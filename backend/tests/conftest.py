@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+# The engine is created when backend.database is imported, point it at a
+# throwaway SQLite database first
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/test.db"
+)
+os.environ.setdefault("AI_SCHEDULER_ENABLED", "false")
+
+import pytest  # noqa: E402
+
+from backend.database import create_tables  # noqa: E402
+from backend.database.database import engine  # noqa: E402
+from backend.models import Base  # noqa: E402
+from backend.services import openai as openai_service  # noqa: E402
+from backend.tests.fake_openai import FakeResponsesServer  # noqa: E402
+
+
+@pytest.fixture
+async def database():
+    """Fresh tables for a test, dropped afterwards"""
+    await create_tables()
+    yield
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.exec_driver_sql("DELETE FROM schema_migrations")
+    # Pooled connections belong to this test's event loop
+    await engine.dispose()
+
+
+@pytest.fixture
+async def fake_openai(database, monkeypatch):
+    """Fake Responses API the shared OpenAI client talks to, see fake_openai.py"""
+    async with FakeResponsesServer() as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        monkeypatch.setattr(openai_service, "_async_openai_client", None)
+        monkeypatch.setattr(
+            openai_service,
+            "_breaker",
+            openai_service.CircuitBreaker(
+                openai_service.OPENAI_BREAKER_FAILURES,
+                openai_service.OPENAI_BREAKER_RESET_SECONDS,
+            ),
+        )
+        monkeypatch.setattr(openai_service, "_latencies", {})
+        yield server
+        await openai_service.close_async_openai_client()
@@ -0,0 +1,245 @@
+"""
+Local fake of the OpenAI Responses API with fault injection, so tests and
+benchmarks exercise the real client, retries and streaming without the
+provider. Point the client at it with OPENAI_BASE_URL=server.base_url.
+"""
+
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Union
+
+
+@dataclass
+class Fault:
+    """Error reply to one request instead of the answer"""
+
+    status: int = 500
+    headers: dict = field(default_factory=dict)
+    # Seconds before replying, beyond the client timeout to simulate a hang
+    delay: float = 0.0
+
+
+class FakeResponsesServer:
+    """
+    HTTP server answering POST /v1/responses, streamed when asked to.
+
+    Requests get the queued faults first, in order, then a random fault with
+    fault_rate or a slow answer with slow_rate, else an answer after latency.
+    A responder, when set, picks the reply to a request body instead: a Fault,
+    the answer text, or None for the above.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        text: str = "A company making things. It sells them worldwide.",
+        deltas: int = 5,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.text = text
+        self.deltas = deltas
+        self.faults: List[Fault] = []
+        self.fault_rate = 0.0
+        self.slow_rate = 0.0
+        self.slow_latency = 0.0
+        self.responder: Optional[Callable[[dict], Union[Fault, str, None]]] = None
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.connections = 0
+        self.disconnects = 0
+        self._random = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers = set()
+        self.port = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    async def __aenter__(self) -> "FakeResponsesServer":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._server.close()
+        handlers = list(self._handlers)
+        for handler in handlers:
+            handler.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._handlers.add(asyncio.current_task())
+        try:
+            # Keep-alive, one connection serves requests until the client closes it
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = dict(
+                    line.split(": ", 1)
+                    for line in head.decode("latin-1").split("\r\n")[1:]
+                    if ": " in line
+                )
+                length = int(
+                    {k.lower(): v for k, v in headers.items()}.get(
+                        "content-length", 0
+                    )
+                )
+                body = json.loads(await reader.readexactly(length) or b"{}")
+
+                # The client sends nothing more until the reply is done, so a
+                # read ending meanwhile means it went away
+                reply = asyncio.ensure_future(self._reply(writer, body))
+                closed = asyncio.ensure_future(reader.read(1))
+                await asyncio.wait({reply, closed}, return_when=asyncio.FIRST_COMPLETED)
+                if not reply.done():
+                    reply.cancel()
+                    self.disconnects += 1
+                    break
+                closed.cancel()
+                await asyncio.wait({closed})
+                reply.result()
+
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+
+    def _next_fault(self) -> Optional[Fault]:
+        if self.faults:
+            return self.faults.pop(0)
+        if self._random.random() < self.fault_rate:
+            return Fault(500)
+        return None
+
+    async def _reply(self, writer, body: dict):
+        self.requests += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            reply = self.responder(body) if self.responder is not None else None
+            fault = reply if isinstance(reply, Fault) else self._next_fault()
+            if fault is not None:
+                await asyncio.sleep(fault.delay)
+                error = {"error": {"message": "Injected fault", "type": "server_error"}}
+                await self._send(writer, fault.status, json.dumps(error), fault.headers)
+                return
+
+            latency = self.latency
+            if self._random.random() < self.slow_rate:
+                latency = self.slow_latency
+            await asyncio.sleep(latency)
+
+            text = reply if isinstance(reply, str) else self.text
+            if body.get("stream"):
+                await self._stream(writer, body.get("model", "gpt-fake"), text)
+            else:
+                response = self._response(body.get("model", "gpt-fake"), text)
+                await self._send(writer, 200, json.dumps(response))
+
+        finally:
+            self.active -= 1
+
+    async def _send(self, writer, status: int, content: str, headers: dict = None):
+        data = content.encode("utf-8")
+        lines = [
+            f"HTTP/1.1 {status} Fake",
+            "Content-Type: application/json",
+            f"Content-Length: {len(data)}",
+            *(f"{name}: {value}" for name, value in (headers or {}).items()),
+        ]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + data)
+        await writer.drain()
+
+    def _response(self, model: str, text: Optional[str] = None) -> dict:
+        return {
+            "id": "resp_fake",
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": "completed",
+            "model": model,
+            "output": [
+                {
+                    "type": "message",
+                    "id": "msg_fake",
+                    "role": "assistant",
+                    "status": "completed",
+                    "content": [
+                        {
+                            "type": "output_text",
+                            "text": self.text if text is None else text,
+                            "annotations": [],
+                        }
+                    ],
+                }
+            ],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": 100,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": 50,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": 150,
+            },
+        }
+
+    async def _stream(self, writer, model: str, text: str):
+        """Server-Sent Events of the text split in deltas, latency between them"""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        size = -(-len(text) // self.deltas)
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        in_progress = {**self._response(model, ""), "status": "in_progress"}
+        message = in_progress["output"][0]
+
+        events = [
+            {"type": "response.created", "response": in_progress},
+            {
+                "type": "response.output_item.added",
+                "output_index": 0,
+                "item": {**message, "content": []},
+            },
+            {
+                "type": "response.content_part.added",
+                "item_id": message["id"],
+                "output_index": 0,
+                "content_index": 0,
+                "part": message["content"][0],
+            },
+            *(
+                {
+                    "type": "response.output_text.delta",
+                    "item_id": message["id"],
+                    "output_index": 0,
+                    "content_index": 0,
+                    "delta": chunk,
+                    "logprobs": [],
+                }
+                for chunk in chunks
+            ),
+            {"type": "response.completed", "response": self._response(model, text)},
+        ]
+
+        for number, event in enumerate(events):
+            if event["type"] == "response.output_text.delta":
+                await asyncio.sleep(self.latency / len(chunks))
+            data = f"event: {event['type']}\ndata: "
+            data += json.dumps({**event, "sequence_number": number}) + "\n\n"
+            chunk = data.encode("utf-8")
+            writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            await writer.drain()
+
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
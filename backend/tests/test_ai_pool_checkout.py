@@ -0,0 +1,74 @@
+import asyncio
+
+from sqlalchemy import select
+
+from backend.database import async_session
+from backend.database import database as database_module
+from backend.database import pool_stats
+from backend.models import Exchange, Stock, User
+from backend.routes.stocks import get_ai_description
+from backend.services.openai import query_company_description_async
+
+COMPANIES = [f"Company {i}" for i in range(8)]
+
+
+class ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+
+async def _add_stocks():
+    async with async_session() as db:
+        # Two users, the AI calls of one user are capped by AI_USER_MAX_CONCURRENCY
+        users = [
+            User(username=f"user{i}", email=f"user{i}@example.com", password_hash="x")
+            for i in range(2)
+        ]
+        exchange = Exchange(abbreviation="NYSE", name="New York", country="US")
+        db.add_all([*users, exchange])
+        await db.flush()
+        db.add_all(
+            Stock(
+                user_id=users[i % 2].id,
+                ticker=f"C{i}",
+                company_name=name,
+                exchange_id=exchange.id,
+                country="US",
+            )
+            for i, name in enumerate(COMPANIES)
+        )
+        await db.commit()
+        return {user.id: user for user in users}
+
+
+async def _describe(user: User, stock_id: int):
+    # One session per call, like the request scoped session of get_db
+    async with async_session() as db:
+        return await get_ai_description(stock_id, ConnectedRequest(), db, user)
+
+
+async def test_connections_are_not_held_during_ai_calls(fake_openai, monkeypatch):
+    users = await _add_stocks()
+    async with async_session() as db:
+        stocks = (await db.execute(select(Stock.id, Stock.user_id))).all()
+
+    # The SDK builds its response models on first use, once per process
+    await query_company_description_async("Warm Up", "NYSE", "US")
+    fake_openai.latency = 0.5
+    monkeypatch.setattr(
+        database_module,
+        "_pool_stats",
+        {**database_module._pool_stats, "max_held_seconds": 0.0, "checkouts": 0},
+    )
+
+    stocks = await asyncio.gather(
+        *(_describe(users[user_id], stock_id) for stock_id, user_id in stocks)
+    )
+
+    assert all(stock.ai_description == fake_openai.text for stock in stocks)
+    # Eight 500ms AI calls ran at once, none of them with a connection held
+    assert fake_openai.max_active == len(COMPANIES)
+    stats = pool_stats()
+    assert stats["checkouts"] >= 2 * len(COMPANIES)
+    assert stats["checked_out"] == 0
+    assert stats["max_held_seconds"] < 0.25
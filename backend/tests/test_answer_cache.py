@@ -0,0 +1,65 @@
+from fastapi import Response
+from sqlalchemy import select
+
+from backend.database import async_session
+from backend.models import AiAnswerCache, Exchange, Stock, StockAiPromptHistory, User
+from backend.routes.prompt import ANSWER_MAX_LENGTH, get_ai_response, get_responses
+from backend.schemas import FinancialCreate
+
+
+class FakeRequest:
+    headers = {}
+
+    async def is_disconnected(self):
+        return False
+
+
+async def _add_users_tracking_one_company():
+    async with async_session() as db:
+        users = [
+            User(username=f"user{i}", email=f"user{i}@example.com", password_hash="x")
+            for i in range(2)
+        ]
+        exchange = Exchange(abbreviation="NASDAQ", name="Nasdaq", country="US")
+        db.add_all([*users, exchange])
+        await db.flush()
+        stocks = [
+            Stock(
+                user_id=user.id,
+                ticker="AAPL",
+                company_name="Apple Inc",
+                exchange_id=exchange.id,
+                country="US",
+            )
+            for user in users
+        ]
+        db.add_all(stocks)
+        await db.commit()
+        return list(zip(users, stocks))
+
+
+async def test_shared_answers_are_cached_and_kept_in_full(fake_openai):
+    fake_openai.text = "A long answer. " * 60
+    assert len(fake_openai.text) > ANSWER_MAX_LENGTH
+
+    for user, stock in await _add_users_tracking_one_company():
+        async with async_session() as db:
+            await get_ai_response(
+                "Q1",
+                FinancialCreate(stock_id=stock.id, data={}),
+                FakeRequest(),
+                db,
+                user,
+            )
+
+    # The second user got the answer of the first one from the cache
+    assert fake_openai.requests == 1
+    async with async_session() as db:
+        cached = (await db.execute(select(AiAnswerCache.response))).scalar_one()
+        history = (await db.execute(select(StockAiPromptHistory))).scalars().all()
+    assert cached == fake_openai.text
+    assert [entry.response for entry in history] == [fake_openai.text] * 2
+
+    async with async_session() as db:
+        latest = await get_responses(stock.id, FakeRequest(), Response(), db, user)
+    assert latest["prompts"] == {"Q1": fake_openai.text[:ANSWER_MAX_LENGTH]}
@@ -0,0 +1,43 @@
+import httpx
+from fastapi import FastAPI, Request, Response
+
+from backend.services.compression import CompressionMiddleware
+from backend.services.versions import not_modified
+
+ETAG = '"v1"'
+
+
+def _client() -> httpx.AsyncClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/items")
+    async def items(request: Request, response: Response):
+        cached = not_modified(request, response, ETAG)
+        if cached:
+            return cached
+        return [{"id": i, "name": f"Item {i}"} for i in range(200)]
+
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+async def test_compressed_responses_have_weak_etags():
+    async with _client() as client:
+        plain = await client.get("/items", headers={"Accept-Encoding": "identity"})
+        compressed = await client.get("/items", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in plain.headers
+        assert plain.headers["etag"] == ETAG
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.headers["etag"] == f"W/{ETAG}"
+        assert compressed.json() == plain.json()
+
+        # Either validator revalidates the resource
+        for etag in (ETAG, f"W/{ETAG}"):
+            cached = await client.get(
+                "/items",
+                headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+            )
+            assert cached.status_code == 304
+            assert cached.headers["etag"] == f"W/{ETAG}"
@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from backend.database import async_session
+from backend.models import Exchange, Stock, User
+from backend.routes import stocks as stocks_routes
+from backend.services.openai import AiAnswer
+
+STALE_COMPANIES = [
+    "Apple Inc",
+    "Microsoft Corp",
+    "Nvidia Corp",
+    "Tesla Inc",
+    "Intel Corp",
+]
+
+
+class FakeDescriptions:
+    """Stub of query_company_description_async recording its calls"""
+
+    def __init__(self):
+        self.calls = []
+        self.finished = 0
+
+    async def __call__(self, company_name, exchange, country, **kwargs):
+        # Calls finished when this one started, shows the batch it ran in
+        self.calls.append((company_name, self.finished))
+        await asyncio.sleep(0.01)
+        self.finished += 1
+        return AiAnswer(True, f"Description of {company_name.strip()}")
+
+
+async def _add_stocks():
+    now = datetime.now(timezone.utc)
+    async with async_session() as db:
+        users = [
+            User(username=f"user{i}", email=f"user{i}@example.com", password_hash="x")
+            for i in range(2)
+        ]
+        exchange = Exchange(abbreviation="NYSE", name="New York", country="US")
+        db.add_all([*users, exchange])
+        await db.flush()
+
+        def stock(user, name, age_days):
+            return Stock(
+                user_id=user.id,
+                ticker=name[:4].upper(),
+                company_name=name,
+                exchange_id=exchange.id,
+                country="US",
+                ai_description="Old description",
+                ai_description_created_at=now - timedelta(days=age_days),
+            )
+
+        # The stalest first, the second user tracks Apple under another spelling
+        db.add_all(
+            stock(users[0], name, 60 - i) for i, name in enumerate(STALE_COMPANIES)
+        )
+        db.add(stock(users[1], " apple  INC ", 50))
+        db.add(stock(users[0], "Fresh Co", 1))
+        await db.commit()
+
+
+async def _descriptions():
+    async with async_session() as db:
+        result = await db.execute(select(Stock.company_name, Stock.ai_description))
+        return dict(result.all())
+
+
+async def test_refresh_batches_and_dedups_companies(database, monkeypatch):
+    fake = FakeDescriptions()
+    monkeypatch.setattr(stocks_routes, "query_company_description_async", fake)
+    monkeypatch.setattr(stocks_routes, "AI_REFRESH_BATCH_SIZE", 2)
+    monkeypatch.setattr(stocks_routes, "AI_REFRESH_BATCH_PAUSE_SECONDS", 0)
+    await _add_stocks()
+
+    await stocks_routes.refresh_stale_ai_descriptions()
+
+    # One call per company, the stalest first, a batch starts once the
+    # previous one is done
+    assert [name for name, _ in fake.calls] == STALE_COMPANIES
+    assert [finished for _, finished in fake.calls] == [0, 0, 2, 2, 4]
+
+    descriptions = await _descriptions()
+    for name in STALE_COMPANIES:
+        assert descriptions[name] == f"Description of {name}"
+    assert descriptions[" apple  INC "] == "Description of Apple Inc"
+    assert descriptions["Fresh Co"] == "Old description"
+
+
+async def test_refresh_stops_at_max_companies(database, monkeypatch):
+    fake = FakeDescriptions()
+    monkeypatch.setattr(stocks_routes, "query_company_description_async", fake)
+    monkeypatch.setattr(stocks_routes, "AI_REFRESH_BATCH_PAUSE_SECONDS", 0)
+    monkeypatch.setattr(stocks_routes, "AI_REFRESH_MAX_COMPANIES", 2)
+    await _add_stocks()
+
+    await stocks_routes.refresh_stale_ai_descriptions()
+
+    assert [name for name, _ in fake.calls] == STALE_COMPANIES[:2]
+    descriptions = await _descriptions()
+    assert descriptions[" apple  INC "] == "Description of Apple Inc"
+    assert descriptions["Tesla Inc"] == "Old description"
+
+
+async def test_refresh_skips_stocks_without_exchange(database, monkeypatch):
+    fake = FakeDescriptions()
+    monkeypatch.setattr(stocks_routes, "query_company_description_async", fake)
+    monkeypatch.setattr(stocks_routes, "AI_REFRESH_BATCH_PAUSE_SECONDS", 0)
+    await _add_stocks()
+    async with async_session() as db:
+        user_id = (await db.execute(select(User.id))).scalars().first()
+        # The stalest stock, its exchange was deleted
+        db.add(
+            Stock(
+                user_id=user_id,
+                ticker="ORPH",
+                company_name="Orphan Corp",
+                country="US",
+                ai_description="Old description",
+                ai_description_created_at=datetime.now(timezone.utc)
+                - timedelta(days=90),
+            )
+        )
+        await db.commit()
+
+    await stocks_routes.refresh_stale_ai_descriptions()
+
+    assert [name for name, _ in fake.calls] == STALE_COMPANIES
+    descriptions = await _descriptions()
+    assert descriptions["Orphan Corp"] == "Old description"
+    assert descriptions["Tesla Inc"] == "Description of Tesla Inc"
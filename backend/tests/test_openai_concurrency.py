@@ -0,0 +1,82 @@
+import asyncio
+import gc
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from backend.services import openai as openai_service
+from backend.services.openai import (
+    cancel_on_disconnect,
+    query_company_description_async,
+)
+
+
+async def _describe():
+    return await query_company_description_async(
+        "Apple Inc", "NASDAQ", "United States"
+    )
+
+
+async def _max_loop_lag(until: asyncio.Future) -> float:
+    """Longest the event loop was late to wake a 10ms sleeper until done"""
+    lag = 0.0
+    while not until.done():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lag = max(lag, time.perf_counter() - started - 0.01)
+    return lag
+
+
+async def test_calls_run_concurrently_without_blocking_the_loop(fake_openai):
+    # The SDK builds its response models on first use, once per process
+    await _describe()
+    fake_openai.latency = 0.3
+    # Garbage of earlier tests collected during the calls would stall the loop
+    gc.collect()
+
+    started = time.perf_counter()
+    calls = asyncio.gather(*(_describe() for _ in range(10)))
+    lag = await _max_loop_lag(calls)
+    answers = await calls
+
+    assert all(answer.ok for answer in answers)
+    assert fake_openai.max_active == 10
+    # Ten 300ms calls overlap instead of taking 3s one after the other
+    assert time.perf_counter() - started < 0.9
+    assert lag < 0.1
+
+
+async def test_connections_are_pooled_and_bounded(fake_openai, monkeypatch):
+    monkeypatch.setattr(openai_service, "OPENAI_MAX_CONNECTIONS", 3)
+    fake_openai.latency = 0.1
+
+    answers = await asyncio.gather(*(_describe() for _ in range(9)))
+    await asyncio.gather(*(_describe() for _ in range(3)))
+
+    assert all(answer.ok for answer in answers)
+    assert fake_openai.max_active == 3
+    # Keep-alive connections are reused by the later calls
+    assert fake_openai.connections == 3
+
+
+async def test_disconnected_client_cancels_the_call(fake_openai, monkeypatch):
+    monkeypatch.setattr(openai_service, "DISCONNECT_POLL_SECONDS", 0.05)
+    fake_openai.latency = 5
+
+    class GoneRequest:
+        async def is_disconnected(self):
+            return fake_openai.requests > 0
+
+    started = time.perf_counter()
+    with pytest.raises(HTTPException) as error:
+        await cancel_on_disconnect(GoneRequest(), _describe())
+
+    assert error.value.status_code == 499
+    assert time.perf_counter() - started < 1
+    # The HTTP request to the provider is aborted too
+    for _ in range(50):
+        if fake_openai.disconnects:
+            break
+        await asyncio.sleep(0.01)
+    assert fake_openai.disconnects == 1
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from backend.services import openai as openai_service
+from backend.services.openai import query_company_description_async
+from backend.tests.fake_openai import Fault
+
+
+async def _describe(timeout=None):
+    return await query_company_description_async(
+        "Apple Inc", "NASDAQ", "United States", timeout=timeout
+    )
+
+
+async def test_answer(fake_openai):
+    answer = await _describe()
+
+    assert answer.ok
+    assert answer.text == fake_openai.text
+    assert (answer.input_tokens, answer.output_tokens) == (100, 50)
+
+
+async def test_server_error_is_retried(fake_openai, monkeypatch):
+    monkeypatch.setattr(openai_service, "OPENAI_BACKOFF_BASE_SECONDS", 0.01)
+    fake_openai.faults = [Fault(500), Fault(502)]
+
+    answer = await _describe()
+
+    assert answer.ok
+    assert fake_openai.requests == 3
+
+
+async def test_retry_waits_for_retry_after(fake_openai):
+    fake_openai.faults = [Fault(429, {"retry-after-ms": "300"})]
+
+    started = time.perf_counter()
+    answer = await _describe()
+
+    assert answer.ok
+    assert time.perf_counter() - started >= 0.3
+
+
+async def test_retry_after_is_rounded_up(fake_openai, monkeypatch):
+    monkeypatch.setattr(openai_service, "OPENAI_MAX_ATTEMPTS", 1)
+    fake_openai.faults = [Fault(503, {"retry-after": "1.2"})]
+
+    with pytest.raises(HTTPException) as error:
+        await _describe()
+
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "2"}
+
+
+async def test_hung_provider_times_out(fake_openai):
+    fake_openai.faults = [Fault(200, delay=5)]
+
+    started = time.perf_counter()
+    with pytest.raises(HTTPException) as error:
+        await _describe(timeout=0.3)
+
+    assert error.value.status_code == 504
+    assert time.perf_counter() - started < 1
+
+
+async def test_open_circuit_fails_fast(fake_openai, monkeypatch):
+    monkeypatch.setattr(openai_service, "OPENAI_MAX_ATTEMPTS", 1)
+    fake_openai.faults = [Fault(500)] * openai_service.OPENAI_BREAKER_FAILURES
+    for _ in range(openai_service.OPENAI_BREAKER_FAILURES):
+        with pytest.raises(HTTPException):
+            await _describe()
+
+    with pytest.raises(HTTPException) as error:
+        await _describe()
+
+    # Rejected without reaching the provider, told when to come back
+    assert error.value.status_code == 503
+    assert int(error.value.headers["Retry-After"]) >= 1
+    assert fake_openai.requests == openai_service.OPENAI_BREAKER_FAILURES
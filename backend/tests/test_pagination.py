@@ -0,0 +1,92 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from backend.database import async_session
+from backend.models import Stock, User
+from backend.routes.stocks import get_stocks_page
+from backend.services.pagination import encode_cursor
+
+# Few distinct names, so pages end in the middle of a run of ties
+COMPANY_NAMES = ["Beta", "Alpha", "Beta", "Alpha", "Beta", "Alpha", "Beta"]
+
+
+async def _add_stocks() -> User:
+    async with async_session() as db:
+        user = User(username="user", email="user@example.com", password_hash="x")
+        db.add(user)
+        await db.flush()
+        # All created at once so created_at ties too. Set here, SQLite stores
+        # its CURRENT_TIMESTAMP default in another format than bound datetimes
+        created_at = datetime.now(timezone.utc)
+        db.add_all(
+            Stock(
+                user_id=user.id,
+                ticker=f"T{i}",
+                company_name=name,
+                created_at=created_at,
+            )
+            for i, name in enumerate(COMPANY_NAMES)
+        )
+        await db.commit()
+        return user
+
+
+async def _page(user: User, sort: str, order: str, cursor=None, limit: int = 2):
+    async with async_session() as db:
+        return await get_stocks_page(
+            cursor=cursor,
+            limit=limit,
+            sort=sort,
+            order=order,
+            sector=None,
+            country=None,
+            exchange_id=None,
+            has_financials=None,
+            include_total=False,
+            db=db,
+            current_user=user,
+        )
+
+
+@pytest.mark.parametrize("sort", ["company_name", "created_at", "ticker", "id"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+async def test_pages_neither_skip_nor_repeat_ties(database, sort, order):
+    user = await _add_stocks()
+    everything = await _page(user, sort, order, limit=len(COMPANY_NAMES))
+
+    paged = []
+    cursor = None
+    while True:
+        page = await _page(user, sort, order, cursor)
+        paged.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [stock.id for stock in paged] == [
+        stock.id for stock in everything["items"]
+    ]
+    assert len(paged) == len(COMPANY_NAMES)
+
+
+@pytest.mark.parametrize(
+    "sort, values",
+    [
+        ("id", ["1", 1]),
+        ("id", [True, 1]),
+        ("company_name", [1, 1]),
+        ("company_name", [None, 1]),
+        ("company_name", ["Alpha", {"id": 1}]),
+        ("created_at", [1, 1]),
+        ("created_at", ["yesterday", 1]),
+    ],
+)
+async def test_crafted_cursor_is_rejected(database, sort, values):
+    user = await _add_stocks()
+
+    with pytest.raises(HTTPException) as error:
+        await _page(user, sort, "asc", encode_cursor(values))
+
+    assert error.value.status_code == 400
@@ -0,0 +1,102 @@
+from backend.database import async_session
+from backend.models import Exchange, Stock, User
+from backend.routes.prompt import (
+    AI_RUN_ALL_CONCURRENCY,
+    PROMPT_DEPENDENCIES,
+    PROMPTS,
+    run_all_prompts,
+)
+from backend.schemas import FinancialCreate
+from backend.tests.fake_openai import Fault
+
+
+class ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+
+class PromptResponder:
+    """Answers every prompt with its id, records the inputs of the requests"""
+
+    def __init__(self, faults=None):
+        self.faults = faults or {}
+        self.inputs = {}
+
+    def __call__(self, body: dict):
+        prompt_id = next(
+            prompt_id
+            for prompt_id, prompt in PROMPTS.items()
+            if f"Question/Prompt: {prompt}, " in body["input"]
+        )
+        self.inputs[prompt_id] = body["input"]
+        return self.faults.get(prompt_id, f"Answer to {prompt_id}.")
+
+
+async def _add_stock():
+    async with async_session() as db:
+        user = User(username="user", email="user@example.com", password_hash="x")
+        exchange = Exchange(abbreviation="NASDAQ", name="Nasdaq", country="US")
+        db.add_all([user, exchange])
+        await db.flush()
+        stock = Stock(
+            user_id=user.id,
+            ticker="AAPL",
+            company_name="Apple Inc",
+            exchange_id=exchange.id,
+            country="US",
+        )
+        db.add(stock)
+        await db.commit()
+        return user, stock
+
+
+async def _run_all(user: User, stock: Stock) -> dict:
+    async with async_session() as db:
+        return await run_all_prompts(
+            stock.id,
+            FinancialCreate(stock_id=stock.id, data={}),
+            ConnectedRequest(),
+            db,
+            user,
+        )
+
+
+async def test_prompts_start_once_their_dependencies_are_answered(fake_openai):
+    user, stock = await _add_stock()
+    responder = PromptResponder()
+    fake_openai.responder = responder
+    fake_openai.latency = 0.05
+
+    result = await _run_all(user, stock)
+
+    assert result["errors"] == {}
+    assert result["prompts"] == {
+        prompt_id: f"Answer to {prompt_id}." for prompt_id in PROMPTS
+    }
+    # Independent prompts ran side by side, within the bound
+    assert 1 < fake_openai.max_active <= AI_RUN_ALL_CONCURRENCY
+    # Each dependent prompt was asked with the answers it builds on
+    for prompt_id, dependencies in PROMPT_DEPENDENCIES.items():
+        for dependency in dependencies:
+            assert f"Answer: Answer to {dependency}." in responder.inputs[prompt_id]
+
+
+async def test_failed_prompt_skips_the_prompts_depending_on_it(fake_openai):
+    user, stock = await _add_stock()
+    responder = PromptResponder(faults={"Q3": Fault(400)})
+    fake_openai.responder = responder
+
+    result = await _run_all(user, stock)
+
+    dependents = [
+        prompt_id
+        for prompt_id, dependencies in PROMPT_DEPENDENCIES.items()
+        if "Q3" in dependencies
+    ]
+    assert dependents == ["Q100", "Q101"]
+    assert set(result["errors"]) == {"Q3", *dependents}
+    assert result["errors"]["Q100"] == "Skipped, depends on failed prompts Q3"
+    assert result["errors"]["Q101"] == "Skipped, depends on failed prompts Q3, Q100"
+    # Skipped prompts were never asked, the other ones were answered and saved
+    assert set(responder.inputs) == set(PROMPTS) - set(dependents)
+    assert set(result["prompts"]) == set(PROMPTS) - set(result["errors"])
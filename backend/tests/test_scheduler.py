@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from backend.database import async_session
+from backend.models import NightlyTaskLease
+from backend.services import scheduler
+
+
+async def test_one_worker_runs_a_task_at_a_time(database, monkeypatch):
+    release = asyncio.Event()
+    runs = []
+
+    async def task():
+        runs.append(len(runs))
+        await release.wait()
+
+    monkeypatch.setitem(scheduler._nightly_tasks, "test", task)
+    monkeypatch.setattr(scheduler, "_last_runs", {})
+    worker = scheduler._WORKER_ID
+
+    running = asyncio.ensure_future(scheduler.run_nightly_task("test"))
+    while not runs:
+        await asyncio.sleep(0.01)
+
+    # Another worker finds the lease taken and skips the run
+    monkeypatch.setattr(scheduler, "_WORKER_ID", "other-worker")
+    await scheduler.run_nightly_task("test")
+    assert runs == [0]
+    monkeypatch.setattr(scheduler, "_WORKER_ID", worker)
+
+    release.set()
+    await running
+    assert "test" in scheduler._last_runs
+
+    # The lease is given back once the task is done
+    await scheduler.run_nightly_task("test")
+    assert runs == [0, 1]
+
+
+async def test_lease_of_a_crashed_worker_runs_out(database, monkeypatch):
+    runs = []
+
+    async def task():
+        runs.append(scheduler._WORKER_ID)
+
+    monkeypatch.setitem(scheduler._nightly_tasks, "test", task)
+    monkeypatch.setattr(scheduler, "_last_runs", {})
+    now = datetime.now(timezone.utc)
+    async with async_session() as db:
+        db.add(
+            NightlyTaskLease(
+                name="test", holder="crashed", expires_at=now + timedelta(minutes=5)
+            )
+        )
+        await db.commit()
+
+    await scheduler.run_nightly_task("test")
+    assert runs == []
+
+    async with async_session() as db:
+        lease = await db.get(NightlyTaskLease, "test")
+        lease.expires_at = now - timedelta(minutes=1)
+        await db.commit()
+
+    await scheduler.run_nightly_task("test")
+    assert runs == [scheduler._WORKER_ID]
+
+    async with async_session() as db:
+        lease = (await db.execute(select(NightlyTaskLease))).scalar_one()
+    assert lease.holder == scheduler._WORKER_ID
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from backend.services.singleflight import SingleFlight
+from backend.services.usage import AiUserLimitExceeded
+
+
+async def test_call_without_callers_is_not_joined():
+    flights = SingleFlight()
+    started = asyncio.Event()
+
+    async def abandoned():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            # Like closing the connection of an aborted AI call
+            await asyncio.sleep(0.05)
+            raise
+
+    async def fresh():
+        return "fresh"
+
+    caller = asyncio.ensure_future(flights.do("key", abandoned))
+    await started.wait()
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+
+    # The abandoned call is still winding down, a new caller starts its own
+    assert flights.stats()["in_flight"] == 0
+    assert await flights.do("key", fresh) == "fresh"
+    assert flights.calls == 2
+
+
+async def test_errors_of_the_caller_are_not_shared():
+    flights = SingleFlight(caller_errors=(AiUserLimitExceeded,))
+
+    async def limited():
+        await asyncio.sleep(0.05)
+        raise AiUserLimitExceeded("Too many AI requests in progress")
+
+    async def unavailable():
+        await asyncio.sleep(0.05)
+        raise HTTPException(status_code=503, detail="AI provider unavailable")
+
+    async def answer():
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    # The caller over its limit gets the 429, the waiters retry with their call
+    results = await asyncio.gather(
+        flights.do("shared", limited),
+        flights.do("shared", answer),
+        flights.do("shared", answer),
+        return_exceptions=True,
+    )
+    assert isinstance(results[0], AiUserLimitExceeded)
+    assert results[1:] == ["answer", "answer"]
+    assert (flights.calls, flights.retried) == (2, 2)
+
+    # Other errors concern every caller
+    results = await asyncio.gather(
+        flights.do("shared", unavailable),
+        flights.do("shared", answer),
+        return_exceptions=True,
+    )
+    assert [error.status_code for error in results] == [503, 503]
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import time
+
+from backend.database import async_session
+from backend.models import Exchange, Stock, User
+from backend.routes.stocks import stream_ai_description
+from backend.services.openai import stream_company_description
+from backend.services.streaming import sse_answer_response
+from backend.tests.fake_openai import Fault
+
+
+async def _events(response):
+    """(event, data) pairs of a Server-Sent Events response, comments skipped"""
+    body = "".join([chunk async for chunk in response.body_iterator])
+    events = []
+    for block in body.split("\n\n"):
+        lines = dict(
+            line.split(": ", 1) for line in block.split("\n") if ": " in line
+        )
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def _describe():
+    return stream_company_description("Apple Inc", "NASDAQ", "United States")
+
+
+async def test_deltas_arrive_before_the_answer_is_done(fake_openai):
+    fake_openai.latency = 0.5
+
+    started = time.perf_counter()
+    deltas = []
+    first_delta_at = None
+    async for delta in _describe():
+        first_delta_at = first_delta_at or time.perf_counter() - started
+        deltas.append(delta)
+    finished_at = time.perf_counter() - started
+
+    assert "".join(deltas) == fake_openai.text
+    assert len(deltas) == fake_openai.deltas
+    # The answer starts after 500ms, then a delta every 100ms
+    assert first_delta_at < finished_at - 0.3
+
+
+async def test_stream_route_sends_deltas_and_saves_the_description(fake_openai):
+    async with async_session() as db:
+        user = User(username="user", email="user@example.com", password_hash="x")
+        exchange = Exchange(abbreviation="NASDAQ", name="Nasdaq", country="US")
+        db.add_all([user, exchange])
+        await db.flush()
+        stock = Stock(
+            user_id=user.id,
+            ticker="AAPL",
+            company_name="Apple Inc",
+            exchange_id=exchange.id,
+            country="US",
+        )
+        db.add(stock)
+        await db.commit()
+
+    async with async_session() as db:
+        response = await stream_ai_description(stock.id, db, user)
+        events = await _events(response)
+
+    assert response.media_type == "text/event-stream"
+    names = [name for name, _ in events]
+    assert names == ["delta"] * fake_openai.deltas + ["done"]
+    assert "".join(data["delta"] for name, data in events[:-1]) == fake_openai.text
+    assert events[-1][1]["ai_description"] == fake_openai.text
+
+    async with async_session() as db:
+        saved = await db.get(Stock, stock.id)
+    assert saved.ai_description == fake_openai.text
+
+
+async def test_provider_error_becomes_an_error_event(fake_openai):
+    fake_openai.faults = [Fault(400)]
+
+    async def finish(text):
+        raise AssertionError("finish called on a failed stream")
+
+    events = await _events(sse_answer_response(_describe(), finish))
+
+    assert [name for name, _ in events] == ["error"]
+    assert events[0][1]["status_code"] >= 400
+
+
+async def test_closing_the_stream_aborts_the_request(fake_openai):
+    fake_openai.latency = 1
+
+    deltas = _describe()
+    # The answer starts after 1s, then a delta every 200ms
+    await deltas.__anext__()
+    await deltas.aclose()
+
+    for _ in range(50):
+        if fake_openai.disconnects:
+            break
+        await asyncio.sleep(0.01)
+    assert fake_openai.disconnects == 1
@@ -0,0 +1,131 @@
+import json
+
+from sqlalchemy import event
+
+from backend.database import async_session
+from backend.database.database import engine
+from backend.models import Exchange, User
+from backend.routes.exchanges import delete_exchange
+from backend.routes.financial import save_financial_data
+from backend.routes.stocks import create_stock, delete_stock, update_stock
+from backend.routes.sync import sync
+from backend.schemas import FinancialCreate, StockCreate, StockUpdate
+
+
+async def _user(name: str) -> User:
+    async with async_session() as db:
+        user = User(username=name, email=f"{name}@example.com", password_hash="x")
+        db.add(user)
+        await db.commit()
+        return user
+
+
+async def _sync(user: User, since=None) -> dict:
+    async with async_session() as db:
+        response = await sync(since, db, user)
+    return json.loads(response.body)
+
+
+async def _create(user: User, ticker: str) -> int:
+    async with async_session() as db:
+        stock = await create_stock(
+            StockCreate(ticker=ticker, company_name=f"{ticker} Inc"), db, user
+        )
+        return stock.id
+
+
+async def test_sync_cursor_returns_changes_and_tombstones(database):
+    user = await _user("user")
+    other = await _user("other")
+
+    assert await _sync(user) == {"cursor": 0}
+
+    kept = await _create(user, "KEEP")
+    deleted = await _create(user, "GONE")
+    full = await _sync(user)
+    cursor = full["cursor"]
+    assert sorted(stock["id"] for stock in full["stocks"]) == [kept, deleted]
+    assert await _sync(user, cursor) == {"cursor": cursor}
+
+    async with async_session() as db:
+        await update_stock(kept, StockUpdate(company_name="Kept Corp"), db, user)
+    async with async_session() as db:
+        await save_financial_data(
+            kept,
+            FinancialCreate(
+                stock_id=kept, data={"2024-12-31": {"revenue": 100.0}}
+            ),
+            db,
+            user,
+        )
+
+    changes = await _sync(user, cursor)
+    assert changes["cursor"] > cursor
+    assert [stock["company_name"] for stock in changes["stocks"]] == ["Kept Corp"]
+    assert changes["financials"] == [
+        {"stock_id": kept, "period": "2024-12-31", "metrics": {"revenue": 100.0}}
+    ]
+    assert "deleted_stocks" not in changes
+    cursor = changes["cursor"]
+
+    async with async_session() as db:
+        await delete_stock(deleted, db, user)
+
+    changes = await _sync(user, cursor)
+    assert changes == {"cursor": cursor + 1, "deleted_stocks": [deleted]}
+
+    # A full sync has no tombstones, only the rows left
+    full = await _sync(user)
+    assert [stock["id"] for stock in full["stocks"]] == [kept]
+    assert "deleted_stocks" not in full
+
+    # Cursors are per user
+    assert await _sync(other) == {"cursor": 0}
+
+
+async def test_writes_lock_versions_in_one_order(database):
+    """
+    Every write locks its resource_versions rows in sorted order with the
+    change sequence counter last, so two writes of a user cannot deadlock
+    """
+    user = await _user("user")
+    async with async_session() as db:
+        exchange = Exchange(
+            user_id=user.id, abbreviation="NYSE", name="New York", country="US"
+        )
+        db.add(exchange)
+        await db.commit()
+
+    locked = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO resource_versions"):
+            locked.extend(p for p in parameters if isinstance(p, str))
+
+    async def write(coro_fn, *args):
+        locked.clear()
+        async with async_session() as db:
+            await coro_fn(*args, db, user)
+        assert locked[-1] == "sync"
+        assert locked[:-1] == sorted(locked[:-1])
+        return list(locked)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        async with async_session() as db:
+            stock = await create_stock(
+                StockCreate(ticker="A", company_name="A Inc", exchange_id=exchange.id),
+                db,
+                user,
+            )
+        data = FinancialCreate(
+            stock_id=stock.id, data={"2024-12-31": {"revenue": 1.0}}
+        )
+        assert await write(save_financial_data, stock.id, data) == [
+            f"financials:{stock.id}",
+            "sync",
+        ]
+        assert await write(delete_exchange, exchange.id) == ["stocks", "sync"]
+        assert len(await write(delete_stock, stock.id)) == 5
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)